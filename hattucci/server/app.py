@@ -1,10 +1,30 @@
 # server/app.py
-from flask import Flask, render_template, request, redirect, jsonify
-from hattucci.server.db import get_connection
-import bcrypt
+from flask import (
+    Flask, Response, render_template, request, redirect, jsonify, send_file, stream_with_context,
+)
+from hattucci.server import busqueda
+from hattucci.server import claves
+from hattucci.server import compresion
+from hattucci.server import estaticos
+from hattucci.server import exportar as exportar_mod
+from hattucci.server import importar as importar_mod
+from hattucci.server import inventario as inventario_mod
+from hattucci.server import metricas
+from hattucci.server import pdf
+from hattucci.server import resumen
+from hattucci.server import usuarios
+from hattucci.server import ventas as ventas_mod
+from hattucci.server.db import conexion, pool_stats
+from hattucci.server.paginacion import (
+    ParametroInvalido, armar_where, codificar_cursor, decodificar_cursor,
+    filtros_comunes, leer_fecha, leer_limite, rango_dia,
+)
 
 # Indicar la carpeta de templates y static
 app = Flask(__name__, template_folder='../web/templates', static_folder='../web/static')
+metricas.instrumentar(app)
+compresion.instalar(app)
+estaticos.instalar(app)  # URLs con huella de contenido (python -m hattucci.server.estaticos construir)
 
 # ------------------------------------------
 # RUTA INICIO
@@ -28,31 +48,36 @@ def verificar():
     usuario = request.args.get("usuario")
     correo = request.args.get("correo")
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
     if usuario:
-        cursor.execute("SELECT id FROM registro WHERE usuario=%s", (usuario,))
-        existe = cursor.fetchone() is not None
-        conn.close()
-        return jsonify({"existe": existe})
+        return jsonify({"existe": usuarios.existe_usuario(usuario)})
 
     if correo:
-        cursor.execute("SELECT id FROM registro WHERE correo=%s", (correo,))
-        existe = cursor.fetchone() is not None
-        conn.close()
-        return jsonify({"existe": existe})
+        return jsonify({"existe": usuarios.existe_correo(correo)})
 
-    conn.close()
     return jsonify({"error": "Parámetro inválido"})
 
+# ------------------------------------------
+# VERIFICAR USUARIO Y CORREO EN UNA SOLA LLAMADA
+# ------------------------------------------
+@app.route("/disponibilidad")
+def disponibilidad():
+    usuario = request.args.get("usuario")
+    correo = request.args.get("correo")
+
+    if not usuario and not correo:
+        return jsonify({"error": "Parámetro inválido"})
+
+    # {"usuario": true/false/null, "correo": true/false/null} → true = ya existe
+    return jsonify(usuarios.disponibilidad(usuario, correo))
+
 # ------------------------------------------
 # REGISTRAR USUARIO
 # ------------------------------------------
 @app.route("/registrar", methods=["POST"])
 def registrar():
-    usuario = request.form.get("usuario")
-    correo = request.form.get("correo")
+    # Igual que en /disponibilidad: lo que se verificó es lo que se guarda
+    usuario = usuarios.normalizar(request.form.get("usuario"))
+    correo = usuarios.normalizar(request.form.get("correo"))
     nombre = request.form.get("nombre")
     apellido = request.form.get("apellido")
     telefono = request.form.get("telefono")
@@ -64,22 +89,28 @@ def registrar():
     if "@" not in correo or (".com" not in correo and ".net" not in correo):
         return "❌ Correo inválido"
 
-    # Hashear contraseña y convertir a string para guardar en MySQL
-    hashed = bcrypt.hashpw(contraseña.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    # Revisar duplicados antes de gastar CPU en bcrypt
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id FROM registro WHERE usuario=%s OR correo=%s LIMIT 1", (usuario, correo))
+        if cursor.fetchone():
+            return "❌ Usuario o correo ya existen"
+
+    # Hashear contraseña (pool de bcrypt, sin conexión prestada mientras tanto)
+    try:
+        hashed = claves.hashear(contraseña)
+    except claves.ClavesOcupado as e:
+        return f"❌ {e}", 503
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM registro WHERE usuario=%s OR correo=%s", (usuario, correo))
-    if cursor.fetchone():
-        conn.close()
-        return "❌ Usuario o correo ya existen"
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            INSERT INTO registro (usuario, correo, nombre, apellido, telefono, contraseña)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (usuario, correo, nombre, apellido, telefono, hashed))
+        conn.commit()
 
-    cursor.execute("""
-        INSERT INTO registro (usuario, correo, nombre, apellido, telefono, contraseña)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (usuario, correo, nombre, apellido, telefono, hashed))
-    conn.commit()
-    conn.close()
+    usuarios.marcar_registrado(usuario, correo)
 
     return redirect("/login")
 
@@ -92,35 +123,55 @@ def login():
 
 @app.route("/ingresar", methods=["POST"])
 def ingresar():
-    usuario = request.form.get("usuario")
+    usuario = usuarios.normalizar(request.form.get("usuario"))
     contraseña = request.form.get("contraseña")
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM registro WHERE usuario=%s", (usuario,))
-    user = cursor.fetchone()
-    conn.close()
+    ip = request.remote_addr
+
+    # Demasiados fallos recientes → rechazar sin gastar CPU en bcrypt
+    if claves.fallos_usuario.bloqueado(usuario) or claves.fallos_ip.bloqueado(ip):
+        return render_template("login.html", error="❌ Demasiados intentos, espere unos minutos"), 429
+
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, contraseña FROM registro WHERE usuario=%s", (usuario,))
+        user = cursor.fetchone()
 
     if not user:
+        claves.fallos_ip.fallo(ip)
         return "❌ Usuario no encontrado"
 
     # Verificación correcta de la contraseña
-    if bcrypt.checkpw(contraseña.encode("utf-8"), user["contraseña"].encode("utf-8")):
-        return redirect("/menu")
-    else:
+    try:
+        valida = claves.verificar(contraseña or "", user["contraseña"])
+    except claves.ClavesOcupado as e:
+        return render_template("login.html", error=f"❌ {e}"), 503
+
+    if not valida:
+        claves.fallos_usuario.fallo(usuario)
+        claves.fallos_ip.fallo(ip)
         return render_template("login.html", error="❌ Contraseña incorrecta")
+
+    claves.fallos_usuario.limpiar(usuario)
+
+    # Si cambió BCRYPT_COSTO, rehacer el hash ahora que tenemos la contraseña
+    if claves.necesita_rehash(user["contraseña"]):
+        try:
+            nuevo = claves.hashear(contraseña)
+            with conexion() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE registro SET contraseña=%s WHERE id=%s", (nuevo, user["id"]))
+                conn.commit()
+        except Exception as e:
+            print("❌ ERROR rehash contraseña:", e)
+
+    return redirect("/menu")
     
 @app.route("/validar_usuario_login")
 def validar_usuario_login():
     usuario = request.args.get("usuario")
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id FROM registro WHERE usuario=%s", (usuario,))
-    user = cursor.fetchone()
-    conn.close()
-
-    return {"existe": True} if user else {"existe": False}
+    return {"existe": bool(usuario) and usuarios.existe_usuario(usuario)}
 
 
 # ------------------------------------------
@@ -150,57 +201,38 @@ def registrar_inventario():
         stock = int(data["stock"])
         precio_venta = float(data["precio_venta"])
 
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # ============================================================
-        # 1️⃣ BUSCAR SI EXISTE UN PRODUCTO IGUAL (misma info excepto stock)
-        # ============================================================
-        sql_buscar = """
-            SELECT * FROM inventario
-            WHERE producto = %s
-            AND precio_venta = %s
-            AND fecha_vencimiento = %s
-            LIMIT 1
-        """
-
-        cursor.execute(sql_buscar, (producto, precio_venta, fecha_venc))
-        existente = cursor.fetchone()
-
-        # ============================================================
-        # 2️⃣ SI EXISTE → SUMAR STOCK
-        # ============================================================
-        if existente:
-            nuevo_stock = existente["stock"] + stock
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
 
+            # ============================================================
+            # SI YA EXISTE UN LOTE IGUAL (misma info excepto stock) → SUMAR
+            # STOCK; SI NO → CREAR FILA. Una sola sentencia sobre la clave
+            # única uq_inventario_lote: dos registros simultáneos del mismo
+            # lote no pueden duplicarlo.
+            # ============================================================
             cursor.execute("""
-                UPDATE inventario
-                SET stock = %s
-                WHERE id = %s
-            """, (nuevo_stock, existente["id"]))
-
+                INSERT INTO inventario (producto, fecha_vencimiento, stock, precio_venta)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    stock = stock + VALUES(stock)
+            """, (producto, fecha_venc, stock, precio_venta))
+
+            # rowcount: 1 = fila nueva, 2 = fila existente actualizada
+            insertado = cursor.rowcount == 1
+            if insertado:
+                busqueda.marcar_catalogo(cursor)
+            version = inventario_mod.marcar_cambio(cursor)
             conn.commit()
-            return jsonify({"ok": True, "update": True})
-
-        # ============================================================
-        # 3️⃣ SI NO EXISTE → CREAR NUEVA FILA
-        # ============================================================
-        sql_insertar = """
-            INSERT INTO inventario (producto, fecha_vencimiento, stock, precio_venta)
-            VALUES (%s, %s, %s, %s)
-        """
-        cursor.execute(sql_insertar, (producto, fecha_venc, stock, precio_venta))
-        conn.commit()
 
-        return jsonify({"ok": True, "insert": True})
+            inventario_mod.publicar("cambio", {"productos": [producto]}, version)
+            if insertado:
+                return jsonify({"ok": True, "insert": True})
+            return jsonify({"ok": True, "update": True})
 
     except Exception as e:
         print("❌ ERROR REGISTRAR INVENTARIO:", e)
         return jsonify({"ok": False, "error": str(e)})
 
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ------------------------------------------
@@ -208,31 +240,83 @@ def registrar_inventario():
 # ------------------------------------------
 @app.route("/obtener_inventario", methods=["GET"])
 def obtener_inventario():
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+    # Filtros y paginación: ver inventario.filtros().
+    # Respuestas en caché por versión del inventario + ETag (ver inventario.py)
+    args = request.args
+    todo = args.get("todo") == "1"
 
-        cursor.execute("""
-            SELECT 
-                id,
-                producto,
-                fecha_vencimiento,
-                stock,
-                precio_venta
-            FROM inventario
-            ORDER BY id DESC
-        """)
+    try:
+        condiciones, params, limite, todo = inventario_mod.filtros(args)
+    except (ParametroInvalido, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
 
-        items = cursor.fetchall()
-        return jsonify(items)
+    try:
+        version = inventario_mod.version()
+        etag = inventario_mod.etag(version)
+
+        if request.if_none_match.contains_weak(etag):  # W/ si iba comprimida
+            respuesta = Response(status=304)
+        else:
+            clave = inventario_mod.clave(version, args)
+            cuerpo = inventario_mod.respuestas.get(clave)
+            if cuerpo is None:
+                cuerpo = app.json.dumps(inventario_mod.consultar(condiciones, params, limite, todo))
+                inventario_mod.respuestas.set(clave, cuerpo)
+            respuesta = Response(cuerpo, mimetype="application/json")
+
+        respuesta.set_etag(etag)
+        # El navegador puede guardarla, pero debe revalidar con If-None-Match
+        respuesta.headers["Cache-Control"] = "no-cache"
+        return respuesta
 
     except Exception as e:
         print("❌ ERROR INVENTARIO:", e)
-        return jsonify([])
+        return jsonify([] if todo else {"items": [], "siguiente": None})
+
+
+# ------------------------------------------
+# CAMBIOS DE STOCK EN VIVO (server-sent events)
+# ------------------------------------------
+@app.route("/eventos_inventario", methods=["GET"])
+def eventos_inventario():
+    # EventSource reenvía el último id recibido al reconectarse
+    ultimo_id = request.headers.get("Last-Event-ID") or request.args.get("ultimo")
+
+    # Cada flujo ocupa un hilo: pasado el tope se rechaza para no dejar sin
+    # hilos al resto de las peticiones (ver inventario.py)
+    if not inventario_mod.abrir_flujo():
+        return (
+            jsonify({"error": "Demasiadas conexiones de eventos, reintente luego"}),
+            503,
+            {"Retry-After": str(inventario_mod.REINTENTO)},
+        )
+
+    respuesta = Response(
+        inventario_mod.flujo(ultimo_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    respuesta.call_on_close(inventario_mod.cerrar_flujo)
+    return respuesta
+
+
+# ------------------------------------------
+# BUSCAR PRODUCTOS (autocompletado de ventas)
+# ------------------------------------------
+@app.route("/buscar_productos", methods=["GET"])
+def buscar_productos():
+    # ?q=lec glo&limite=10 → productos con stock (sumado de sus lotes), ver busqueda.py
+    try:
+        limite = int(request.args.get("limite", busqueda.LIMITE))
+    except ValueError:
+        return jsonify({"error": "limite debe ser un número"}), 400
+
+    try:
+        return jsonify({"items": busqueda.buscar(request.args.get("q", ""), limite)})
+    except Exception as e:
+        print("❌ ERROR BÚSQUEDA:", e)
+        return jsonify({"items": []})
 
-    finally:
-        cursor.close()
-        conn.close()
 
 # ------------------------------------------
 # ELIMINAR PRODUCTO DEL INVENTARIO
@@ -240,21 +324,26 @@ def obtener_inventario():
 @app.route("/eliminar_inventario/<int:id>", methods=["DELETE"])
 def eliminar_inventario(id):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with conexion() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM inventario WHERE id = %s", (id,))
-        conn.commit()
+            # El nombre, para avisar a las cajas qué producto cambió
+            cursor.execute("SELECT producto FROM inventario WHERE id = %s", (id,))
+            fila = cursor.fetchone()
+
+            cursor.execute("DELETE FROM inventario WHERE id = %s", (id,))
+            busqueda.marcar_catalogo(cursor)
+            version = inventario_mod.marcar_cambio(cursor)
+            conn.commit()
 
-        return jsonify({"ok": True})
+            inventario_mod.publicar("cambio", {"productos": [fila[0]] if fila else []}, version)
+
+            return jsonify({"ok": True})
 
     except Exception as e:
         print("❌ ERROR eliminando inventario:", e)
         return jsonify({"ok": False, "error": str(e)})
 
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ------------------------------------------
@@ -264,8 +353,6 @@ def eliminar_inventario(id):
 def ventas():
     return render_template("ventas.html")
 
-from datetime import date
-
 @app.route("/descontar_stock", methods=["POST"])
 def descontar_stock():
     data = request.get_json()
@@ -273,82 +360,32 @@ def descontar_stock():
     comprobante = data.get("comprobante", "SIN_COMPROBANTE")
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Obtener fecha actual AAAA-MM-DD
-        fecha_hoy = date.today()
-
-        # Si hay boleta, obtener correlativo
-        correlativo = None
-        if comprobante == "BOLETA":
-            correlativo = obtener_siguiente_correlativo()  # 🔥 LLAMA A TU FUNCIÓN
-
-        # --------------------------------------------
-        # GUARDAR CADA PRODUCTO DE LA VENTA
-        # --------------------------------------------
-        for item in venta:
-
-            # Descontar stock
-            cursor.execute("""
-                UPDATE inventario
-                SET stock = stock - %s
-                WHERE id = %s
-            """, (item["cantidad"], item["id"]))
-
-            # Registrar venta
-            cursor.execute("""
-                INSERT INTO ventas (producto, cantidad, total, fecha_venta, numero_boleta)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                item["nombre"],
-                item["cantidad"],
-                item["total"],
-                fecha_hoy,
-                correlativo
-            ))
-
-        conn.commit()
+        # Stock, boleta, ventas y resumen en una sola transacción (ver ventas.py)
+        with conexion() as conn:
+            correlativo, items = ventas_mod.registrar_venta(conn, venta, comprobante)
 
         # --------------------------------------------
         # RESPUESTA AL FRONTEND
         # --------------------------------------------
+        # Precios y totales calculados con los lotes descontados: la boleta
+        # se arma con estos, no con los del carrito
         return jsonify({
             "ok": True,
-            "correlativo": str(correlativo) if correlativo else None
+            "correlativo": str(correlativo) if correlativo else None,
+            "items": items,
+            "total": round(sum(i["total"] for i in items), 2)
         })
 
+    except ventas_mod.StockInsuficiente as e:
+        return jsonify({"ok": False, "error": str(e), "faltantes": e.faltantes})
+
+    except ventas_mod.VentaInvalida as e:
+        return jsonify({"ok": False, "error": str(e)})
+
     except Exception as e:
         print("❌ ERROR al procesar venta:", e)
         return jsonify({"ok": False, "error": str(e)})
 
-    finally:
-        cursor.close()
-        conn.close()
-
-
-
-def obtener_siguiente_correlativo():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Obtener número actual
-    cursor.execute("SELECT numero FROM boletas_correlativo ORDER BY id DESC LIMIT 1")
-    data = cursor.fetchone()
-
-    if not data:
-        numero = 1
-        cursor.execute("INSERT INTO boletas_correlativo (numero) VALUES (1)")
-    else:
-        numero = data["numero"] + 1
-        cursor.execute("INSERT INTO boletas_correlativo (numero) VALUES (%s)", (numero,))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-    return numero
-
 
 
 # ------------------------------------------
@@ -372,130 +409,159 @@ def registrar_compra():
     fecha_vencimiento = str(data["fecha_vencimiento"])[:10]
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # -----------------------------------------------
-        # 1️⃣ Buscar coincidencia EXACTA (solo día, sin hora)
-        # -----------------------------------------------
-        sql_buscar = """
-        SELECT 
-            id,
-            nombre_proveedor,
-            contacto_proveedor,
-            producto,
-            cantidad,
-            precio_unitario,
-            fecha_registro,
-            fecha_vencimiento
-        FROM compras
-        WHERE nombre_proveedor = %s
-          AND contacto_proveedor = %s
-          AND producto = %s
-          AND precio_unitario = %s
-          AND DATE(fecha_vencimiento) = %s
-          AND DATE(fecha_registro) = %s
-        LIMIT 1
-        """
-
-        cursor.execute(sql_buscar, (
-            data["proveedor_nombre"],
-            data["proveedor_contacto"],
-            data["producto"],
-            data["precio_unitario"],
-            fecha_vencimiento,
-            fecha_registro
-        ))
-
-        compra_existente = cursor.fetchone()
-
-        # -----------------------------------------------
-        # 2️⃣ Si coincide → sumar cantidad
-        # -----------------------------------------------
-        if compra_existente:
-            nueva_cantidad = compra_existente["cantidad"] + int(data["cantidad"])
-
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            # -----------------------------------------------
+            # Si coincide EXACTA (solo día, sin hora) → sumar cantidad;
+            # si no → insertar. Una sola sentencia sobre la clave única
+            # uq_compras_fusion (dia_registro = DATE(fecha_registro)).
+            # -----------------------------------------------
             cursor.execute("""
-                UPDATE compras
-                SET cantidad = %s
-                WHERE id = %s
-            """, (nueva_cantidad, compra_existente["id"]))
+                INSERT INTO compras (
+                    nombre_proveedor,
+                    contacto_proveedor,
+                    producto,
+                    cantidad,
+                    precio_unitario,
+                    fecha_registro,
+                    fecha_vencimiento
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+            """, (
+                data["proveedor_nombre"],
+                data["proveedor_contacto"],
+                data["producto"],
+                data["cantidad"],
+                data["precio_unitario"],
+                fecha_registro,
+                fecha_vencimiento
+            ))
 
+            # rowcount: 1 = compra nueva, 2 = se sumó a una existente
+            nueva = cursor.rowcount == 1
+            resumen.sumar_compra(
+                cursor, fecha_registro, data["producto"], int(data["cantidad"]),
+                int(data["cantidad"]) * float(data["precio_unitario"]), nueva=nueva
+            )
             conn.commit()
 
+            if nueva:
+                return jsonify({"ok": True, "insert": True})
             return jsonify({"ok": True, "update": True})
 
-        # -----------------------------------------------
-        # 3️⃣ Si NO coincide → insertar nueva compra
-        # -----------------------------------------------
-        cursor.execute("""
-            INSERT INTO compras (
-                nombre_proveedor,
-                contacto_proveedor,
-                producto,
-                cantidad,
-                precio_unitario,
-                fecha_registro,
-                fecha_vencimiento
+    except Exception as e:
+        print("❌ ERROR REGISTRO COMPRA:", e)
+        return jsonify({"ok": False, "error": str(e)})
+
+
+# ------------------------------------------
+# IMPORTAR COMPRAS EN LOTE (CSV / NDJSON)
+# ------------------------------------------
+@app.route("/importar_compras", methods=["POST"])
+def importar_compras():
+    # Acepta un archivo en el campo "archivo" (multipart) o el cuerpo crudo.
+    #   formato=csv|ndjson  → si falta, se deduce de la extensión o el Content-Type
+    #   parcial=1           → importar las filas válidas aunque otras tengan errores
+    archivo = request.files.get("archivo")
+    nombre = (archivo.filename if archivo else "") or ""
+    tipo = (archivo.mimetype if archivo else request.mimetype) or ""
+
+    formato = request.args.get("formato")
+    if not formato:
+        formato = "csv" if nombre.lower().endswith(".csv") or "csv" in tipo else "ndjson"
+    if formato not in ("csv", "ndjson"):
+        return jsonify({"ok": False, "error": "formato debe ser csv o ndjson"}), 400
+
+    flujo = archivo.stream if archivo else request.stream
+
+    try:
+        with conexion() as conn:
+            resultado = importar_mod.importar_compras(
+                conn, importar_mod.abrir(flujo, formato), parcial=request.args.get("parcial") == "1"
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            data["proveedor_nombre"],
-            data["proveedor_contacto"],
-            data["producto"],
-            data["cantidad"],
-            data["precio_unitario"],
-            fecha_registro,
-            fecha_vencimiento
-        ))
+        return jsonify(resultado), (200 if resultado["ok"] else 422)
 
-        conn.commit()
-        return jsonify({"ok": True, "insert": True})
+    except UnicodeDecodeError:
+        return jsonify({"ok": False, "error": "El archivo debe estar en UTF-8"}), 400
 
     except Exception as e:
-        print("❌ ERROR REGISTRO COMPRA:", e)
+        print("❌ ERROR IMPORTANDO COMPRAS:", e)
         return jsonify({"ok": False, "error": str(e)})
 
-    finally:
-        cursor.close()
-        conn.close()
 
 # ------------------------------------------
 # OBTENER TODAS LAS COMPRAS (FORMATO SOLO FECHA)
 # ------------------------------------------
 @app.route("/obtener_compras", methods=["GET"])
 def obtener_compras():
+    # Mismos parámetros que /obtener_inventario (salvo los de stock);
+    # la paginación sigue el orden fecha_registro DESC, id DESC
+    args = request.args
+    todo = args.get("todo") == "1"
+
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        condiciones, params = [], []
+        filtros_comunes(args, condiciones, params)
 
-        cursor.execute("""
-            SELECT 
-                id,
-                nombre_proveedor,
-                contacto_proveedor,
-                producto,
-                cantidad,
-                precio_unitario,
-                DATE(fecha_registro) AS fecha_registro,
-                DATE(fecha_vencimiento) AS fecha_vencimiento
-            FROM compras
-            ORDER BY fecha_registro DESC, id DESC
-        """)
+        limite = None
+        if not todo:
+            limite = leer_limite(args)
+            if args.get("cursor"):
+                ultima_fecha, ultimo_id = decodificar_cursor(args["cursor"], 2)
+                condiciones.append("(fecha_registro < %s OR (fecha_registro = %s AND id < %s))")
+                params.extend([ultima_fecha, ultima_fecha, int(ultimo_id)])
 
-        compras = cursor.fetchall()
+    except (ParametroInvalido, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
 
-        return jsonify(compras)
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            sql = f"""
+                SELECT 
+                    id,
+                    nombre_proveedor,
+                    contacto_proveedor,
+                    producto,
+                    cantidad,
+                    precio_unitario,
+                    CAST(fecha_registro AS CHAR) AS orden_registro,
+                    DATE(fecha_registro) AS fecha_registro,
+                    DATE(fecha_vencimiento) AS fecha_vencimiento
+                FROM compras
+                {armar_where(condiciones)}
+                ORDER BY compras.fecha_registro DESC, compras.id DESC
+            """
+            if limite:
+                sql += " LIMIT %s"
+                params.append(limite + 1)
+
+            cursor.execute(sql, tuple(params))
+            compras = cursor.fetchall()
+
+        siguiente = None
+        if not todo and len(compras) > limite:
+            compras = compras[:limite]
+            # El cursor lleva la fecha tal como está guardada: en SQLite una
+            # compra registrada solo con el día queda como "AAAA-MM-DD" y, leída
+            # como DATETIME ("AAAA-MM-DD 00:00:00"), el texto compara mayor y la
+            # página siguiente repetiría las mismas filas
+            siguiente = codificar_cursor(compras[-1]["orden_registro"], compras[-1]["id"])
+
+        for c in compras:
+            del c["orden_registro"]
+
+        if todo:
+            return jsonify(compras)
+
+        return jsonify({"items": compras, "siguiente": siguiente})
 
     except Exception as e:
         print("❌ ERROR OBTENER COMPRAS:", e)
-        return jsonify([])
-
-    finally:
-        cursor.close()
-        conn.close()
-
-
+        return jsonify([] if todo else {"items": [], "siguiente": None})
 
 
 @app.route("/filtrar_compras_dia", methods=["POST"])
@@ -504,36 +570,33 @@ def filtrar_compras_dia():
     dia = str(data.get("dia"))[:10]
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-        sql = """
-        SELECT
-            id,
-            nombre_proveedor,
-            contacto_proveedor,
-            producto,
-            cantidad,
-            precio_unitario,
-            DATE_FORMAT(fecha_vencimiento, '%Y-%m-%d') AS fecha_vencimiento,
-            DATE_FORMAT(fecha_registro, '%Y-%m-%d') AS fecha_registro
-        FROM compras
-        WHERE DATE(fecha_registro) = %s
-        ORDER BY id DESC
-        """
-
-        cursor.execute(sql, (dia,))
-        compras = cursor.fetchall()
-
-        return jsonify(compras)
+            sql = """
+            SELECT
+                id,
+                nombre_proveedor,
+                contacto_proveedor,
+                producto,
+                cantidad,
+                precio_unitario,
+                DATE_FORMAT(fecha_vencimiento, '%Y-%m-%d') AS fecha_vencimiento,
+                DATE_FORMAT(fecha_registro, '%Y-%m-%d') AS fecha_registro
+            FROM compras
+            WHERE fecha_registro >= %s AND fecha_registro < %s
+            ORDER BY id DESC
+            """
+
+            cursor.execute(sql, rango_dia(dia))
+            compras = cursor.fetchall()
+
+            return jsonify(compras)
 
     except Exception as e:
         print("❌ Error filtrando día:", e)
         return jsonify([])
 
-    finally:
-        cursor.close()
-        conn.close()
 
 
 
@@ -544,88 +607,136 @@ def filtrar_compras_dia():
 @app.route("/eliminar_compra/<int:id>", methods=["DELETE"])
 def eliminar_compra(id):
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-        # 1️⃣ Obtener datos de la compra antes de borrar
-        cursor.execute("""
-            SELECT producto, cantidad, fecha_vencimiento, precio_unitario
-            FROM compras
-            WHERE id = %s
-        """, (id,))
-        compra = cursor.fetchone()
+            # 1️⃣ Obtener datos de la compra antes de borrar
+            cursor.execute("""
+                SELECT producto, cantidad, fecha_vencimiento, precio_unitario, fecha_registro
+                FROM compras
+                WHERE id = %s
+            """, (id,))
+            compra = cursor.fetchone()
 
-        if not compra:
-            return jsonify({"ok": False, "error": "Compra no encontrada"})
+            if not compra:
+                return jsonify({"ok": False, "error": "Compra no encontrada"})
 
-        producto = compra["producto"]
-        cantidad = compra["cantidad"]
-        fecha_venc = str(compra["fecha_vencimiento"])[:10]
+            producto = compra["producto"]
+            cantidad = compra["cantidad"]
+            fecha_venc = str(compra["fecha_vencimiento"])[:10]
 
-        # 2️⃣ Restar cantidad en inventario
-        cursor.execute("""
-            SELECT id, stock
-            FROM inventario
-            WHERE producto = %s
-              AND fecha_vencimiento = %s
-        """, (producto, fecha_venc))
-
-        inv = cursor.fetchone()
-
-        if inv:
-            nuevo_stock = inv["stock"] - cantidad
-
-            if nuevo_stock <= 0:
-                # Eliminar del inventario si queda ≤ 0
-                cursor.execute("DELETE FROM inventario WHERE id = %s", (inv["id"],))
-            else:
-                # Actualizar stock normal
-                cursor.execute("""
-                    UPDATE inventario
-                    SET stock = %s
-                    WHERE id = %s
-                """, (nuevo_stock, inv["id"]))
-
-        # 3️⃣ Eliminar la compra
-        cursor.execute("DELETE FROM compras WHERE id = %s", (id,))
-        conn.commit()
+            # 2️⃣ Restar cantidad en inventario
+            cursor.execute("""
+                SELECT id, stock
+                FROM inventario
+                WHERE producto = %s
+                  AND fecha_vencimiento = %s
+            """, (producto, fecha_venc))
+
+            inv = cursor.fetchone()
+
+            if inv:
+                nuevo_stock = inv["stock"] - cantidad
+
+                if nuevo_stock <= 0:
+                    # Eliminar del inventario si queda ≤ 0
+                    cursor.execute("DELETE FROM inventario WHERE id = %s", (inv["id"],))
+                    busqueda.marcar_catalogo(cursor)
+                else:
+                    # Actualizar stock normal
+                    cursor.execute("""
+                        UPDATE inventario
+                        SET stock = %s
+                        WHERE id = %s
+                    """, (nuevo_stock, inv["id"]))
+
+                version = inventario_mod.marcar_cambio(cursor)
+
+            # 3️⃣ Eliminar la compra
+            cursor.execute("DELETE FROM compras WHERE id = %s", (id,))
+            resumen.restar_compra(
+                cursor, str(compra["fecha_registro"])[:10], producto, cantidad,
+                cantidad * compra["precio_unitario"]
+            )
+            conn.commit()
+
+            if inv:
+                inventario_mod.publicar("cambio", {"productos": [producto]}, version)
 
-        return jsonify({"ok": True})
+            return jsonify({"ok": True})
 
     except Exception as e:
         print("❌ ERROR eliminando compra:", e)
         return jsonify({"ok": False, "error": str(e)})
 
-    finally:
-        try:
-            cursor.close()
-            conn.close()
-        except:
-            pass
 
 @app.route("/inventario_por_producto", methods=["GET"])
 def inventario_por_producto():
     producto = request.args.get("producto")
     fecha = request.args.get("fecha")
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT SUM(stock) AS total
-        FROM inventario
-        WHERE producto = %s AND fecha_vencimiento = %s
-    """, (producto, fecha))
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
 
-    data = cursor.fetchone()
-    total = data["total"] if data["total"] else 0
+        cursor.execute("""
+            SELECT SUM(stock) AS total
+            FROM inventario
+            WHERE producto = %s AND fecha_vencimiento = %s
+        """, (producto, fecha))
 
-    cursor.close()
-    conn.close()
+        data = cursor.fetchone()
+        total = data["total"] if data["total"] else 0
 
     return jsonify({"total": total})
 
 
+# ------------------------------------------
+# COMPRAS CON STOCK PENDIENTE DE REGISTRAR (UNA SOLA CONSULTA)
+# ------------------------------------------
+@app.route("/compras_disponibles", methods=["GET"])
+def compras_disponibles():
+    # ?todas=1 → incluir también las compras ya registradas por completo
+    todas = request.args.get("todas") == "1"
+
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            sql = """
+                SELECT
+                    c.id,
+                    c.producto,
+                    c.precio_unitario,
+                    DATE(c.fecha_vencimiento) AS fecha_vencimiento,
+                    c.cantidad AS comprado,
+                    COALESCE(i.total, 0) AS registrado,
+                    c.cantidad - COALESCE(i.total, 0) AS restante
+                FROM compras c
+                LEFT JOIN (
+                    SELECT producto, fecha_vencimiento, SUM(stock) AS total
+                    FROM inventario
+                    GROUP BY producto, fecha_vencimiento
+                ) i ON i.producto = c.producto
+                   AND i.fecha_vencimiento = DATE(c.fecha_vencimiento)
+            """
+            if not todas:
+                sql += " WHERE c.cantidad - COALESCE(i.total, 0) > 0"
+            sql += " ORDER BY c.fecha_registro DESC, c.id DESC"
+
+            cursor.execute(sql)
+            compras = cursor.fetchall()
+
+            for c in compras:
+                c["registrado"] = int(c["registrado"])
+                c["restante"] = int(c["restante"])
+
+            return jsonify(compras)
+
+    except Exception as e:
+        print("❌ ERROR COMPRAS DISPONIBLES:", e)
+        return jsonify([])
+
+
 
 
 # ------------------------------------------
@@ -643,121 +754,164 @@ def logout():
 @app.route("/obtener_reportes_dia", methods=["POST"])
 def obtener_reportes_dia():
     data = request.get_json()
-    fecha = data["fecha"]
-
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # =============================
-    #      RESUMEN DE VENTAS
-    # =============================
-    cursor.execute("""
-        SELECT 
-            SUM(total) AS total_ventas,
-            SUM(cantidad) AS productos_vendidos,
-            COUNT(*) AS num_ventas
-        FROM ventas
-        WHERE DATE(fecha_venta) = %s
-    """, (fecha,))
-    resumen_ventas = cursor.fetchone()
-
-    if resumen_ventas["total_ventas"] is None:
-        resumen_ventas = {
-            "total_ventas": 0,
-            "productos_vendidos": 0,
-            "num_ventas": 0
-        }
-
-    # =============================
-    #      RESUMEN DE COMPRAS
-    # =============================
-    cursor.execute("""
-        SELECT 
-            SUM(cantidad * precio_unitario) AS total_compras,
-            COUNT(*) AS num_compras
-        FROM compras
-        WHERE DATE(fecha_registro) = %s
-    """, (fecha,))
-    resumen_compras = cursor.fetchone()
-
-    if resumen_compras["total_compras"] is None:
-        resumen_compras = {
-            "total_compras": 0,
-            "num_compras": 0
-        }
-
-    conn.close()
-
-    return jsonify({
-        "ventas": resumen_ventas,
-        "compras": resumen_compras
-    })
+    fecha = rango_dia(data["fecha"])[0]
+
+    # Totales leídos del resumen diario (no depende del volumen de ventas)
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        totales = resumen.totales_dia(cursor, fecha)
+
+    return jsonify(totales)
 
 
 @app.route("/obtener_movimientos_dia", methods=["POST"])
 def obtener_movimientos_dia():
-    data = request.get_json()
-    fecha = data["fecha"]
-
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # =============================
-    #   VENTAS DEL DÍA
-    # =============================
-    cursor.execute("""
-        SELECT 
-            'VENTA' AS tipo,
-            producto,
-            cantidad,
-            total,
-            fecha_venta AS fecha
-        FROM ventas
-        WHERE DATE(fecha_venta) = %s
-    """, (fecha,))
-    ventas = cursor.fetchall()
-
-    # =============================
-    #   COMPRAS DEL DÍA
-    # =============================
-    cursor.execute("""
-        SELECT 
-            'COMPRA' AS tipo,
-            producto,
-            cantidad,
-            (cantidad * precio_unitario) AS total,
-            fecha_registro AS fecha
-        FROM compras
-        WHERE DATE(fecha_registro) = %s
-    """, (fecha,))
-    compras = cursor.fetchall()
-
-    # =============================
-    #    UNIR TODO EN UNA LISTA
-    # =============================
-    movimientos = ventas + compras
-
-    # =============================
-    #    GANANCIA O PÉRDIDA
-    # =============================
-    totalVentas = sum(float(v["total"]) for v in ventas)
-    totalCompras = sum(float(c["total"]) for c in compras)
-    ganancia = totalVentas - totalCompras
-
-
-    conn.close()
-
-    return jsonify({
-        "movimientos": movimientos,
-        "totalVentas": totalVentas,
-        "totalCompras": totalCompras,
-        "ganancia": ganancia
-    })
+    data = request.get_json() or {}
+    # agrupado=true → una fila por tipo y producto (del resumen diario) en
+    # lugar de una por venta/compra
+    agrupado = bool(data.get("agrupado"))
+
+    try:
+        rango = rango_dia(data.get("fecha"))
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        totales = resumen.totales_dia(cursor, rango[0])
+
+        if agrupado:
+            movimientos = resumen.movimientos_dia(cursor, rango[0])
+        else:
+            movimientos = resumen.movimientos_detalle(cursor, rango)
+
+    # Ganancia o pérdida
+    return jsonify(resumen.balance_dia(totales, movimientos))
+
+
+# ------------------------------------------
+# REPORTE POR RANGO (SEMANA / MES / PRODUCTO)
+# ------------------------------------------
+@app.route("/reporte_rango", methods=["POST"])
+def reporte_rango():
+    # { "desde": "2025-01-01", "hasta": "2025-03-31", "agrupar": "dia|semana|mes|producto" }
+    data = request.get_json() or {}
+    agrupar = data.get("agrupar", "dia")
+
+    try:
+        desde = rango_dia(data.get("desde"))[0]
+        hasta = rango_dia(data.get("hasta"))[0]
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    if desde > hasta:
+        return jsonify({"error": "desde no puede ser posterior a hasta"}), 400
+    if agrupar not in resumen.AGRUPACIONES:
+        return jsonify({"error": "agrupar debe ser dia, semana, mes o producto"}), 400
+
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        return jsonify(resumen.reporte_rango(cursor, desde, hasta, agrupar))
+
+
+# ------------------------------------------
+# REPORTE EN PDF (GENERADO EN EL SERVIDOR)
+# ------------------------------------------
+@app.route("/reporte_pdf", methods=["GET"])
+def reporte_pdf():
+    # ?fecha=2025-01-15                                  → reporte del día
+    # ?desde=2025-01-01&hasta=2025-01-31&agrupar=semana  → reporte por rango
+    args = request.args
+
+    try:
+        if args.get("fecha"):
+            fecha = rango_dia(args["fecha"])[0]
+            nombre = f"reporte_{fecha.isoformat()}.pdf"
+            ruta, temporal = pdf.pdf_dia(fecha)
+        else:
+            desde = rango_dia(args.get("desde"))[0]
+            hasta = rango_dia(args.get("hasta"))[0]
+            agrupar = args.get("agrupar", "dia")
+            if desde > hasta or agrupar not in resumen.AGRUPACIONES:
+                return jsonify({"error": "Rango o agrupación inválidos"}), 400
+            nombre = f"reporte_{desde.isoformat()}_{hasta.isoformat()}.pdf"
+            ruta, temporal = pdf.pdf_rango(desde, hasta, agrupar)
+
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        print("❌ ERROR generando PDF:", e)
+        return jsonify({"error": str(e)}), 500
+
+    if not temporal:
+        return send_file(ruta, mimetype="application/pdf", download_name=nombre)
+
+    return Response(
+        pdf.leer_por_trozos(ruta, borrar=True),
+        mimetype="application/pdf",
+        headers={"Content-Disposition": f"inline; filename={nombre}"},
+    )
+
+
+# ------------------------------------------
+# EXPORTAR HISTORIAL (STREAMING NDJSON / CSV)
+# ------------------------------------------
+@app.route("/exportar/<tabla>", methods=["GET"])
+def exportar(tabla):
+    # /exportar/compras?formato=csv&desde=2025-01-01&hasta=2025-01-31
+    if tabla not in exportar_mod.TABLAS:
+        return jsonify({"error": "Tabla no exportable"}), 404
+
+    formato = request.args.get("formato", "ndjson")
+    if formato not in ("ndjson", "csv"):
+        return jsonify({"error": "formato debe ser ndjson o csv"}), 400
+
+    try:
+        desde = leer_fecha(request.args, "desde")
+        hasta = leer_fecha(request.args, "hasta")
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    columnas = exportar_mod.TABLAS[tabla][1]
+    filas = exportar_mod.leer_filas(tabla, desde, hasta)
+
+    if formato == "csv":
+        cuerpo = exportar_mod.como_csv(columnas, filas)
+        mimetype = "text/csv"
+    else:
+        cuerpo = exportar_mod.como_ndjson(columnas, filas)
+        mimetype = "application/x-ndjson"
+
+    nombre = f"{tabla}_{desde or 'inicio'}_{hasta or 'hoy'}.{formato}"
+    return Response(
+        stream_with_context(cuerpo),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={nombre}"},
+    )
+
+
+# ------------------------------------------
+# ESTADO DEL POOL DE CONEXIONES
+# ------------------------------------------
+@app.route("/estado_db", methods=["GET"])
+def estado_db():
+    return jsonify(pool_stats())
+
+
+# ------------------------------------------
+# MÉTRICAS (formato de texto de Prometheus)
+# ------------------------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(metricas.exponer(pool_stats()), mimetype="text/plain; version=0.0.4")
 
 
 # ------------------------------------------
 # SERVIDOR
 # ------------------------------------------
+# Solo para desarrollo; en producción: gunicorn -c python:hattucci.server.gunicorn_conf
 if __name__ == "__main__":
     app.run(debug=True)
 
@@ -0,0 +1,446 @@
+# server/asgi.py
+# Modo ASGI: un event loop por worker atiende muchas peticiones a la vez.
+#
+#   uvicorn hattucci.server.asgi:aplicacion --host 0.0.0.0 --port 8000 --workers 2
+#
+# Rutas asíncronas (consultas con aiomysql, ver db_async.py). Mientras una
+# espera a la base, el worker sigue atendiendo a las demás cajas:
+#   GET  /obtener_inventario         (misma caché por versión y ETag que app.py)
+#   POST /obtener_movimientos_dia
+#   GET  /verificar, /disponibilidad
+#   GET  /buscar_productos           (índice en memoria de busqueda.py)
+#
+# Todas las demás rutas pasan a la app Flask sin cambios y corren en un pool
+# de ASGI_HILOS hilos: ahí queda lo que consume CPU (bcrypt en /ingresar y
+# /registrar, los PDF), que así no frena el event loop. Cada flujo abierto de
+# /eventos_inventario ocupa uno de esos hilos mientras dura (como mucho
+# EVENTOS_MAXIMO a la vez, ver inventario.py).
+#
+# Las respuestas son las mismas que en modo WSGI: los datos se arman con las
+# mismas funciones (inventario.filtros, resumen.armar_*, usuarios.resolver).
+#
+# Cuerpos de las peticiones: las rutas asíncronas reciben JSON chico y lo
+# leen entero (hasta ASGI_CUERPO_MAXIMO bytes; más → 413). Hacia Flask el
+# cuerpo NO se junta en memoria: wsgi.input pide cada trozo al event loop
+# recién cuando la app lo lee, así /importar_compras procesa un archivo grande
+# a medida que llega, igual que en modo WSGI.
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from hattucci.server import busqueda, db_async, inventario, resumen, usuarios
+from hattucci.server import compresion, metricas
+from hattucci.server.app import app
+from hattucci.server.cache import SQL_VERSION, version_de_fila
+from hattucci.server.paginacion import ParametroInvalido, rango_dia
+
+HILOS = int(os.environ.get("ASGI_HILOS", "32"))
+CUERPO_MAXIMO = int(os.environ.get("ASGI_CUERPO_MAXIMO", str(1024 * 1024)))
+
+_hilos = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix="wsgi")
+
+
+# ------------------------------------------
+# PETICIÓN Y RESPUESTA
+# ------------------------------------------
+class CuerpoExcesivo(Exception):
+    pass
+
+
+async def _leer_cuerpo(receive):
+    partes = []
+    leidos = 0
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "http.disconnect":
+            break
+        parte = mensaje.get("body", b"")
+        leidos += len(parte)
+        if leidos > CUERPO_MAXIMO:
+            raise CuerpoExcesivo()
+        partes.append(parte)
+        if not mensaje.get("more_body"):
+            break
+    return b"".join(partes)
+
+
+class Entrada(io.RawIOBase):
+    """wsgi.input que lee el cuerpo trozo a trozo desde el event loop.
+
+    La usa solo el hilo que corre la app Flask; cada read() que necesita más
+    datos espera el siguiente mensaje "http.request" del servidor ASGI.
+    """
+
+    def __init__(self, receive, loop, al_terminar):
+        self._receive = receive
+        self._loop = loop
+        self._al_terminar = al_terminar
+        self._trozo = b""
+        self._posicion = 0
+        self.terminado = False
+        self.desconectado = False
+
+    def readable(self):
+        return True
+
+    def _siguiente(self):
+        mensaje = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if mensaje["type"] == "http.disconnect":
+            self.desconectado = True
+            self._terminar()
+        else:
+            self._trozo, self._posicion = mensaje.get("body", b""), 0
+            if not mensaje.get("more_body"):
+                self._terminar()
+
+    def _terminar(self):
+        self.terminado = True
+        self._loop.call_soon_threadsafe(self._al_terminar)
+
+    def readinto(self, destino):
+        while self._posicion >= len(self._trozo):
+            if self.terminado:
+                return 0
+            self._siguiente()
+        n = min(len(destino), len(self._trozo) - self._posicion)
+        destino[:n] = self._trozo[self._posicion:self._posicion + n]
+        self._posicion += n
+        return n
+
+    def descartar(self):
+        """Consume lo que la app no leyó, sin guardarlo."""
+        while not self.terminado:
+            self._siguiente()
+        self._trozo = b""
+
+
+class Peticion:
+
+    def __init__(self, scope, cuerpo):
+        self.metodo = scope["method"]
+        self.ruta = scope["path"]
+        consulta = scope["query_string"].decode("latin-1")
+        self.args = MultiDict(parse_qsl(consulta, keep_blank_values=True))
+        self.encabezados = Headers([(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]])
+        self.cuerpo = cuerpo
+
+    def json(self):
+        return json.loads(self.cuerpo or b"null")
+
+
+class Respuesta:
+
+    def __init__(self, cuerpo=b"", estado=200, tipo="application/json", encabezados=()):
+        self.cuerpo = cuerpo.encode() if isinstance(cuerpo, str) else cuerpo
+        self.estado = estado
+        self.encabezados = [(b"content-type", tipo.encode())] if tipo else []
+        self.encabezados += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in encabezados]
+
+    def comprimir(self, aceptadas):
+        # Mismo criterio que compresion.instalar() para las rutas de Flask
+        self.encabezados.append((b"vary", b"Accept-Encoding"))
+        tipo = dict(self.encabezados).get(b"content-type", b"").split(b";")[0].decode()
+        if self.estado != 200 or len(self.cuerpo) < compresion.MINIMO or tipo not in compresion.TIPOS:
+            return
+        codif = compresion.codificacion(aceptadas)
+        if codif is None:
+            return
+        self.cuerpo = compresion.comprimir(self.cuerpo, codif)
+        self.encabezados.append((b"content-encoding", codif.encode()))
+        self.encabezados = [
+            (k, b"W/" + v) if k == b"etag" and not v.startswith(b"W/") else (k, v)
+            for k, v in self.encabezados
+        ]
+
+    async def enviar(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.estado,
+            "headers": self.encabezados + [(b"content-length", str(len(self.cuerpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": self.cuerpo})
+
+
+def _json(datos, estado=200, encabezados=()):
+    # Misma serialización que jsonify (fechas, Decimal, claves ordenadas)
+    return Respuesta(app.json.dumps(datos) + "\n", estado, encabezados=encabezados)
+
+
+# ------------------------------------------
+# RUTAS ASÍNCRONAS
+# ------------------------------------------
+async def _disponibilidad(usuario=None, correo=None):
+    resultado, pendientes = usuarios.desde_cache(usuario, correo)
+    if pendientes:
+        async with db_async.cursor() as cur:
+            await cur.execute(*usuarios.consulta(pendientes))
+            filas = await cur.fetchall()
+        usuarios.resolver(resultado, pendientes, filas)
+    return resultado
+
+
+async def verificar(peticion):
+    usuario = peticion.args.get("usuario")
+    correo = peticion.args.get("correo")
+
+    if usuario:
+        return _json({"existe": bool((await _disponibilidad(usuario=usuario))["usuario"])})
+
+    if correo:
+        return _json({"existe": bool((await _disponibilidad(correo=correo))["correo"])})
+
+    return _json({"error": "Parámetro inválido"})
+
+
+async def disponibilidad(peticion):
+    usuario = peticion.args.get("usuario")
+    correo = peticion.args.get("correo")
+
+    if not usuario and not correo:
+        return _json({"error": "Parámetro inválido"})
+
+    return _json(await _disponibilidad(usuario, correo))
+
+
+async def _version_inventario():
+    actual = inventario.version_en_cache()
+    if actual is None:
+        async with db_async.cursor() as cur:
+            await cur.execute(SQL_VERSION, (inventario.VERSION,))
+            actual = version_de_fila(await cur.fetchone())
+        inventario.recordar_version(actual)
+    return actual
+
+
+async def obtener_inventario(peticion):
+    args = peticion.args
+    todo = args.get("todo") == "1"
+
+    try:
+        condiciones, params, limite, todo = inventario.filtros(args)
+    except (ParametroInvalido, ValueError) as e:
+        return _json({"error": str(e)}, 400)
+
+    try:
+        version = await _version_inventario()
+        etag = inventario.etag(version)
+        encabezados = [("ETag", quote_etag(etag)), ("Cache-Control", "no-cache")]
+
+        if parse_etags(peticion.encabezados.get("If-None-Match")).contains_weak(etag):
+            return Respuesta(b"", 304, tipo=None, encabezados=encabezados)
+
+        clave = inventario.clave(version, args)
+        cuerpo = inventario.respuestas.get(clave)
+        if cuerpo is None:
+            async with db_async.cursor() as cur:
+                await cur.execute(*inventario.sql_consulta(condiciones, params, limite))
+                items = await cur.fetchall()
+            cuerpo = app.json.dumps(inventario.paginar(items, limite, todo))
+            inventario.respuestas.set(clave, cuerpo)
+        return Respuesta(cuerpo, encabezados=encabezados)
+
+    except Exception as e:
+        print("❌ ERROR INVENTARIO:", e)
+        return _json([] if todo else {"items": [], "siguiente": None})
+
+
+async def obtener_movimientos_dia(peticion):
+    data = peticion.json() or {}
+    agrupado = bool(data.get("agrupado"))
+
+    try:
+        rango = rango_dia(data.get("fecha"))
+    except ParametroInvalido as e:
+        return _json({"error": str(e)}, 400)
+
+    async with db_async.cursor() as cur:
+        await cur.execute(resumen.SQL_TOTALES_DIA, (rango[0],))
+        totales = resumen.armar_totales(await cur.fetchone())
+
+        if agrupado:
+            await cur.execute(resumen.SQL_MOVIMIENTOS_DIA, (rango[0],))
+            movimientos = resumen.armar_movimientos(await cur.fetchall(), rango[0].isoformat())
+        else:
+            await cur.execute(resumen.SQL_VENTAS_DETALLE, rango)
+            movimientos = await cur.fetchall()
+            await cur.execute(resumen.SQL_COMPRAS_DETALLE, rango)
+            movimientos += await cur.fetchall()
+
+    return _json(resumen.balance_dia(totales, movimientos))
+
+
+async def buscar_productos(peticion):
+    try:
+        limite = int(peticion.args.get("limite", busqueda.LIMITE))
+    except ValueError:
+        return _json({"error": "limite debe ser un número"}, 400)
+
+    try:
+        # En memoria; solo consulta la base si hay que volver a armar el índice
+        items = await asyncio.to_thread(busqueda.buscar, peticion.args.get("q", ""), limite)
+    except Exception as e:
+        print("❌ ERROR BÚSQUEDA:", e)
+        items = []
+    return _json({"items": items})
+
+
+RUTAS = {
+    ("GET", "/obtener_inventario"): obtener_inventario,
+    ("POST", "/obtener_movimientos_dia"): obtener_movimientos_dia,
+    ("GET", "/verificar"): verificar,
+    ("GET", "/disponibilidad"): disponibilidad,
+    ("GET", "/buscar_productos"): buscar_productos,
+}
+
+
+# ------------------------------------------
+# PUENTE A FLASK (WSGI en el pool de hilos)
+# ------------------------------------------
+def _environ(scope, entrada):
+    servidor = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": servidor[0],
+        "SERVER_PORT": str(servidor[1] or 80),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(entrada),
+        # La entrada termina sola con el cuerpo: se puede leer hasta el final
+        # aunque el cliente no mande Content-Length (chunked)
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for nombre, valor in scope["headers"]:
+        nombre = nombre.decode("latin-1").upper().replace("-", "_")
+        valor = valor.decode("latin-1")
+        clave = nombre if nombre in ("CONTENT_TYPE", "CONTENT_LENGTH") else "HTTP_" + nombre
+        if clave in environ:
+            environ[clave] += ("; " if clave == "HTTP_COOKIE" else ",") + valor
+        else:
+            environ[clave] = valor
+    return environ
+
+
+async def _flask(scope, receive, send):
+    loop = asyncio.get_running_loop()
+    desconectado = threading.Event()
+    cuerpo_leido = asyncio.Event()
+    entrada = Entrada(receive, loop, cuerpo_leido.set)
+
+    async def vigilar():
+        # Si el navegador se va (p. ej. cierra ventas.html) se corta el flujo
+        # SSE. Recién cuando el cuerpo se leyó entero: antes, receive() es de
+        # la Entrada
+        await cuerpo_leido.wait()
+        if not entrada.desconectado:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+        desconectado.set()
+
+    def enviar(mensaje):
+        if desconectado.is_set():
+            raise ConnectionError("El cliente cerró la conexión")
+        asyncio.run_coroutine_threadsafe(send(mensaje), loop).result()
+
+    def correr():
+        inicio = []
+
+        def start_response(estado, encabezados, exc_info=None):
+            inicio[:] = [{
+                "type": "http.response.start",
+                "status": int(estado.split(" ", 1)[0]),
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in encabezados],
+            }]
+
+        resultado = app(_environ(scope, entrada), start_response)
+        try:
+            # Las vistas leen el cuerpo antes de responder; lo que quedó se
+            # descarta para poder vigilar la desconexión mientras se envía
+            entrada.descartar()
+            for trozo in resultado:
+                if not trozo:
+                    continue
+                if inicio:
+                    enviar(inicio.pop())
+                enviar({"type": "http.response.body", "body": trozo, "more_body": True})
+            if inicio:
+                enviar(inicio.pop())
+            enviar({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(resultado, "close"):
+                resultado.close()
+
+    vigilante = loop.create_task(vigilar())
+    try:
+        await loop.run_in_executor(_hilos, correr)
+    except ConnectionError:
+        pass
+    finally:
+        vigilante.cancel()
+
+
+# ------------------------------------------
+# APLICACIÓN ASGI
+# ------------------------------------------
+async def _ciclo_de_vida(receive, send):
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif mensaje["type"] == "lifespan.shutdown":
+            await db_async.cerrar()
+            _hilos.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def aplicacion(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _ciclo_de_vida(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    ruta = RUTAS.get((scope["method"], scope["path"]))
+    if ruta is None:
+        await _flask(scope, receive, send)
+        return
+
+    inicio = time.perf_counter()
+    try:
+        peticion = Peticion(scope, await _leer_cuerpo(receive))
+    except CuerpoExcesivo:
+        respuesta = _json({"error": "Cuerpo demasiado grande"}, 413)
+        await respuesta.enviar(send)
+        metricas.peticiones.observar(time.perf_counter() - inicio, scope["path"], scope["method"], 413)
+        return
+    try:
+        respuesta = await ruta(peticion)
+    except Exception as e:
+        print(f"❌ ERROR {scope['path']}:", e)
+        traceback.print_exc()
+        respuesta = Respuesta("Internal Server Error", 500, "text/plain; charset=utf-8")
+
+    respuesta.comprimir(parse_accept_header(peticion.encabezados.get("Accept-Encoding")))
+    await respuesta.enviar(send)
+    metricas.peticiones.observar(time.perf_counter() - inicio, scope["path"], scope["method"], respuesta.estado)
@@ -0,0 +1,450 @@
+# server/benchmark.py
+# Benchmark de las rutas más usadas contra una base LOCAL de prueba.
+#
+#   DB_HOST=127.0.0.1 DB_NAME=hattucci_bench ... \
+#   python -m hattucci.server.benchmark --sembrar --inventario 5000 --compras 20000 --ventas 50000
+#
+# Con --sembrar se VACÍAN inventario, compras, ventas y resumen_diario y se
+# cargan los volúmenes pedidos; por eso se niega a correr contra un host que
+# no sea local (salvo BENCH_PERMITIR_REMOTO=1).
+#
+# Las peticiones pasan por la aplicación Flask completa (test_client, sin
+# HTTP) desde varios hilos. Por escenario se mide rendimiento (peticiones/s)
+# y latencia p50/p95/p99. Cada corrida se agrega como una línea JSON al
+# archivo de resultados, con el commit de git, y se compara con la corrida
+# anterior de los mismos volúmenes para que una regresión salte a la vista.
+#
+# También verifica que /descontar_stock use la misma cantidad de sentencias
+# SQL con 1 producto que con 10 (ver ventas.py).
+#
+# --modo asgi pasa las mismas peticiones por asgi.aplicacion en un solo event
+# loop (lo que atiende un worker ASGI) con --hilos peticiones en vuelo;
+# --modo ambos mide los dos y muestra peticiones/s por worker de cada uno.
+# Los escenarios ASGI se guardan con el sufijo " (asgi)".
+#
+# Corre igual con DB_MOTOR=sqlite (DB_SQLITE_RUTA apuntando a un archivo de
+# prueba); cada motor se compara solo con sus propias corridas.
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from hattucci.server import claves, db, metricas, resumen, schema
+from hattucci.server.db import DB_CONFIG, conexion
+
+HOSTS_LOCALES = ("localhost", "127.0.0.1", "::1")
+USUARIO = "bench"
+CLAVE = "bench-clave"
+DIAS_HISTORIA = 90
+LOTE_SEMBRADO = 1000
+
+
+# ------------------------------------------
+# DATOS DE PRUEBA
+# ------------------------------------------
+def _producto(i):
+    return f"Producto {i:05d}"
+
+
+def _insertar(cursor, sql, filas):
+    for i in range(0, len(filas), LOTE_SEMBRADO):
+        cursor.executemany(sql, filas[i:i + LOTE_SEMBRADO])
+
+
+def sembrar(inventario, compras, ventas, semilla=1):
+    azar = random.Random(semilla)
+    hoy = date.today()
+    productos = max(inventario // 3, 1)
+
+    with conexion() as conn:
+        cursor = conn.cursor()
+        for tabla in ("inventario", "compras", "ventas", "resumen_diario"):
+            cursor.execute(f"DELETE FROM {tabla}")
+
+        # Lotes únicos: producto = i % productos, vencimiento según i // productos
+        _insertar(cursor, """
+            INSERT INTO inventario (producto, fecha_vencimiento, stock, precio_venta)
+            VALUES (%s, %s, %s, %s)
+        """, [
+            (_producto(i % productos), hoy + timedelta(days=15 + i // productos),
+             1_000_000, round(1 + (i % productos) % 50 * 0.5, 2))
+            for i in range(inventario)
+        ])
+
+        _insertar(cursor, """
+            INSERT INTO compras (nombre_proveedor, contacto_proveedor, producto, cantidad,
+                                 precio_unitario, fecha_registro, fecha_vencimiento)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+        """, [
+            (f"Proveedor {i % 20}", f"9{i % 20:08d}", _producto(azar.randrange(productos)),
+             azar.randint(1, 50), round(azar.uniform(0.5, 20), 2),
+             hoy - timedelta(days=azar.randrange(DIAS_HISTORIA)),
+             hoy + timedelta(days=60))
+            for i in range(compras)
+        ])
+
+        _insertar(cursor, """
+            INSERT INTO ventas (producto, cantidad, total, fecha_venta, numero_boleta)
+            VALUES (%s, %s, %s, %s, NULL)
+        """, [
+            (_producto(azar.randrange(productos)), azar.randint(1, 5), round(azar.uniform(1, 100), 2),
+             datetime.combine(hoy - timedelta(days=azar.randrange(DIAS_HISTORIA)), datetime.min.time())
+             + timedelta(seconds=azar.randrange(86400)))
+            for _ in range(ventas)
+        ])
+
+        cursor.execute("DELETE FROM registro WHERE usuario = %s", (USUARIO,))
+        cursor.execute("""
+            INSERT INTO registro (usuario, correo, nombre, apellido, telefono, contraseña)
+            VALUES (%s, %s, 'Bench', 'Bench', '999999999', %s)
+        """, (USUARIO, "bench@hattucci.local", claves.hashear(CLAVE)))
+        conn.commit()
+
+    resumen.reconstruir()
+    return productos
+
+
+def volumenes():
+    with conexion() as conn:
+        cursor = conn.cursor()
+        resultado = {}
+        for tabla in ("inventario", "compras", "ventas"):
+            cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+            resultado[tabla] = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(DISTINCT producto) FROM inventario")
+        resultado["productos"] = cursor.fetchone()[0]
+        return resultado
+
+
+# ------------------------------------------
+# MEDICIÓN
+# ------------------------------------------
+def percentil(ordenadas, p):
+    # Rango más cercano: el menor valor que deja al menos p% de las muestras debajo
+    indice = max(math.ceil(p / 100 * len(ordenadas)) - 1, 0)
+    return ordenadas[indice]
+
+
+def _fallo(respuesta):
+    if respuesta.status_code >= 400:
+        return True
+    datos = respuesta.get_json(silent=True)
+    return isinstance(datos, dict) and datos.get("ok") is False
+
+
+def medir(app, peticion, total, hilos):
+    """Ejecuta `total` peticiones repartidas en `hilos`; peticion(cliente, i) → respuesta."""
+    latencias = []
+    errores = []
+    contador = itertools.count()
+    lock = threading.Lock()
+
+    def trabajar():
+        cliente = app.test_client()
+        propias = []
+        while True:
+            with lock:
+                i = next(contador)
+            if i >= total:
+                break
+            inicio = time.perf_counter()
+            respuesta = peticion(cliente, i)
+            propias.append(time.perf_counter() - inicio)
+            if _fallo(respuesta):
+                with lock:
+                    errores.append(respuesta.status_code)
+        with lock:
+            latencias.extend(propias)
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    segundos = time.perf_counter() - inicio
+    return _estadisticas(latencias, errores, total, segundos)
+
+
+def _estadisticas(latencias, errores, total, segundos):
+    latencias.sort()
+    return {
+        "peticiones": total,
+        "errores": len(errores),
+        "por_segundo": round(total / segundos, 1) if segundos else None,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+    }
+
+
+class RespuestaAsgi:
+
+    def __init__(self, estado, cuerpo):
+        self.status_code = estado
+        self.data = cuerpo
+
+    def get_json(self, silent=False):
+        try:
+            return json.loads(self.data)
+        except ValueError:
+            if silent:
+                return None
+            raise
+
+
+class ClienteAsgi:
+    """Lo mínimo de test_client (get/post con json o data) sobre una app ASGI."""
+
+    def __init__(self, aplicacion):
+        self.aplicacion = aplicacion
+
+    async def get(self, ruta):
+        return await self.pedir("GET", ruta)
+
+    async def post(self, ruta, json=None, data=None):
+        return await self.pedir("POST", ruta, datos_json=json, formulario=data)
+
+    async def pedir(self, metodo, ruta, datos_json=None, formulario=None):
+        ruta, _, consulta = ruta.partition("?")
+        encabezados = [(b"host", b"localhost")]
+        cuerpo = b""
+        if datos_json is not None:
+            cuerpo = json.dumps(datos_json).encode()
+            encabezados.append((b"content-type", b"application/json"))
+        elif formulario is not None:
+            cuerpo = urlencode(formulario).encode()
+            encabezados.append((b"content-type", b"application/x-www-form-urlencoded"))
+        encabezados.append((b"content-length", str(len(cuerpo)).encode()))
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": metodo, "scheme": "http", "path": ruta, "raw_path": ruta.encode(),
+            "query_string": consulta.encode(), "root_path": "", "headers": encabezados,
+            "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+        }
+        pendientes = [{"type": "http.request", "body": cuerpo, "more_body": False}]
+        terminado = asyncio.Event()
+        respuesta = {"estado": None, "cuerpo": []}
+
+        async def receive():
+            if pendientes:
+                return pendientes.pop(0)
+            await terminado.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensaje):
+            if mensaje["type"] == "http.response.start":
+                respuesta["estado"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                respuesta["cuerpo"].append(mensaje.get("body", b""))
+
+        try:
+            await self.aplicacion(scope, receive, send)
+        finally:
+            terminado.set()
+        return RespuestaAsgi(respuesta["estado"], b"".join(respuesta["cuerpo"]))
+
+
+def medir_asgi(aplicacion, peticion, total, concurrencia):
+    """Como medir(), pero con `concurrencia` peticiones en vuelo en un solo event loop."""
+    from hattucci.server import db_async
+
+    async def correr():
+        cliente = ClienteAsgi(aplicacion)
+        latencias = []
+        errores = []
+        contador = itertools.count()
+
+        async def trabajar():
+            while (i := next(contador)) < total:
+                inicio = time.perf_counter()
+                respuesta = await peticion(cliente, i)
+                latencias.append(time.perf_counter() - inicio)
+                if _fallo(respuesta):
+                    errores.append(respuesta.status_code)
+
+        inicio = time.perf_counter()
+        try:
+            await asyncio.gather(*(trabajar() for _ in range(concurrencia)))
+        finally:
+            # Cada corrida usa un event loop nuevo: cerrar su pool
+            await db_async.cerrar()
+        return _estadisticas(latencias, errores, total, time.perf_counter() - inicio)
+
+    return asyncio.run(correr())
+
+
+def escenarios(productos):
+    hoy = date.today().isoformat()
+    azar = random.Random(2)
+
+    def carrito(n):
+        return [{"nombre": _producto(azar.randrange(productos)), "cantidad": 1}
+                for _ in range(n)]
+
+    return {
+        "obtener_inventario": lambda c, i: c.get("/obtener_inventario?limite=50"),
+        "descontar_stock": lambda c, i: c.post("/descontar_stock", json={
+            "venta": carrito(3), "comprobante": "SIN_COMPROBANTE"}),
+        "obtener_movimientos_dia": lambda c, i: c.post("/obtener_movimientos_dia", json={"fecha": hoy}),
+        "ingresar": lambda c, i: c.post("/ingresar", data={"usuario": USUARIO, "contraseña": CLAVE}),
+    }
+
+
+def sentencias_por_venta(app, productos):
+    """Sentencias SQL de una venta con 1 producto y con 10 (deberían ser iguales)."""
+    cliente = app.test_client()
+    resultado = {}
+    for n in (1, 10):
+        venta = [{"nombre": _producto(i % productos), "cantidad": 1} for i in range(n)]
+        antes = metricas.consultas.total()
+        respuesta = cliente.post("/descontar_stock", json={"venta": venta, "comprobante": "BOLETA"})
+        resultado[str(n)] = None if _fallo(respuesta) else metricas.consultas.total() - antes
+    return resultado
+
+
+# ------------------------------------------
+# RESULTADOS
+# ------------------------------------------
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def anterior(ruta, volumenes, motor="mysql"):
+    if not os.path.exists(ruta):
+        return None
+    ultima = None
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                corrida = json.loads(linea)
+            except ValueError:
+                continue
+            if corrida.get("volumenes") == volumenes and corrida.get("motor", "mysql") == motor:
+                ultima = corrida
+    return ultima
+
+
+def comparar(actual, previa, tolerancia):
+    """Lista de (escenario, métrica, antes, ahora) que empeoraron más que `tolerancia`."""
+    regresiones = []
+    for nombre, datos in actual["escenarios"].items():
+        antes = (previa or {}).get("escenarios", {}).get(nombre)
+        if not antes:
+            continue
+        if datos["p95_ms"] > antes["p95_ms"] * (1 + tolerancia):
+            regresiones.append((nombre, "p95_ms", antes["p95_ms"], datos["p95_ms"]))
+        if datos["por_segundo"] < antes["por_segundo"] * (1 - tolerancia):
+            regresiones.append((nombre, "por_segundo", antes["por_segundo"], datos["por_segundo"]))
+    return regresiones
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark de las rutas más usadas")
+    p.add_argument("--sembrar", action="store_true", help="vaciar y cargar datos de prueba")
+    p.add_argument("--inventario", type=int, default=3000)
+    p.add_argument("--compras", type=int, default=10000)
+    p.add_argument("--ventas", type=int, default=30000)
+    p.add_argument("--peticiones", type=int, default=500, help="peticiones por escenario")
+    p.add_argument("--hilos", type=int, default=8, help="hilos (wsgi) o peticiones en vuelo (asgi)")
+    p.add_argument("--modo", choices=("wsgi", "asgi", "ambos"), default="wsgi")
+    p.add_argument("--solo", nargs="*", help="escenarios a correr (por defecto todos)")
+    p.add_argument("--salida", default=os.environ.get("BENCH_RESULTADOS", "benchmarks/resultados.jsonl"))
+    p.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento aceptado (0.25 = 25%%)")
+    args = p.parse_args(argv)
+
+    remoto = db.MOTOR == "mysql" and DB_CONFIG["host"] not in HOSTS_LOCALES
+    if remoto and os.environ.get("BENCH_PERMITIR_REMOTO") != "1":
+        print(f"❌ DB_HOST={DB_CONFIG['host']} no es local; use una base de prueba local")
+        return 2
+
+    from hattucci.server.app import app
+
+    schema.migrar()
+    if args.sembrar:
+        print("⏳ Sembrando datos de prueba...")
+        sembrar(args.inventario, args.compras, args.ventas)
+
+    # Se comparan solo corridas con los mismos volúmenes
+    vol = volumenes()
+    productos = vol["productos"]
+    if not productos:
+        print("❌ La base no tiene inventario; corra con --sembrar")
+        return 2
+
+    corrida = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "motor": db.MOTOR,
+        "volumenes": vol,
+        "hilos": args.hilos,
+        "escenarios": {},
+        "sentencias_por_venta": sentencias_por_venta(app, productos),
+    }
+
+    modos = ("wsgi", "asgi") if args.modo == "ambos" else (args.modo,)
+    if "asgi" in modos:
+        from hattucci.server.asgi import aplicacion
+
+    for nombre, peticion in escenarios(productos).items():
+        if args.solo and nombre not in args.solo:
+            continue
+        # bcrypt hace a /ingresar mucho más lento a propósito: menos peticiones
+        total = args.peticiones if nombre != "ingresar" else max(args.peticiones // 10, 1)
+        for modo in modos:
+            if modo == "wsgi":
+                clave = nombre
+                datos = medir(app, peticion, total, args.hilos)
+            else:
+                clave = f"{nombre} (asgi)"
+                datos = medir_asgi(aplicacion, peticion, total, args.hilos)
+            corrida["escenarios"][clave] = datos
+            print(f"{clave:33} {datos['por_segundo']:>9} req/s   p50 {datos['p50_ms']:>8} ms   "
+                  f"p95 {datos['p95_ms']:>8} ms   p99 {datos['p99_ms']:>8} ms   errores {datos['errores']}")
+        if len(modos) == 2:
+            wsgi, asgi = corrida["escenarios"][nombre], corrida["escenarios"][f"{nombre} (asgi)"]
+            if wsgi["por_segundo"]:
+                print(f"{'':33} asgi/wsgi por worker: {asgi['por_segundo'] / wsgi['por_segundo']:.2f}x")
+
+    print("Sentencias por venta:", corrida["sentencias_por_venta"])
+
+    previa = anterior(args.salida, corrida["volumenes"], db.MOTOR)
+    os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+    with open(args.salida, "a", encoding="utf-8") as f:
+        f.write(json.dumps(corrida, ensure_ascii=False) + "\n")
+
+    fallas = 0
+    venta = corrida["sentencias_por_venta"]
+    if None in venta.values():
+        print("❌ No se pudo registrar la venta de prueba")
+        fallas += 1
+    elif len(set(venta.values())) > 1:
+        print("❌ La cantidad de sentencias de una venta crece con el carrito")
+        fallas += 1
+
+    for nombre, metrica, antes, ahora in comparar(corrida, previa, args.tolerancia):
+        print(f"❌ Regresión en {nombre}: {metrica} {antes} → {ahora} (commit anterior {previa.get('commit')})")
+        fallas += 1
+
+    if not fallas:
+        print("✅ Sin regresiones" + (f" respecto a {previa.get('commit')}" if previa else " (primera corrida)"))
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# server/busqueda.py
+# Búsqueda de productos para el autocompletado (GET /buscar_productos).
+#
+# Dos partes:
+#   - Catálogo en memoria, uno por worker: solo los NOMBRES de los productos
+#     que tienen algún lote. Se vuelve a armar (una consulta) cuando cambia la
+#     versión "catalogo", que solo se incrementa al crear o borrar un lote
+#     (marcar_catalogo). Las ventas y reposiciones no lo tocan.
+#   - Stock y precio al momento: para los primeros nombres que coinciden, una
+#     consulta por el índice de producto trae sus lotes con stock. Stock
+#     sumado de todos los lotes y precio del que vence primero, que es el que
+#     se descuenta primero (ventas.py reparte FEFO).
+#
+# Los nombres se normalizan sin tildes ni mayúsculas ("Piña" → "pina") y se
+# parten en palabras. El catálogo es la lista ordenada de (palabra, producto):
+# cada palabra buscada es un prefijo y se resuelve con bisect, sin recorrer
+# el catálogo. "lec glo" encuentra "Leche Gloria" y "Glorita Lechera".
+# La búsqueda parte de la palabra con menos coincidencias y descarta con las
+# demás, así el costo depende de lo que coincide, no del tamaño del catálogo.
+#
+# Primero van los productos cuyo nombre empieza con lo buscado, luego los
+# que empiezan con la primera palabra y luego el resto, por orden
+# alfabético; se devuelven los BUSQUEDA_LIMITE primeros que tienen stock.
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from itertools import islice
+
+from hattucci.server import inventario
+from hattucci.server.cache import CacheLRU, incrementar_version, leer_version
+from hattucci.server.db import conexion
+
+LIMITE = int(os.environ.get("BUSQUEDA_LIMITE", "10"))
+LIMITE_MAXIMO = 50
+
+CATALOGO = "catalogo"
+
+SQL_NOMBRES = "SELECT DISTINCT producto FROM inventario"
+
+SQL_LOTES = """
+    SELECT producto, stock, precio_venta
+    FROM inventario
+    WHERE producto IN ({marcas}) AND stock > 0
+    ORDER BY producto, fecha_vencimiento, id
+"""
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto):
+    """'Piña  en Almíbar' → 'pina en almibar'"""
+    sin_tildes = unicodedata.normalize("NFKD", texto.casefold())
+    sin_tildes = "".join(c for c in sin_tildes if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(" ", sin_tildes).strip()
+
+
+class Indice:
+
+    def __init__(self, version_catalogo, productos):
+        self.version = version_catalogo
+
+        # En orden alfabético: la posición de un producto ya sirve para ordenar
+        pares = sorted((normalizar(p), p) for p in set(productos))
+        self.nombres = [n for n, _ in pares]
+        self.productos = [p for _, p in pares]
+        self.palabras_de = [nombre.split() for nombre in self.nombres]
+        self.palabras = sorted(
+            (palabra, i) for i, palabras in enumerate(self.palabras_de) for palabra in set(palabras)
+        )
+        self._claves = [palabra for palabra, _ in self.palabras]
+
+    def _rango(self, prefijo):
+        # Las palabras que empiezan con el prefijo están juntas en la lista ordenada
+        return (bisect_left(self._claves, prefijo),
+                bisect_left(self._claves, prefijo + "\uffff"))
+
+    def candidatos(self, texto):
+        """Nombres de producto que coinciden, en orden de relevancia (generador)."""
+        consulta = normalizar(texto)
+        if not consulta:
+            return
+        terminos = consulta.split()
+
+        # Se parte de la palabra con menos coincidencias y se filtra con las demás
+        rangos = {t: self._rango(t) for t in terminos}
+        menor = min(rangos, key=lambda t: rangos[t][1] - rangos[t][0])
+        inicio, fin = rangos[menor]
+        otros = [t for t in rangos if t != menor]
+
+        # En orden de posición = alfabético
+        indices = sorted({self.palabras[j][1] for j in range(inicio, fin)})
+
+        def coincide(i):
+            return all(any(p.startswith(t) for p in self.palabras_de[i]) for t in otros)
+
+        # Primero los que empiezan con lo escrito, luego con la primera palabra,
+        # luego el resto; se recorre solo hasta donde pida quien consume
+        vistos = set()
+        for prefijo in (consulta, terminos[0], ""):
+            for i in indices:
+                if i not in vistos and self.nombres[i].startswith(prefijo) and coincide(i):
+                    vistos.add(i)
+                    yield self.productos[i]
+
+
+# ------------------------------------------
+# VERSIÓN DEL CATÁLOGO
+# ------------------------------------------
+_version = CacheLRU(maximo=1)
+
+
+def marcar_catalogo(cursor):
+    """Llamar dentro de la transacción que crea o borra lotes de inventario."""
+    incrementar_version(cursor, CATALOGO)
+    _version.pop(CATALOGO)
+
+
+def version_catalogo():
+    # Mismo tiempo de recuerdo que la versión del inventario (INVENTARIO_VERSION_TTL)
+    actual = _version.get(CATALOGO)
+    if actual is None:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            actual = leer_version(cursor, CATALOGO)
+        if inventario.TTL_VERSION > 0:
+            _version.set(CATALOGO, actual, ttl=inventario.TTL_VERSION)
+    return actual
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def _construir(version_actual):
+    with conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_NOMBRES)
+        productos = [fila[0] for fila in cursor.fetchall()]
+    return Indice(version_actual, productos)
+
+
+def indice():
+    global _indice
+    actual = version_catalogo()
+    if _indice is None or _indice.version != actual:
+        # Un solo hilo lo arma; los demás esperan y usan el mismo
+        with _indice_lock:
+            if _indice is None or _indice.version != actual:
+                _indice = _construir(actual)
+    return _indice
+
+
+# ------------------------------------------
+# STOCK DE LOS PRIMEROS RESULTADOS
+# ------------------------------------------
+def con_stock(productos):
+    """Stock y precio FEFO de `productos` (una consulta); sin los que no tienen stock."""
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_LOTES.format(marcas=", ".join(["%s"] * len(productos))), tuple(productos))
+        lotes = cursor.fetchall()
+
+    # Un registro por producto; los lotes llegan ordenados FEFO
+    agregados = {}
+    for lote in lotes:
+        p = agregados.get(lote["producto"])
+        if p is None:
+            agregados[lote["producto"]] = {
+                "producto": lote["producto"],
+                "stock": int(lote["stock"]),
+                "precio_venta": lote["precio_venta"],
+                "lotes": 1,
+            }
+        else:
+            p["stock"] += int(lote["stock"])
+            p["lotes"] += 1
+
+    return [agregados[p] for p in productos if p in agregados]
+
+
+def buscar(texto, limite=LIMITE):
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    candidatos = indice().candidatos(texto)
+
+    # Casi siempre alcanza una tanda; si varios se quedaron sin stock, otra
+    encontrados = []
+    while len(encontrados) < limite:
+        tanda = list(islice(candidatos, limite * 2))
+        if not tanda:
+            break
+        encontrados += con_stock(tanda)[:limite - len(encontrados)]
+    return encontrados
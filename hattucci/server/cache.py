@@ -0,0 +1,76 @@
+# server/cache.py
+# Cachés en memoria del proceso y versiones de datos compartidas.
+#
+# Cada worker tiene su propia caché; para que todos se enteren de un cambio
+# los escritores incrementan una versión en la tabla "versiones" dentro de
+# su transacción y los lectores la usan como parte de la clave.
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Diccionario acotado: al llenarse descarta lo menos usado. ttl opcional (segundos)."""
+
+    def __init__(self, maximo=256, ttl=None):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, defecto=None):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return defecto
+            valor, expira = item
+            if expira is not None and expira < time.monotonic():
+                del self._datos[clave]
+                return defecto
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def pop(self, clave):
+        with self._lock:
+            item = self._datos.pop(clave, None)
+        return item[0] if item else None
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+# ------------------------------------------
+# VERSIONES DE DATOS (tabla versiones)
+# ------------------------------------------
+def incrementar_version(cursor, nombre):
+    cursor.execute("""
+        INSERT INTO versiones (nombre, version) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """, (nombre,))
+
+
+SQL_VERSION = "SELECT version FROM versiones WHERE nombre = %s"
+
+
+def leer_version(cursor, nombre):
+    cursor.execute(SQL_VERSION, (nombre,))
+    return version_de_fila(cursor.fetchone())
+
+
+def version_de_fila(fila):
+    if not fila:
+        return 0
+    return fila["version"] if isinstance(fila, dict) else fila[0]
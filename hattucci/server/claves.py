@@ -0,0 +1,127 @@
+# server/claves.py
+# Hash y verificación de contraseñas con bcrypt fuera del hilo de la petición.
+#
+# bcrypt suelta el GIL mientras calcula, así que un pool de hilos acotado
+# reparte el trabajo entre los núcleos sin bloquear a los demás hilos del
+# worker. Si hay demasiadas peticiones en cola se rechaza en lugar de
+# acumularlas (ClavesOcupado).
+#
+# Variables de entorno:
+#   BCRYPT_COSTO   factor de costo (por defecto 12); al cambiarlo, los hashes
+#                  antiguos se rehacen de forma transparente en el siguiente login
+#   HASH_HILOS     hilos dedicados a bcrypt por proceso
+#   HASH_COLA      máximo de operaciones en curso + en espera por proceso
+#   HASH_ESPERA    segundos máximos esperando un lugar en la cola
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_COSTO = int(os.environ.get("BCRYPT_COSTO", "12"))
+HASH_HILOS = int(os.environ.get("HASH_HILOS", str(os.cpu_count() or 2)))
+HASH_COLA = int(os.environ.get("HASH_COLA", str(HASH_HILOS * 4)))
+HASH_ESPERA = float(os.environ.get("HASH_ESPERA", "5"))
+
+_ejecutor = ThreadPoolExecutor(max_workers=HASH_HILOS, thread_name_prefix="bcrypt")
+_cupos = threading.BoundedSemaphore(HASH_COLA)
+
+
+class ClavesOcupado(Exception):
+    """Demasiadas operaciones de bcrypt en espera."""
+
+
+def _en_pool(funcion, *args):
+    if not _cupos.acquire(timeout=HASH_ESPERA):
+        raise ClavesOcupado("Servidor ocupado, intente nuevamente en unos segundos")
+    try:
+        return _ejecutor.submit(funcion, *args).result()
+    finally:
+        _cupos.release()
+
+
+def _hashear(clave, costo):
+    return bcrypt.hashpw(clave.encode("utf-8"), bcrypt.gensalt(rounds=costo)).decode("utf-8")
+
+
+def _verificar(clave, hash_guardado):
+    try:
+        return bcrypt.checkpw(clave.encode("utf-8"), hash_guardado.encode("utf-8"))
+    except ValueError:
+        # Hash mal formado en la base
+        return False
+
+
+def hashear(clave):
+    return _en_pool(_hashear, clave, BCRYPT_COSTO)
+
+
+def verificar(clave, hash_guardado):
+    return _en_pool(_verificar, clave, hash_guardado)
+
+
+def necesita_rehash(hash_guardado):
+    # Formato: $2b$12$<salt+hash>
+    try:
+        return int(hash_guardado.split("$")[2]) != BCRYPT_COSTO
+    except (IndexError, ValueError):
+        return True
+
+
+# ------------------------------------------
+# LÍMITE DE INTENTOS FALLIDOS
+# ------------------------------------------
+class Limitador:
+    """Cuenta fallos por clave (usuario o IP) en una ventana deslizante.
+
+    Es por proceso: con varios workers el límite efectivo es el configurado
+    multiplicado por la cantidad de workers, suficiente para que un ataque no
+    acapare la CPU con bcrypt.
+    """
+
+    def __init__(self, maximo, ventana, claves_max=10000):
+        self.maximo = maximo
+        self.ventana = ventana
+        self.claves_max = claves_max
+        self._fallos = {}
+        self._lock = threading.Lock()
+
+    def _limpiar(self, registros, ahora):
+        while registros and registros[0] <= ahora - self.ventana:
+            registros.popleft()
+
+    def bloqueado(self, clave):
+        ahora = time.monotonic()
+        with self._lock:
+            registros = self._fallos.get(clave)
+            if not registros:
+                return False
+            self._limpiar(registros, ahora)
+            return len(registros) >= self.maximo
+
+    def fallo(self, clave):
+        ahora = time.monotonic()
+        with self._lock:
+            if clave not in self._fallos and len(self._fallos) >= self.claves_max:
+                # Descartar las claves sin fallos recientes para acotar memoria
+                for k in [k for k, r in self._fallos.items() if not r or r[-1] <= ahora - self.ventana]:
+                    del self._fallos[k]
+            registros = self._fallos.setdefault(clave, deque())
+            self._limpiar(registros, ahora)
+            registros.append(ahora)
+
+    def limpiar(self, clave):
+        with self._lock:
+            self._fallos.pop(clave, None)
+
+
+fallos_usuario = Limitador(
+    maximo=int(os.environ.get("LOGIN_FALLOS_USUARIO", "5")),
+    ventana=float(os.environ.get("LOGIN_VENTANA", "300")),
+)
+fallos_ip = Limitador(
+    maximo=int(os.environ.get("LOGIN_FALLOS_IP", "20")),
+    ventana=float(os.environ.get("LOGIN_VENTANA", "300")),
+)
@@ -0,0 +1,78 @@
+# server/compresion.py
+# Compresión de las respuestas dinámicas (JSON, HTML, CSV...).
+#
+# Se comprime con brotli si el navegador lo acepta y el paquete está
+# instalado, si no con gzip. Solo vale la pena por encima de
+# COMPRESION_MINIMO bytes: en respuestas chicas los encabezados y el tiempo de
+# CPU cuestan más de lo que se ahorra.
+#
+# No se tocan:
+#   - flujos (SSE de /eventos_inventario, PDF enviados con send_file)
+#   - tipos ya comprimidos (PDF, imágenes)
+#   - respuestas que ya traen Content-Encoding (estáticos precomprimidos)
+#
+# El cuerpo comprimido es otra representación: su ETag pasa a ser débil
+# (W/"...") y se agrega "Vary: Accept-Encoding" para que los proxies guarden
+# una copia por codificación.
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se usa solo gzip
+    brotli = None
+
+MINIMO = int(os.environ.get("COMPRESION_MINIMO", "1024"))
+NIVEL_GZIP = int(os.environ.get("COMPRESION_GZIP", "6"))
+NIVEL_BROTLI = int(os.environ.get("COMPRESION_BROTLI", "4"))  # 4-5: rápido y ya mejor que gzip
+
+TIPOS = {
+    "application/json", "application/javascript", "text/javascript",
+    "text/html", "text/css", "text/plain", "text/csv", "image/svg+xml",
+}
+
+
+def codificacion(aceptadas):
+    """'br', 'gzip' o None según el Accept-Encoding del navegador."""
+    if brotli is not None and aceptadas["br"]:
+        return "br"
+    if aceptadas["gzip"]:
+        return "gzip"
+    return None
+
+
+def comprimir(datos, codif):
+    if codif == "br":
+        return brotli.compress(datos, quality=NIVEL_BROTLI)
+    return gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+def instalar(app):
+    from flask import request
+
+    @app.after_request
+    def _comprimir(respuesta):
+        respuesta.vary.add("Accept-Encoding")
+
+        if (respuesta.status_code != 200
+                or respuesta.direct_passthrough
+                or respuesta.is_streamed
+                or "Content-Encoding" in respuesta.headers
+                or respuesta.mimetype not in TIPOS):
+            return respuesta
+
+        codif = codificacion(request.accept_encodings)
+        if codif is None:
+            return respuesta
+
+        datos = respuesta.get_data()
+        if len(datos) < MINIMO:
+            return respuesta
+
+        respuesta.set_data(comprimir(datos, codif))
+        respuesta.headers["Content-Encoding"] = codif
+
+        etag, debil = respuesta.get_etag()
+        if etag and not debil:
+            respuesta.set_etag(etag, weak=True)
+        return respuesta
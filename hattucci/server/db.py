@@ -1,13 +1,256 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 
+from hattucci.server import metricas, motor_sqlite
+
+# ------------------------------------------
+# CONFIGURACIÓN (variables de entorno)
+# ------------------------------------------
+# mysql  → servidor MySQL (DB_HOST, DB_USER, ...)
+# sqlite → archivo local DB_SQLITE_RUTA, para un solo local (ver motor_sqlite.py)
+MOTOR = os.environ.get("DB_MOTOR", "mysql").lower()
+SQLITE_RUTA = os.environ.get("DB_SQLITE_RUTA", "hattucci.db")
+SQLITE_ESPERA_MS = int(os.environ.get("DB_SQLITE_ESPERA", "5000"))  # espera por el lock de escritura
+
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "aribert.helioho.st"),
+    "port": int(os.environ.get("DB_PORT", "3306")),
+    "user": os.environ.get("DB_USER", "aribert_sistema"),
+    "password": os.environ.get("DB_PASSWORD", "ale-61054342"),
+    "database": os.environ.get("DB_NAME", "aribert_hattucci"),
+    "auth_plugin": "mysql_native_password",
+}
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))            # conexiones máximas por proceso
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))   # segundos esperando una conexión libre
+POOL_RECYCLE = float(os.environ.get("DB_POOL_RECYCLE", "1800")) # edad máxima de una conexión
+POOL_PING = float(os.environ.get("DB_POOL_PING", "30"))         # inactividad tras la cual se hace ping
+
+
+class PoolAgotado(Exception):
+    """No se consiguió una conexión libre dentro de POOL_TIMEOUT."""
+
+
+def crear_conexion():
+    if MOTOR == "sqlite":
+        return motor_sqlite.conectar(SQLITE_RUTA, SQLITE_ESPERA_MS)
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+# ------------------------------------------
+# CONEXIÓN PRESTADA POR EL POOL
+# ------------------------------------------
+class ConexionPool:
+    """Envuelve una conexión real; close() la devuelve al pool en vez de cerrarla."""
+
+    def __init__(self, pool, raw, creada):
+        self._pool = pool
+        self._raw = raw
+        self.creada = creada
+        self.usada = time.monotonic()
+        self.prestada = False
+
+    def __getattr__(self, nombre):
+        return getattr(self._raw, nombre)
+
+    def cursor(self, *args, **kwargs):
+        # Cada sentencia queda medida (ver metricas.py)
+        return metricas.CursorMedido(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self.prestada:
+            self._pool.devolver(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ------------------------------------------
+# POOL POR PROCESO
+# ------------------------------------------
+class Pool:
+
+    def __init__(self, crear=crear_conexion, tamano=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, ping=POOL_PING):
+        self.crear = crear
+        self.tamano = tamano
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping = ping
+        self.pid = os.getpid()
+
+        self._libres = []
+        self._total = 0
+        self._cond = threading.Condition()
+
+        self.creadas = 0
+        self.descartadas = 0
+        self.prestadas = 0
+        self.esperando = 0
+        self.esperas_agotadas = 0
+
+    # ---------- ciclo de vida de una conexión ----------
+    def _nueva(self):
+        raw = self.crear()
+        with self._cond:
+            self.creadas += 1
+        return ConexionPool(self, raw, time.monotonic())
+
+    def _descartar(self, c):
+        try:
+            c._raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self.descartadas += 1
+            self._cond.notify()
+
+    def _sana(self, c):
+        ahora = time.monotonic()
+        if self.recycle and ahora - c.creada > self.recycle:
+            return False
+        if self.ping and ahora - c.usada > self.ping:
+            try:
+                c._raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    # ---------- préstamo / devolución ----------
+    def obtener(self):
+        inicio = time.perf_counter()
+        c = self._obtener()
+        metricas.espera_conexion.observar(time.perf_counter() - inicio)
+        return c
+
+    def _obtener(self):
+        limite = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                c = None
+                if self._libres:
+                    c = self._libres.pop()
+                elif self._total < self.tamano:
+                    self._total += 1
+                else:
+                    self.esperando += 1
+                    restante = limite - time.monotonic()
+                    if restante > 0:
+                        self._cond.wait(restante)
+                    self.esperando -= 1
+                    if not self._libres and self._total >= self.tamano and time.monotonic() >= limite:
+                        self.esperas_agotadas += 1
+                        raise PoolAgotado("No hay conexiones libres en el pool")
+                    continue
+
+            if c is None:
+                try:
+                    c = self._nueva()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._sana(c):
+                self._descartar(c)
+                continue
+
+            with self._cond:
+                self.prestadas += 1
+            c.prestada = True
+            return c
+
+    def devolver(self, c):
+        c.prestada = False
+        with self._cond:
+            self.prestadas -= 1
+        try:
+            # Descartar resultados sin leer y no dejar transacciones abiertas
+            if getattr(c._raw, "unread_result", False):
+                c._raw.consume_results()
+            c._raw.rollback()
+        except Exception:
+            self._descartar(c)
+            return
+
+        c.usada = time.monotonic()
+        with self._cond:
+            self._libres.append(c)
+            self._cond.notify()
+
+    def cerrar(self):
+        with self._cond:
+            libres, self._libres = self._libres, []
+        for c in libres:
+            self._descartar(c)
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                "tamano": self.tamano,
+                "abiertas": self._total,
+                "libres": len(self._libres),
+                "prestadas": self.prestadas,
+                "esperando": self.esperando,
+                "creadas": self.creadas,
+                "descartadas": self.descartadas,
+                "esperas_agotadas": self.esperas_agotadas,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    # Tras un fork el pool del padre no se comparte: cada proceso crea el suyo
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = Pool()
+    return _pool
+
+
+def init_pool(**kwargs):
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.cerrar()
+        _pool = Pool(**kwargs)
+    return _pool
+
+
+def cerrar_pool():
+    """Cierra las conexiones libres del pool de este proceso, si existe."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None and pool.pid == os.getpid():
+        pool.cerrar()
+
+
 def get_connection():
-    connection = mysql.connector.connect(
-        host="aribert.helioho.st",
-        port=3306,
-        user="aribert_sistema",
-        password="ale-61054342",
-        database="aribert_hattucci",
-        auth_plugin="mysql_native_password"
-    )
-    return connection
+    return get_pool().obtener()
+
+
+@contextmanager
+def conexion():
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    return get_pool().estadisticas()
@@ -0,0 +1,135 @@
+# server/db_async.py
+# Conexiones para las rutas asíncronas del modo ASGI (ver asgi.py).
+#
+#   mysql  → pool de aiomysql por event loop (DB_ASYNC_POOL_SIZE conexiones
+#            como máximo). Mientras una consulta espera a la red, el mismo
+#            worker atiende otras peticiones.
+#   sqlite → el archivo es local: se usa el pool síncrono de db.py y cada
+#            llamada corre en un hilo (asyncio.to_thread).
+#
+# Las rutas asíncronas solo leen, así que las conexiones de MySQL van en
+# autocommit: cada consulta ve los últimos datos confirmados.
+#
+#   async with db_async.cursor() as cur:
+#       await cur.execute(sql, params)
+#       filas = await cur.fetchall()      # lista de diccionarios
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from hattucci.server import db, metricas
+
+POOL_SIZE = int(os.environ.get("DB_ASYNC_POOL_SIZE", "10"))
+
+_pools = {}  # event loop → tarea que crea el pool
+
+
+async def _crear_pool():
+    import aiomysql  # solo lo necesita el modo ASGI
+
+    return await aiomysql.create_pool(
+        host=db.DB_CONFIG["host"],
+        port=db.DB_CONFIG["port"],
+        user=db.DB_CONFIG["user"],
+        password=db.DB_CONFIG["password"],
+        db=db.DB_CONFIG["database"],
+        charset="utf8mb4",
+        autocommit=True,
+        minsize=1,
+        maxsize=POOL_SIZE,
+        pool_recycle=int(db.POOL_RECYCLE),
+    )
+
+
+async def _pool():
+    loop = asyncio.get_running_loop()
+    tarea = _pools.get(loop)
+    if tarea is None:
+        # Varias peticiones pueden llegar antes de que el pool exista: todas esperan la misma tarea
+        tarea = _pools[loop] = loop.create_task(_crear_pool())
+    try:
+        return await asyncio.shield(tarea)
+    except Exception:
+        _pools.pop(loop, None)
+        raise
+
+
+async def cerrar():
+    """Cierra el pool del event loop actual (al apagar el worker)."""
+    tarea = _pools.pop(asyncio.get_running_loop(), None)
+    if tarea is None:
+        return
+    try:
+        pool = await tarea
+    except Exception:
+        return
+    pool.close()
+    await pool.wait_closed()
+
+
+# ------------------------------------------
+# CURSORES (misma interfaz para ambos motores)
+# ------------------------------------------
+class CursorAsync:
+    """Cursor de aiomysql medido igual que metricas.CursorMedido."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._forma = "?"
+
+    async def execute(self, sql, params=None):
+        self._forma = metricas.forma(sql)
+        inicio = time.perf_counter()
+        try:
+            return await self._cursor.execute(sql, params)
+        finally:
+            metricas.consultas.observar(time.perf_counter() - inicio, self._forma)
+
+    async def fetchone(self):
+        fila = await self._cursor.fetchone()
+        if fila is not None:
+            metricas.filas.sumar(1, self._forma, "leidas")
+        return fila
+
+    async def fetchall(self):
+        filas = list(await self._cursor.fetchall())
+        if filas:
+            metricas.filas.sumar(len(filas), self._forma, "leidas")
+        return filas
+
+
+class CursorEnHilo:
+    """Cursor síncrono (ya medido) cuyas llamadas corren en un hilo."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, sql, params=None):
+        return await asyncio.to_thread(self._cursor.execute, sql, params)
+
+    async def fetchone(self):
+        return await asyncio.to_thread(self._cursor.fetchone)
+
+    async def fetchall(self):
+        return await asyncio.to_thread(self._cursor.fetchall)
+
+
+@asynccontextmanager
+async def cursor():
+    if db.MOTOR == "sqlite":
+        conn = await asyncio.to_thread(db.get_connection)
+        try:
+            yield CursorEnHilo(conn.cursor(dictionary=True))
+        finally:
+            await asyncio.to_thread(conn.close)
+        return
+
+    import aiomysql
+
+    pool = await _pool()
+    inicio = time.perf_counter()
+    async with pool.acquire() as conn:
+        metricas.espera_conexion.observar(time.perf_counter() - inicio)
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            yield CursorAsync(cur)
@@ -0,0 +1,248 @@
+# server/estaticos.py
+# Archivos estáticos con huella de contenido y caché de larga duración.
+#
+#   python -m hattucci.server.estaticos vendorizar   (al cambiar de versión, con internet)
+#   python -m hattucci.server.estaticos construir
+#
+# Las librerías de terceros (Bootstrap, SweetAlert2) están en web/static/vendor
+# y se guardan en el repositorio: las páginas no dependen de un CDN.
+# vendorizar las vuelve a descargar según LIBRERIAS y verifica su hash.
+#
+# construir minifica el JS y el CSS propios, arma los PAQUETES compartidos y
+# copia todo a web/static/dist con el hash del contenido en el nombre
+# (css/estilo.css → dist/css/estilo.1a2b3c4d.css), con versiones .gz y .br al
+# lado y un manifest.json con la correspondencia. El logo se reduce al tamaño
+# con que se muestra (x2 para pantallas de alta densidad) y se recodifica como
+# JPEG progresivo.
+#
+# Las plantillas cargan los paquetes con paquete("paquetes/panel.css"):
+# construido, es un solo archivo; sin construir, sus partes por separado.
+# Si falta alguna parte, construir termina con error.
+#
+# En las plantillas se sigue usando url_for('static', filename='css/estilo.css');
+# si existe el manifiesto, la URL apunta al archivo con huella. Como el nombre
+# cambia cuando cambia el contenido, esos archivos se sirven con
+# "Cache-Control: public, max-age=31536000, immutable" y el navegador no los
+# vuelve a pedir. Sin construir (desarrollo) se sirven los originales con la
+# caché normal de Flask.
+#
+# Hay que volver a construir tras cambiar algo en web/static.
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+import urllib.request
+from io import BytesIO
+
+from hattucci.server.compresion import brotli, codificacion
+
+CARPETA = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "web", "static"))
+DIST = "dist"
+MANIFIESTO = os.path.join(CARPETA, DIST, "manifest.json")
+
+UN_ANIO = 365 * 24 * 3600
+
+COMPRIMIBLES = (".css", ".js", ".svg", ".json", ".txt", ".map")
+
+# Librerías de terceros: ruta local → (URL, integridad SRI del archivo guardado)
+LIBRERIAS = {
+    "vendor/bootstrap.min.css": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/css/bootstrap.min.css",
+        "sha384-sRIl4kxILFvY47J16cr9ZwB07vP4J8+LH7qKQnuqkuIAvNWLzeN8tE5YBujZqJLB",
+    ),
+    "vendor/sweetalert2.all.min.js": (
+        "https://cdn.jsdelivr.net/npm/sweetalert2@11.4.0/dist/sweetalert2.all.min.js",
+        "sha384-qd8hnleXqlAwloPIJ6tt6YGAmqAsoV4zMBhQNYs+UeXHkcTBgB4foAlTcrxfYkcy",
+    ),
+}
+
+# Paquetes compartidos por las páginas del panel (templates/panel.html)
+PAQUETES = {
+    "paquetes/panel.css": ["vendor/bootstrap.min.css", "css/estilo.css"],
+    "paquetes/panel.js": ["vendor/sweetalert2.all.min.js", "js/comun.js", "js/buscador.js"],
+}
+
+# Imágenes que se muestran más chicas que el original: ruta → lado máximo en px
+IMAGENES = {
+    "img/logo.jpg": 360,  # menu.html la muestra a 180x180
+}
+
+
+# ------------------------------------------
+# CONSTRUCCIÓN
+# ------------------------------------------
+def _reducir_imagen(datos, lado):
+    from PIL import Image  # viene con reportlab
+
+    imagen = Image.open(BytesIO(datos))
+    imagen.thumbnail((lado, lado), Image.LANCZOS)
+    salida = BytesIO()
+    imagen.convert("RGB").save(salida, "JPEG", quality=82, optimize=True, progressive=True)
+    return salida.getvalue() if salida.tell() < len(datos) else datos
+
+
+def _con_huella(ruta, datos):
+    huella = hashlib.sha256(datos).hexdigest()[:10]
+    base, ext = os.path.splitext(ruta)
+    return f"{DIST}/{base}.{huella}{ext}"
+
+
+def _escribir(ruta, datos):
+    destino = os.path.join(CARPETA, ruta)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "wb") as f:
+        f.write(datos)
+
+
+def _minificar(ruta, datos):
+    if ruta.endswith((".min.js", ".min.css")):
+        return datos
+    try:
+        if ruta.endswith(".js"):
+            import rjsmin
+            return rjsmin.jsmin(datos.decode("utf-8")).encode("utf-8")
+        if ruta.endswith(".css"):
+            import rcssmin
+            return rcssmin.cssmin(datos.decode("utf-8")).encode("utf-8")
+    except ImportError as e:
+        print(f"⚠️ Sin minificar {ruta}: falta {e.name}")
+    return datos
+
+
+def _publicar(ruta, datos, manifiesto):
+    destino = _con_huella(ruta, datos)
+    _escribir(destino, datos)
+    manifiesto[ruta] = destino
+
+    if ruta.endswith(COMPRIMIBLES):
+        _escribir(destino + ".gz", gzip.compress(datos, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _escribir(destino + ".br", brotli.compress(datos, quality=11))
+    print(f"   {ruta} → {destino}")
+
+
+def construir():
+    dist = os.path.join(CARPETA, DIST)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifiesto = {}
+    procesados = {}
+    ahorro = 0
+    for raiz, carpetas, archivos in os.walk(CARPETA):
+        carpetas[:] = [c for c in carpetas if not (raiz == CARPETA and c == DIST)]
+        for nombre in sorted(archivos):
+            ruta = os.path.relpath(os.path.join(raiz, nombre), CARPETA).replace(os.sep, "/")
+            with open(os.path.join(raiz, nombre), "rb") as f:
+                datos = f.read()
+            original = len(datos)
+
+            if ruta in IMAGENES:
+                datos = _reducir_imagen(datos, IMAGENES[ruta])
+            datos = _minificar(ruta, datos)
+
+            _publicar(ruta, datos, manifiesto)
+            procesados[ruta] = datos
+            ahorro += original - len(datos)
+
+    for paquete, partes in PAQUETES.items():
+        faltan = [p for p in partes if p not in procesados]
+        if faltan:
+            print(f"❌ ERROR {paquete}: falta {', '.join(faltan)} (python -m hattucci.server.estaticos vendorizar)")
+            sys.exit(1)
+        separador = b";\n" if paquete.endswith(".js") else b"\n"
+        _publicar(paquete, separador.join(procesados[p] for p in partes), manifiesto)
+
+    with open(MANIFIESTO, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+
+    print(f"✅ {len(manifiesto)} archivos en {DIST}/ ({ahorro // 1024} KB menos sin contar la compresión)")
+    if brotli is None:
+        print("⚠️ Sin el paquete brotli: solo se generaron las versiones .gz")
+    return manifiesto
+
+
+def _integridad(datos, esperada):
+    algoritmo, _, valor = esperada.partition("-")
+    return base64.b64encode(hashlib.new(algoritmo, datos).digest()).decode() == valor
+
+
+def vendorizar():
+    for ruta, (url, integridad) in LIBRERIAS.items():
+        with urllib.request.urlopen(url, timeout=30) as respuesta:
+            datos = respuesta.read()
+        if integridad and not _integridad(datos, integridad):
+            print(f"❌ ERROR {ruta}: el archivo descargado no coincide con {integridad}")
+            sys.exit(1)
+        _escribir(ruta, datos)
+        print(f"   {url} → {ruta} ({len(datos) // 1024} KB)")
+    print("✅ Librerías en web/static/vendor (agregarlas al repositorio)")
+
+
+# ------------------------------------------
+# SERVIR
+# ------------------------------------------
+def leer_manifiesto():
+    try:
+        with open(MANIFIESTO, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def instalar(app):
+    from flask import request, send_from_directory, url_for
+
+    manifiesto = leer_manifiesto()
+
+    def paquete(nombre):
+        """URLs a cargar para un paquete de PAQUETES."""
+        if nombre in manifiesto:
+            return [url_for("static", filename=nombre)]
+        return [url_for("static", filename=parte) for parte in PAQUETES[nombre]]
+
+    app.jinja_env.globals["paquete"] = paquete
+
+    @app.url_defaults
+    def _url_con_huella(endpoint, valores):
+        if endpoint == "static" and valores.get("filename") in manifiesto:
+            valores["filename"] = manifiesto[valores["filename"]]
+
+    def servir(filename):
+        if not filename.startswith(DIST + "/"):
+            return app.send_static_file(filename)
+
+        tipo = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        codif = codificacion(request.accept_encodings)
+        extension = {"br": ".br", "gzip": ".gz"}.get(codif)
+
+        # Si no hay versión .br (p. ej. construida sin brotli), queda la .gz
+        if codif == "br" and not os.path.exists(os.path.join(CARPETA, filename + ".br")):
+            codif, extension = ("gzip", ".gz") if request.accept_encodings["gzip"] else (None, None)
+
+        if extension and os.path.exists(os.path.join(CARPETA, filename + extension)):
+            respuesta = send_from_directory(CARPETA, filename + extension, mimetype=tipo, max_age=UN_ANIO)
+            respuesta.headers["Content-Encoding"] = codif
+        else:
+            respuesta = send_from_directory(CARPETA, filename, mimetype=tipo, max_age=UN_ANIO)
+
+        respuesta.cache_control.public = True
+        respuesta.cache_control.immutable = True
+        respuesta.vary.add("Accept-Encoding")
+        return respuesta
+
+    app.view_functions["static"] = servir
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["construir"]:
+        construir()
+    elif sys.argv[1:] == ["vendorizar"]:
+        vendorizar()
+    else:
+        print("Uso: python -m hattucci.server.estaticos [vendorizar | construir]")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+# server/estres.py
+# Pruebas de concurrencia contra la base configurada (DB_HOST, ...).
+#
+#   python -m hattucci.server.estres upsert [hilos] [registros_por_hilo]
+#
+# upsert: muchos hilos registran a la vez el MISMO lote de inventario y la
+# MISMA compra por las rutas reales (/registrar_inventario, /registrar_compra).
+# Con las claves únicas y ON DUPLICATE KEY UPDATE debe quedar exactamente una
+# fila de cada una con el total correcto. Los datos de prueba usan un nombre
+# de producto único y se borran al terminar.
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+from hattucci.server import busqueda, inventario
+from hattucci.server.db import conexion
+
+
+def _contar(cursor, tabla, columna, producto):
+    cursor.execute(
+        f"SELECT COUNT(*), COALESCE(SUM({columna}), 0) FROM {tabla} WHERE producto = %s",
+        (producto,)
+    )
+    filas, total = cursor.fetchone()
+    return int(filas), int(total)
+
+
+def _limpiar(producto):
+    with conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM inventario WHERE producto = %s", (producto,))
+        cursor.execute("DELETE FROM compras WHERE producto = %s", (producto,))
+        cursor.execute("DELETE FROM resumen_diario WHERE producto = %s", (producto,))
+        version = inventario.marcar_cambio(cursor)
+        busqueda.marcar_catalogo(cursor)
+        conn.commit()
+    inventario.recordar_version(version)
+
+
+def estres_upsert(hilos=16, por_hilo=25):
+    from hattucci.server.app import app
+
+    producto = f"__estres_{os.getpid()}_{int(time.time())}"
+    hoy = date.today()
+    lote = {
+        "producto": producto,
+        "vencimiento": (hoy + timedelta(days=30)).isoformat(),
+        "stock": 1,
+        "precio_venta": 1.0,
+    }
+    compra = {
+        "proveedor_nombre": "Proveedor de prueba",
+        "proveedor_contacto": "999999999",
+        "producto": producto,
+        "cantidad": 1,
+        "precio_unitario": 1.0,
+        "fecha_registro": hoy.isoformat(),
+        "fecha_vencimiento": (hoy + timedelta(days=30)).isoformat(),
+    }
+    errores = []
+    lock = threading.Lock()
+    salida = threading.Barrier(hilos)
+
+    def trabajar():
+        cliente = app.test_client()
+        salida.wait()  # que todos arranquen a la vez
+        for _ in range(por_hilo):
+            for ruta, datos in (("/registrar_inventario", lote), ("/registrar_compra", compra)):
+                respuesta = cliente.post(ruta, json=datos).get_json()
+                if not respuesta or not respuesta.get("ok"):
+                    with lock:
+                        errores.append((ruta, respuesta))
+
+    inicio = time.monotonic()
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    segundos = time.monotonic() - inicio
+
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            filas_inv, stock = _contar(cursor, "inventario", "stock", producto)
+            filas_comp, cantidad = _contar(cursor, "compras", "cantidad", producto)
+    finally:
+        _limpiar(producto)
+
+    esperado = hilos * por_hilo
+    return {
+        "esperado": esperado,
+        "inventario": {"filas": filas_inv, "stock": stock},
+        "compras": {"filas": filas_comp, "cantidad": cantidad},
+        "errores": len(errores),
+        "registros_por_segundo": round(2 * esperado / segundos) if segundos > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "upsert":
+        print("Uso: python -m hattucci.server.estres upsert [hilos] [registros_por_hilo]")
+        sys.exit(2)
+
+    args = [int(a) for a in sys.argv[2:4]]
+    resultado = estres_upsert(*args)
+    print(resultado)
+
+    esperado = resultado["esperado"]
+    correcto = (
+        resultado["inventario"] == {"filas": 1, "stock": esperado}
+        and resultado["compras"] == {"filas": 1, "cantidad": esperado}
+        and not resultado["errores"]
+    )
+    if not correcto:
+        print("❌ Se duplicaron filas o se perdieron registros")
+        sys.exit(1)
+    print("✅ Una sola fila por clave con el total correcto")
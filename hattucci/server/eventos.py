@@ -0,0 +1,79 @@
+# server/eventos.py
+# Broker de eventos en memoria del proceso para server-sent events.
+#
+# Los escritores publican después del commit; cada conexión SSE espera con
+# esperar(desde) a que haya eventos posteriores al último que recibió. Se
+# guarda un historial corto para que un navegador que se reconecta con
+# Last-Event-ID reciba lo que se perdió; si ya no está en el historial (o el
+# id es de otro worker) hay que pedirle que recargue todo.
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Broker:
+
+    def __init__(self, historial=1000):
+        self._cond = threading.Condition()
+        self._historial = historial
+        self._reiniciar()
+
+    def _reiniciar(self):
+        # Tras un fork cada worker empieza su propia numeración
+        self._pid = os.getpid()
+        self._origen = f"{self._pid}.{int(time.time())}"
+        self._eventos = deque(maxlen=self._historial)
+        self._ultimo = 0
+
+    def _revisar_fork(self):
+        if self._pid != os.getpid():
+            self._reiniciar()
+
+    def ident(self, numero):
+        return f"{self._origen}:{numero}"
+
+    def ultimo(self):
+        with self._cond:
+            self._revisar_fork()
+            return self._ultimo
+
+    def posicion(self, ident):
+        """Número de evento a partir de un Last-Event-ID, o None si no se puede continuar."""
+        with self._cond:
+            self._revisar_fork()
+            origen, _, numero = (ident or "").rpartition(":")
+            if origen != self._origen or not numero.isdigit():
+                return None
+            numero = int(numero)
+            if numero > self._ultimo:
+                return None
+            primero = self._eventos[0][0] if self._eventos else self._ultimo + 1
+            if numero < primero - 1:
+                # Se perdieron eventos que ya salieron del historial
+                return None
+            return numero
+
+    def publicar(self, tipo, datos):
+        with self._cond:
+            self._revisar_fork()
+            self._ultimo += 1
+            self._eventos.append((self._ultimo, tipo, datos))
+            self._cond.notify_all()
+            return self._ultimo
+
+    def esperar(self, desde, timeout):
+        """Eventos con número > desde; espera hasta timeout segundos si no hay ninguno."""
+        with self._cond:
+            self._revisar_fork()
+            if self._ultimo <= desde:
+                self._cond.wait(timeout)
+            return [e for e in self._eventos if e[0] > desde]
+
+
+def formatear(ident, tipo, datos):
+    return f"id: {ident}\nevent: {tipo}\ndata: {json.dumps(datos, default=str)}\n\n"
+
+
+broker = Broker(historial=int(os.environ.get("EVENTOS_HISTORIAL", "1000")))
@@ -0,0 +1,95 @@
+# server/exportar.py
+# Exportación en flujo de compras y ventas como NDJSON o CSV: las filas se
+# leen por lotes de TAMANO_LOTE y se envían a medida que llegan, sin cargar
+# la tabla entera en memoria.
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from hattucci.server.db import conexion
+
+TAMANO_LOTE = 1000
+
+# tabla → (columna de fecha para el rango, columnas exportadas)
+TABLAS = {
+    "compras": ("fecha_registro", [
+        "id", "nombre_proveedor", "contacto_proveedor", "producto",
+        "cantidad", "precio_unitario", "fecha_registro", "fecha_vencimiento",
+    ]),
+    "ventas": ("fecha_venta", [
+        "producto", "cantidad", "total", "fecha_venta", "numero_boleta",
+    ]),
+}
+
+
+def _valor(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+# ------------------------------------------
+# LECTURA POR LOTES (cursor sin buffer)
+# ------------------------------------------
+def leer_filas(tabla, desde=None, hasta=None):
+    """Genera las filas de la tabla sin cargarla entera en memoria.
+
+    La conexión queda prestada mientras el generador está vivo y vuelve al
+    pool al terminar o si el cliente corta la descarga.
+    """
+    columna_fecha, columnas = TABLAS[tabla]
+
+    condiciones, params = [], []
+    if desde:
+        condiciones.append(f"{columna_fecha} >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append(f"{columna_fecha} < %s")
+        params.append(hasta + timedelta(days=1))
+
+    where = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    sql = f"SELECT {', '.join(columnas)} FROM {tabla} {where} ORDER BY {columna_fecha}"
+
+    with conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, tuple(params))
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            yield from lote
+        cursor.close()
+
+
+# ------------------------------------------
+# FORMATOS
+# ------------------------------------------
+def como_ndjson(columnas, filas):
+    buffer = []
+    for fila in filas:
+        buffer.append(json.dumps({c: _valor(v) for c, v in zip(columnas, fila)}, ensure_ascii=False))
+        if len(buffer) >= TAMANO_LOTE:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def como_csv(columnas, filas):
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(columnas)
+
+    for i, fila in enumerate(filas, 1):
+        escritor.writerow([_valor(v) for v in fila])
+        if i % TAMANO_LOTE == 0:
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+
+    if salida.tell():
+        yield salida.getvalue()
@@ -0,0 +1,116 @@
+# server/gunicorn_conf.py
+# Configuración de producción para gunicorn.
+#
+#   gunicorn -c python:hattucci.server.gunicorn_conf
+#
+# La app se carga una sola vez en el proceso maestro (preload_app) y los
+# workers la heredan al hacer fork: el código y los datos de solo lectura se
+# comparten entre procesos (copy-on-write) en vez de cargarse N veces.
+#
+# Cada worker abre su propio pool de conexiones después del fork (post_fork):
+# un socket de MySQL o un archivo de SQLite abierto en el maestro nunca queda
+# compartido entre procesos.
+#
+# Variables de entorno (todas opcionales):
+#   GUNICORN_BIND           dirección de escucha (por defecto 0.0.0.0:$PORT o :8000)
+#   GUNICORN_MODO           wsgi (Flask, por defecto) | asgi (asgi.py con uvicorn)
+#   GUNICORN_WORKERS        procesos; por defecto uno por núcleo (mínimo 2)
+#   GUNICORN_HILOS          hilos por worker en modo wsgi (por defecto 8)
+#   EVENTOS_MAXIMO          flujos SSE abiertos por worker (por defecto 1/4 de los hilos)
+#   GUNICORN_MAX_PETICIONES se recicla el worker tras N peticiones (0 = nunca)
+#   GUNICORN_GRACIA         segundos para terminar lo que está en curso al apagar
+#   GUNICORN_PIDFILE        archivo con el pid del maestro (para las señales)
+#
+# Despliegue sin cortar ventas en curso:
+#   kill -HUP  <maestro>   recarga la configuración y reemplaza los workers.
+#                          Con preload_app NO recarga el código de la app.
+#   kill -USR2 <maestro>   arranca un maestro nuevo con el código nuevo; cuando
+#                          sus workers ya atienden:
+#   kill -TERM <anterior>  el maestro anterior deja de aceptar conexiones y sus
+#                          workers terminan las peticiones en curso (hasta
+#                          GUNICORN_GRACIA segundos) antes de salir.
+# (QUIT e INT apagan de inmediato: no usarlas con ventas en curso.)
+import gc
+import multiprocessing
+import os
+
+from hattucci.server import db
+
+MODO = os.environ.get("GUNICORN_MODO", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:" + os.environ.get("PORT", "8000"))
+pidfile = os.environ.get("GUNICORN_PIDFILE")
+
+# ------------------------------------------
+# WORKERS
+# ------------------------------------------
+# Las peticiones pasan la mayor parte del tiempo esperando a la base: un
+# proceso por núcleo y varios hilos por proceso.
+workers = int(os.environ.get("GUNICORN_WORKERS", max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get("GUNICORN_HILOS", "8"))
+
+# Cada caja con ventas.html abierto mantiene un flujo SSE de
+# /eventos_inventario, que ocupa un hilo (en modo asgi, uno de los ASGI_HILOS)
+# hasta EVENTOS_DURACION segundos. Sin tope, 8 cajas en un worker de 8 hilos
+# lo dejarían sin hilos para vender. Por defecto cada worker acepta flujos
+# para una cuarta parte de sus hilos y contesta 503 + Retry-After al resto:
+#   cajas con stock en vivo ≈ workers × EVENTOS_MAXIMO
+# (con los valores por defecto, 2 por worker en wsgi y 8 en asgi). Para más
+# cajas: más workers, más GUNICORN_HILOS o GUNICORN_MODO=asgi, y subir el
+# tope sin pasar de la mitad de los hilos. Se define antes de precargar la app
+# porque inventario.py lo lee al importarse.
+_hilos_flujo = int(os.environ.get("ASGI_HILOS", "32")) if MODO == "asgi" else threads
+os.environ.setdefault("EVENTOS_MAXIMO", str(max(1, _hilos_flujo // 4)))
+
+if MODO == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "hattucci.server.asgi:aplicacion"
+else:
+    worker_class = "gthread"
+    wsgi_app = "hattucci.server.app:app"
+
+preload_app = True
+
+# En modo wsgi cada hilo usa como mucho una conexión a la vez; en modo asgi
+# las rutas asíncronas tienen su propio pool (db_async.py). DB_POOL_SIZE manda
+# si está definida.
+POOL_DB = int(os.environ.get("DB_POOL_SIZE", db.POOL_SIZE if MODO == "asgi" else threads))
+
+# ------------------------------------------
+# RECICLAJE Y APAGADO
+# ------------------------------------------
+# Reiniciar los workers cada tanto acota lo que crecen las cachés y la memoria
+# fragmentada; el jitter evita que todos se reinicien a la vez.
+max_requests = int(os.environ.get("GUNICORN_MAX_PETICIONES", "2000"))
+max_requests_jitter = max_requests // 10
+
+graceful_timeout = int(os.environ.get("GUNICORN_GRACIA", "30"))
+timeout = 60
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+# ------------------------------------------
+# HOOKS
+# ------------------------------------------
+def when_ready(server):
+    # Lo cargado hasta aquí (la app precargada) no lo vuelve a recorrer el GC:
+    # así las páginas heredadas siguen compartidas tras el fork
+    gc.freeze()
+    hilos = "event loop" if MODO == "asgi" else f"{threads} hilos"
+    server.log.info(f"✅ Hattucci ({MODO}) en {bind}: {workers} workers × {hilos}")
+
+
+def pre_fork(server, worker):
+    # Si al precargar se abrió alguna conexión, se cierra antes de copiarla al hijo
+    db.cerrar_pool()
+
+
+def post_fork(server, worker):
+    db.init_pool(tamano=POOL_DB)
+
+
+def worker_exit(server, worker):
+    db.cerrar_pool()
@@ -0,0 +1,254 @@
+# server/importar.py
+# Importación masiva de compras desde CSV o NDJSON.
+#
+# El archivo se lee línea por línea; cada fila se valida y se fusiona en
+# memoria con la misma clave que usa /registrar_compra (proveedor, contacto,
+# producto, precio unitario, día de vencimiento, día de registro). Luego todo
+# se escribe en una sola transacción con un número fijo de sentencias por
+# cada TAMANO_LOTE grupos:
+#   1. SELECT de las compras ya existentes con esas claves (solo para saber
+#      cuántas compras nuevas sumar en resumen_diario)
+#   2. INSERT multi-fila ... ON DUPLICATE KEY UPDATE sobre uq_compras_fusion:
+#      las existentes suman cantidad, las demás se insertan
+#   3. upsert multi-fila en resumen_diario
+#
+# Acepta los nombres de campo de /registrar_compra (proveedor_nombre,
+# proveedor_contacto, ...) o los de /exportar/compras (nombre_proveedor,
+# contacto_proveedor, ...), así que una exportación se puede volver a importar.
+import csv
+import io
+import json
+import re
+import time
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from hattucci.server import resumen
+
+TAMANO_LOTE = 500
+MAX_ERRORES = 100
+DIAS_MIN_VENCIMIENTO = 14
+
+_ALIAS = {
+    "nombre_proveedor": "proveedor_nombre",
+    "contacto_proveedor": "proveedor_contacto",
+}
+_CAMPOS = (
+    "proveedor_nombre", "proveedor_contacto", "producto", "cantidad",
+    "precio_unitario", "fecha_registro", "fecha_vencimiento",
+)
+
+
+class FilaInvalida(ValueError):
+    pass
+
+
+# ------------------------------------------
+# LECTURA (línea por línea)
+# ------------------------------------------
+# Ambos generan (número de línea, dict | FilaInvalida | None)
+def leer_csv(texto):
+    lector = csv.DictReader(texto)
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def leer_ndjson(texto):
+    for numero, linea in enumerate(texto, 1):
+        linea = linea.strip()
+        if not linea:
+            yield numero, None
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            yield numero, FilaInvalida("JSON mal formado")
+            continue
+        yield numero, fila if isinstance(fila, dict) else FilaInvalida("Se esperaba un objeto JSON")
+
+
+def abrir(flujo, formato):
+    """flujo: archivo binario (request.stream o el archivo subido)."""
+    texto = io.TextIOWrapper(flujo, encoding="utf-8-sig", newline="")
+    if formato == "csv":
+        return leer_csv(texto)
+    return leer_ndjson(texto)
+
+
+# ------------------------------------------
+# VALIDACIÓN
+# ------------------------------------------
+def _fecha(valor, campo):
+    try:
+        return date.fromisoformat(str(valor).strip()[:10])
+    except ValueError:
+        raise FilaInvalida(f"{campo} debe tener formato YYYY-MM-DD")
+
+
+def validar(fila):
+    """Devuelve (clave, cantidad) o lanza FilaInvalida."""
+    datos = {_ALIAS.get(k, k): v for k, v in fila.items() if k is not None}
+
+    faltan = [c for c in _CAMPOS if str(datos.get(c) or "").strip() == ""]
+    if faltan:
+        raise FilaInvalida("Faltan campos: " + ", ".join(faltan))
+
+    contacto = str(datos["proveedor_contacto"]).strip()
+    if not re.fullmatch(r"\d{9}", contacto):
+        raise FilaInvalida("El contacto debe tener exactamente 9 dígitos")
+
+    try:
+        cantidad = int(str(datos["cantidad"]).strip())
+    except ValueError:
+        raise FilaInvalida("cantidad debe ser un entero")
+    if cantidad <= 0:
+        raise FilaInvalida("cantidad debe ser mayor a 0")
+
+    try:
+        precio = Decimal(str(datos["precio_unitario"]).strip()).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise FilaInvalida("precio_unitario no es un número")
+    if precio < 0:
+        raise FilaInvalida("precio_unitario no puede ser negativo")
+
+    registro = _fecha(datos["fecha_registro"], "fecha_registro")
+    vencimiento = _fecha(datos["fecha_vencimiento"], "fecha_vencimiento")
+    if vencimiento < registro + timedelta(days=DIAS_MIN_VENCIMIENTO):
+        raise FilaInvalida(f"El vencimiento debe ser mínimo {DIAS_MIN_VENCIMIENTO} días después del registro")
+
+    clave = (
+        str(datos["proveedor_nombre"]).strip(), contacto, str(datos["producto"]).strip(),
+        precio, vencimiento, registro,
+    )
+    return clave, cantidad
+
+
+def normalizar(clave):
+    # MySQL compara los textos sin distinguir mayúsculas; aquí igual
+    nombre, contacto, producto, *resto = clave
+    return (nombre.lower(), contacto, producto.lower(), *resto)
+
+
+def _clave_existente(fila):
+    return normalizar((
+        fila["nombre_proveedor"], fila["contacto_proveedor"], fila["producto"],
+        Decimal(str(fila["precio_unitario"])).quantize(Decimal("0.01")),
+        date.fromisoformat(str(fila["fecha_vencimiento"])[:10]),
+        date.fromisoformat(str(fila["fecha_registro"])[:10]),
+    ))
+
+
+# ------------------------------------------
+# ESCRITURA POR LOTES (cursor de la transacción en curso)
+# ------------------------------------------
+def _buscar_existentes(cursor, claves):
+    """{clave normalizada: id} de las compras que ya tienen esa clave."""
+    productos = sorted({c[2] for c in claves})
+    desde = min(c[5] for c in claves)
+    hasta = max(c[5] for c in claves) + timedelta(days=1)
+
+    cursor.execute(f"""
+        SELECT id, nombre_proveedor, contacto_proveedor, producto,
+               precio_unitario, fecha_registro, fecha_vencimiento
+        FROM compras
+        WHERE fecha_registro >= %s AND fecha_registro < %s
+          AND producto IN ({", ".join(["%s"] * len(productos))})
+        ORDER BY id
+    """, (desde, hasta, *productos))
+
+    buscadas = {normalizar(c) for c in claves}
+    existentes = {}
+    for fila in cursor.fetchall():
+        clave = _clave_existente(fila)
+        if clave in buscadas and clave not in existentes:
+            existentes[clave] = fila["id"]
+    return existentes
+
+
+def _escribir_lote(cursor, grupos):
+    """grupos: {clave normalizada: [clave, cantidad]}"""
+    existentes = _buscar_existentes(cursor, [clave for clave, _ in grupos.values()])
+
+    params = []
+    for (nombre, contacto, producto, precio, vencimiento, registro), cantidad in grupos.values():
+        params.extend([nombre, contacto, producto, cantidad, precio, registro, vencimiento])
+    cursor.execute(f"""
+        INSERT INTO compras (
+            nombre_proveedor, contacto_proveedor, producto, cantidad,
+            precio_unitario, fecha_registro, fecha_vencimiento
+        )
+        VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(grupos))}
+        ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+    """, tuple(params))
+
+    resumen.sumar_compras(cursor, [
+        (clave[5], clave[2], cantidad, cantidad * clave[3], 0 if norm in existentes else 1)
+        for norm, (clave, cantidad) in grupos.items()
+    ])
+    return len(existentes), len(grupos) - len(existentes)
+
+
+# ------------------------------------------
+# IMPORTACIÓN COMPLETA
+# ------------------------------------------
+def importar_compras(conn, filas, parcial=False):
+    """filas: lo que genera abrir(): (número de línea, dict | FilaInvalida | None).
+
+    Sin `parcial`, una sola fila con error cancela toda la importación, así
+    el proveedor corrige el archivo y lo vuelve a subir sin duplicar nada.
+    """
+    inicio = time.monotonic()
+    grupos = {}
+    errores = []
+    lineas = invalidas = 0
+
+    for numero, fila in filas:
+        if fila is None:
+            continue
+        lineas += 1
+        try:
+            if isinstance(fila, Exception):
+                raise fila
+            clave, cantidad = validar(fila)
+        except FilaInvalida as e:
+            invalidas += 1
+            if len(errores) < MAX_ERRORES:
+                errores.append({"linea": numero, "error": str(e)})
+            continue
+        grupos.setdefault(normalizar(clave), [clave, 0])[1] += cantidad
+
+    resultado = {
+        "ok": True,
+        "lineas": lineas,
+        "validas": lineas - invalidas,
+        "invalidas": invalidas,
+        "errores": errores,
+        "compras": len(grupos),
+        "actualizadas": 0,
+        "insertadas": 0,
+    }
+
+    if invalidas and not parcial:
+        resultado["ok"] = False
+        resultado["error"] = "El archivo tiene filas con errores; no se importó nada"
+        return resultado
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        claves = list(grupos)
+        for i in range(0, len(claves), TAMANO_LOTE):
+            lote = {norm: grupos[norm] for norm in claves[i:i + TAMANO_LOTE]}
+            actualizadas, insertadas = _escribir_lote(cursor, lote)
+            resultado["actualizadas"] += actualizadas
+            resultado["insertadas"] += insertadas
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    segundos = time.monotonic() - inicio
+    resultado["segundos"] = round(segundos, 3)
+    resultado["filas_por_segundo"] = round(lineas / segundos) if segundos > 0 else lineas
+    return resultado
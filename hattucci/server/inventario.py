@@ -0,0 +1,229 @@
+# server/inventario.py
+# Caché de lecturas de /obtener_inventario con invalidación por versión.
+#
+# Todo lo que modifica la tabla inventario (registrar_inventario,
+# eliminar_inventario, descontar_stock, eliminar_compra) llama a
+# marcar_cambio() dentro de su transacción, que incrementa la versión
+# "inventario" en la tabla versiones. Las respuestas ya serializadas se
+# guardan con la versión en la clave, y la versión viaja al navegador como
+# ETag: si no cambió, la respuesta es un 304 sin cuerpo.
+#
+# Para no consultar la base en cada petición, cada worker recuerda la versión
+# durante INVENTARIO_VERSION_TTL segundos (por defecto 1; 0 = leerla siempre).
+# Un cambio hecho en otro worker se ve, como mucho, tras ese tiempo; el
+# worker que hizo el cambio lo ve de inmediato: publicar() (tras el commit)
+# deja en caché la versión nueva. No antes del commit: un lector que leyera la
+# versión en ese momento guardaría la anterior por todo el TTL. La versión en
+# caché solo avanza, así que tampoco la pisa un lector que leyó antes.
+#
+# Además, tras el commit cada escritor publica el cambio (eventos.py) para
+# que las cajas con ventas.html abierto refresquen el stock del producto
+# elegido si es uno de los que cambiaron (busqueda.py). Solo los nombres: la
+# caja muestra el stock sumado de todos los lotes y lo vuelve a pedir.
+#   cambio     {"productos": [...]}           lotes nuevos, repuestos, vendidos
+#                                             o borrados de esos productos
+#   recargar   {}                             no se sabe qué cambió: pedir todo
+# El broker es por proceso; los cambios hechos en otro worker se detectan por
+# la versión y se avisan con "recargar".
+#
+# Cada flujo abierto ocupa un hilo del worker hasta EVENTOS_DURACION segundos.
+# Como mucho EVENTOS_MAXIMO flujos por worker (gunicorn_conf.py lo ajusta a
+# una fracción de los hilos); los que pasan de ahí reciben 503 con
+# Retry-After y la caja vuelve a intentar más tarde, así siempre quedan hilos
+# para vender.
+import os
+import threading
+import time
+
+from hattucci.server import eventos
+from hattucci.server.cache import CacheLRU, incrementar_version, leer_version
+from hattucci.server.db import conexion
+from hattucci.server.paginacion import (
+    armar_where, codificar_cursor, decodificar_cursor, filtros_comunes, leer_limite,
+)
+
+VERSION = "inventario"
+TTL_VERSION = float(os.environ.get("INVENTARIO_VERSION_TTL", "1"))
+LATIDO = float(os.environ.get("EVENTOS_LATIDO", "15"))
+DURACION = float(os.environ.get("EVENTOS_DURACION", "300"))
+MAXIMO_FLUJOS = int(os.environ.get("EVENTOS_MAXIMO", "2"))
+REINTENTO = int(os.environ.get("EVENTOS_REINTENTO", "30"))  # segundos, en Retry-After
+
+_version = CacheLRU(maximo=1)
+_version_lock = threading.Lock()
+respuestas = CacheLRU(maximo=int(os.environ.get("INVENTARIO_CACHE", "128")))
+
+
+def marcar_cambio(cursor):
+    """Llamar dentro de la transacción que modifica el inventario.
+
+    Devuelve la nueva versión para pasarla a publicar() tras el commit sin
+    pedir otra conexión al pool (con el pool lleno eso se bloquea). Si no se
+    publica nada, pasarla a recordar_version() después del commit.
+    """
+    incrementar_version(cursor, VERSION)
+    return leer_version(cursor, VERSION)
+
+
+def version():
+    actual = version_en_cache()
+    if actual is None:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            actual = leer_version(cursor, VERSION)
+        recordar_version(actual)
+    return actual
+
+
+def version_en_cache():
+    return _version.get(VERSION)
+
+
+def recordar_version(actual):
+    if TTL_VERSION <= 0:
+        return
+    with _version_lock:
+        anterior = _version.get(VERSION)
+        if anterior is None or anterior < actual:
+            _version.set(VERSION, actual, ttl=TTL_VERSION)
+
+
+def etag(version_datos):
+    return f"inventario-{version_datos}"
+
+
+def clave(version_datos, args):
+    # Los mismos parámetros en otro orden dan la misma respuesta
+    return (version_datos, tuple(sorted(args.items(multi=True))))
+
+
+# ------------------------------------------
+# CONSULTA DE /obtener_inventario (la usan app.py y asgi.py)
+# ------------------------------------------
+def filtros(args):
+    """(condiciones, params, limite, todo); lanza ParametroInvalido o ValueError.
+
+    Parámetros:
+      todo=1          → lista completa sin paginar (comportamiento anterior)
+      cursor, limite  → paginación por id descendente
+      producto, vence_desde, vence_hasta, con_stock=1, stock_max → filtros
+    """
+    todo = args.get("todo") == "1"
+    condiciones, params = [], []
+    filtros_comunes(args, condiciones, params)
+
+    if args.get("con_stock") == "1":
+        condiciones.append("stock > 0")
+
+    if args.get("stock_max"):
+        condiciones.append("stock <= %s")
+        params.append(int(args["stock_max"]))
+
+    limite = None
+    if not todo:
+        limite = leer_limite(args)
+        if args.get("cursor"):
+            (ultimo_id,) = decodificar_cursor(args["cursor"], 1)
+            condiciones.append("id < %s")
+            params.append(int(ultimo_id))
+
+    return condiciones, params, limite, todo
+
+
+def sql_consulta(condiciones, params, limite):
+    sql = f"""
+        SELECT 
+            id,
+            producto,
+            fecha_vencimiento,
+            stock,
+            precio_venta
+        FROM inventario
+        {armar_where(condiciones)}
+        ORDER BY id DESC
+    """
+    params = list(params)
+    if limite:
+        sql += " LIMIT %s"
+        params.append(limite + 1)
+    return sql, tuple(params)
+
+
+def paginar(items, limite, todo):
+    if todo:
+        return items
+
+    siguiente = None
+    if len(items) > limite:
+        items = items[:limite]
+        siguiente = codificar_cursor(items[-1]["id"])
+
+    return {"items": items, "siguiente": siguiente}
+
+
+def consultar(condiciones, params, limite, todo):
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(*sql_consulta(condiciones, params, limite))
+        items = cursor.fetchall()
+    return paginar(items, limite, todo)
+
+
+# ------------------------------------------
+# CAMBIOS EN VIVO (SSE)
+# ------------------------------------------
+def publicar(tipo, datos, version_datos=None):
+    """Llamar después del commit. Un fallo aquí no debe deshacer la escritura."""
+    if version_datos is not None:
+        recordar_version(version_datos)
+    try:
+        datos["version"] = version_datos if version_datos is not None else version()
+        eventos.broker.publicar(tipo, datos)
+    except Exception as e:
+        print("❌ ERROR publicando cambio de inventario:", e)
+
+
+_flujos = threading.BoundedSemaphore(MAXIMO_FLUJOS)
+
+
+def abrir_flujo():
+    """Reserva un lugar para un flujo; False si ya hay EVENTOS_MAXIMO abiertos."""
+    return _flujos.acquire(blocking=False)
+
+
+def cerrar_flujo():
+    _flujos.release()
+
+
+def flujo(ultimo_id=None, duracion=DURACION, latido=LATIDO):
+    """Generador de texto text/event-stream.
+
+    Se corta tras `duracion` segundos para liberar el hilo; el navegador se
+    reconecta solo enviando Last-Event-ID y continúa donde quedó.
+    """
+    broker = eventos.broker
+    desde = broker.posicion(ultimo_id) if ultimo_id else None
+    vista = version()
+
+    yield "retry: 3000\n\n"
+    if desde is None:
+        desde = broker.ultimo()
+        # Primera conexión: "listo" indica que ya puede cargar la lista
+        yield eventos.formatear(broker.ident(desde), "recargar" if ultimo_id else "listo", {})
+
+    fin = time.monotonic() + duracion
+    while time.monotonic() < fin:
+        nuevos = broker.esperar(desde, min(latido, max(fin - time.monotonic(), 0)))
+        for numero, tipo, datos in nuevos:
+            desde = numero
+            vista = max(vista, datos.get("version", 0))
+            yield eventos.formatear(broker.ident(numero), tipo, datos)
+
+        if not nuevos:
+            actual = version()
+            if actual > vista:
+                # Cambió en otro worker: este broker no tiene el detalle
+                vista = actual
+                yield eventos.formatear(broker.ident(desde), "recargar", {})
+            else:
+                yield ": latido\n\n"
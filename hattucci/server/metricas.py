@@ -0,0 +1,268 @@
+# server/metricas.py
+# Métricas del proceso en formato de texto de Prometheus (/metrics).
+#
+#   http_peticion_segundos{ruta, metodo, estado}  latencia por ruta (histograma)
+#   db_consulta_segundos{consulta}                 tiempo por tipo de sentencia
+#   db_filas_total{consulta, tipo}                 filas leídas / afectadas
+#   db_conexion_espera_segundos                    tiempo para obtener conexión
+#   db_pool_conexiones{estado}                     estado del pool
+#
+# "consulta" es la forma de la sentencia (operación + tabla, p. ej.
+# "SELECT inventario"), no el SQL completo, para que las series no crezcan
+# sin límite. Las sentencias que tardan más de DB_LENTA_MS se registran en el
+# log con el SQL y la forma de los parámetros (tipos, nunca valores).
+#
+# La latencia de una respuesta en flujo (eventos SSE, exportaciones, PDF por
+# trozos) se mide hasta que termina de enviarse, no hasta los encabezados:
+# si no, esas rutas aparecerían casi en cero.
+#
+# Medir cuesta dos perf_counter() y un lock por sentencia. Las métricas son
+# de cada proceso: con varios workers cada uno expone las suyas.
+import logging
+import os
+import re
+import threading
+import time
+
+DB_LENTA = float(os.environ.get("DB_LENTA_MS", "200")) / 1000
+
+CUBOS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CUBOS_DB = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+log_sql = logging.getLogger("hattucci.sql")
+
+
+# ------------------------------------------
+# TIPOS DE MÉTRICA
+# ------------------------------------------
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores, extra=""):
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Contador:
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, valor=1, *etiquetas):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            for etiquetas, valor in sorted(self._valores.items()):
+                lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {valor}")
+        return lineas
+
+
+class Histograma:
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubos=CUBOS_HTTP):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.cubos = cubos
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                # [conteo por cubo..., suma, total]
+                serie = self._series[etiquetas] = [0] * (len(self.cubos) + 2)
+            for i, limite in enumerate(self.cubos):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def total(self):
+        """Observaciones registradas en todas las series."""
+        with self._lock:
+            return sum(serie[-1] for serie in self._series.values())
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        for etiquetas, serie in series:
+            acumulado = 0
+            for limite, conteo in zip(self.cubos, serie):
+                acumulado += conteo
+                le = _etiquetas(self.etiquetas, etiquetas, f'le="{limite}"')
+                lineas.append(f"{self.nombre}_bucket{le} {acumulado}")
+            le = _etiquetas(self.etiquetas, etiquetas, 'le="+Inf"')
+            lineas.append(f"{self.nombre}_bucket{le} {serie[-1]}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {serie[-2]}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {serie[-1]}")
+        return lineas
+
+
+peticiones = Histograma(
+    "http_peticion_segundos", "Latencia de las peticiones HTTP por ruta",
+    ("ruta", "metodo", "estado"), CUBOS_HTTP,
+)
+consultas = Histograma(
+    "db_consulta_segundos", "Tiempo de ejecución de sentencias SQL por forma",
+    ("consulta",), CUBOS_DB,
+)
+filas = Contador("db_filas_total", "Filas leídas o afectadas por forma de sentencia", ("consulta", "tipo"))
+espera_conexion = Histograma(
+    "db_conexion_espera_segundos", "Tiempo esperando una conexión del pool", (), CUBOS_DB,
+)
+lentas = Contador("db_consultas_lentas_total", "Sentencias más lentas que DB_LENTA_MS", ("consulta",))
+
+
+# ------------------------------------------
+# FORMA DE UNA SENTENCIA
+# ------------------------------------------
+_RE_TABLA = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)", re.IGNORECASE)
+_formas = {}
+
+
+def forma(sql):
+    """'SELECT inventario', 'INSERT compras', ... (en caché por texto SQL)."""
+    resultado = _formas.get(sql)
+    if resultado is None:
+        palabras = sql.split(None, 1)
+        operacion = palabras[0].upper() if palabras else "?"
+        tabla = _RE_TABLA.search(sql)
+        resultado = f"{operacion} {tabla.group(1)}" if tabla else operacion
+        if len(_formas) < 2000:
+            _formas[sql] = resultado
+    return resultado
+
+
+def _forma_params(params):
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(p).__name__ for p in params) + ")"
+
+
+# ------------------------------------------
+# CURSOR MEDIDO (lo usa ConexionPool.cursor)
+# ------------------------------------------
+class CursorMedido:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._forma = "?"
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        fila = self.fetchone()
+        while fila is not None:
+            yield fila
+            fila = self.fetchone()
+
+    def _medir(self, metodo, sql, params):
+        self._forma = forma(sql)
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, params)
+        finally:
+            duracion = time.perf_counter() - inicio
+            consultas.observar(duracion, self._forma)
+            if duracion >= DB_LENTA:
+                lentas.sumar(1, self._forma)
+                log_sql.warning("🐢 Consulta lenta (%.0f ms): %s params=%s",
+                                duracion * 1000, " ".join(sql.split())[:500], _forma_params(params))
+
+    def _afectadas(self):
+        # Las filas de un SELECT se cuentan al leerlas (fetch*)
+        if not self._forma.startswith("SELECT") and (self._cursor.rowcount or 0) > 0:
+            filas.sumar(self._cursor.rowcount, self._forma, "afectadas")
+
+    def execute(self, sql, params=None):
+        resultado = self._medir(self._cursor.execute, sql, params)
+        self._afectadas()
+        return resultado
+
+    def executemany(self, sql, params):
+        resultado = self._medir(self._cursor.executemany, sql, params)
+        self._afectadas()
+        return resultado
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            filas.sumar(1, self._forma, "leidas")
+        return fila
+
+    def fetchmany(self, size=1):
+        lote = self._cursor.fetchmany(size)
+        if lote:
+            filas.sumar(len(lote), self._forma, "leidas")
+        return lote
+
+    def fetchall(self):
+        todas = self._cursor.fetchall()
+        if todas:
+            filas.sumar(len(todas), self._forma, "leidas")
+        return todas
+
+
+# ------------------------------------------
+# FLASK
+# ------------------------------------------
+def instrumentar(app):
+    from flask import g, request
+
+    @app.before_request
+    def _inicio_peticion():
+        g._inicio_metricas = time.perf_counter()
+
+    @app.after_request
+    def _fin_peticion(respuesta):
+        inicio = g.pop("_inicio_metricas", None)
+        if inicio is None:
+            return respuesta
+
+        ruta = request.url_rule.rule if request.url_rule else "sin_ruta"
+        etiquetas = (ruta, request.method, respuesta.status_code)
+
+        def observar():
+            peticiones.observar(time.perf_counter() - inicio, *etiquetas)
+
+        if respuesta.is_streamed:
+            # El servidor la cierra después de enviar el último trozo
+            respuesta.call_on_close(observar)
+        else:
+            observar()
+        return respuesta
+
+
+def exponer(pool=None):
+    lineas = []
+    for metrica in (peticiones, consultas, filas, lentas, espera_conexion):
+        lineas.extend(metrica.exponer())
+
+    if pool:
+        lineas.append("# HELP db_pool_conexiones Conexiones del pool por estado")
+        lineas.append("# TYPE db_pool_conexiones gauge")
+        for estado in ("tamano", "abiertas", "libres", "prestadas", "esperando"):
+            lineas.append(f'db_pool_conexiones{{estado="{estado}"}} {pool[estado]}')
+        lineas.append("# HELP db_pool_eventos_total Conexiones creadas, descartadas y esperas agotadas")
+        lineas.append("# TYPE db_pool_eventos_total counter")
+        for evento in ("creadas", "descartadas", "esperas_agotadas"):
+            lineas.append(f'db_pool_eventos_total{{evento="{evento}"}} {pool[evento]}')
+
+    return "\n".join(lineas) + "\n"
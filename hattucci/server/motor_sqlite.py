@@ -0,0 +1,254 @@
+# server/motor_sqlite.py
+# Motor SQLite embebido para instalaciones de un solo local (DB_MOTOR=sqlite).
+#
+# El resto del servidor escribe SQL de MySQL; esta capa expone la misma
+# interfaz que mysql.connector (cursor(dictionary=True), rowcount, lastrowid,
+# commit, rollback, ping) y traduce el subconjunto del dialecto que se usa:
+#
+#   %s                                → ?
+#   INSERT IGNORE                     → INSERT OR IGNORE
+#   ON DUPLICATE KEY UPDATE c = VALUES(c)
+#                                     → ON CONFLICT DO UPDATE SET c = excluded.c
+#   x = LAST_INSERT_ID(expr)          → x = expr ... RETURNING x (→ lastrowid)
+#   SELECT ... FOR UPDATE             → BEGIN IMMEDIATE + SELECT
+#   DATE_FORMAT(valor, formato)       → función registrada en Python
+#
+# Un upsert de una sola fila devuelve rowcount 1 si insertó y 2 si actualizó,
+# igual que MySQL: primero INSERT OR IGNORE y, si la fila ya existía, el
+# upsert completo. Ambos corren con el lock de escritura tomado, así que
+# nadie puede insertar la fila entre uno y otro.
+#
+# Transacciones: las lecturas sueltas corren en autocommit y la primera
+# escritura abre BEGIN IMMEDIATE hasta commit()/rollback(). Con WAL los
+# lectores no bloquean al escritor ni al revés, y como el lock de escritura
+# se toma antes de escribir, un UPDATE nunca falla por "database is locked"
+# al querer subir de lectura a escritura (espera hasta DB_SQLITE_ESPERA).
+#
+# Las sentencias traducidas quedan en caché por texto y sqlite3 reutiliza las
+# sentencias preparadas (cached_statements).
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+ESPERA_MS = 5000
+SENTENCIAS_PREPARADAS = 256
+
+_ESCRITURAS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP")
+
+
+# ------------------------------------------
+# TIPOS (mismos tipos de Python que devuelve mysql.connector)
+# ------------------------------------------
+def _a_fecha(valor):
+    return date.fromisoformat(valor.decode()[:10])
+
+
+def _a_fecha_hora(valor):
+    return datetime.fromisoformat(valor.decode())
+
+
+def _a_decimal(valor):
+    return Decimal(valor.decode())
+
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_converter("DATE", _a_fecha)
+sqlite3.register_converter("DATETIME", _a_fecha_hora)
+sqlite3.register_converter("TIMESTAMP", _a_fecha_hora)
+sqlite3.register_converter("DECIMAL", _a_decimal)
+
+
+def _date_format(valor, formato):
+    if valor is None:
+        return None
+    # %i son los minutos en MySQL
+    return datetime.fromisoformat(str(valor)).strftime(formato.replace("%i", "%M"))
+
+
+# ------------------------------------------
+# TRADUCCIÓN DEL DIALECTO
+# ------------------------------------------
+_RE_ODKU = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_RE_VALUES_COL = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_RE_LAST_ID = re.compile(r"(\w+)\s*=\s*LAST_INSERT_ID\(([^()]*)\)\s*(,?)", re.IGNORECASE)
+_RE_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\s*$", re.IGNORECASE)
+_RE_UNA_FILA = re.compile(r"(?s).*\bVALUES\s*\([^()]*\)\s*")
+
+
+class Traduccion:
+
+    def __init__(self, sql):
+        sql = sql.strip()
+        self.escritura = sql.split(None, 1)[0].upper() in _ESCRITURAS
+        self.bloqueo = bool(_RE_FOR_UPDATE.search(sql))
+        sql = _RE_FOR_UPDATE.sub("", sql).replace("%s", "?")
+        sql = re.sub(r"^INSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.IGNORECASE)
+
+        # x = LAST_INSERT_ID(expr): el valor vuelve con RETURNING
+        self.devuelve = None
+        encontrado = _RE_LAST_ID.search(sql)
+        if encontrado:
+            columna, expresion, coma = encontrado.groups()
+            self.devuelve = columna
+            if expresion.strip() == columna:
+                reemplazo = ""  # id = LAST_INSERT_ID(id) no cambia nada
+            else:
+                reemplazo = f"{columna} = {expresion}{coma} "
+            sql = sql[:encontrado.start()] + reemplazo + sql[encontrado.end():]
+
+        # Upsert: solo el último ON CONFLICT puede ir sin columnas (SQLite 3.35+)
+        self.insertar_o_ignorar = None
+        partes = _RE_ODKU.split(sql, maxsplit=1)
+        if len(partes) == 2:
+            insercion, asignaciones = partes
+            asignaciones = _RE_VALUES_COL.sub(r"excluded.\1", asignaciones.strip())
+            sql = f"{insercion.rstrip()} ON CONFLICT DO UPDATE SET {asignaciones}"
+            if _RE_UNA_FILA.fullmatch(insercion):
+                self.insertar_o_ignorar = re.sub(r"^INSERT\b", "INSERT OR IGNORE", insercion.rstrip(),
+                                                 flags=re.IGNORECASE)
+
+        if self.devuelve:
+            sql += f" RETURNING {self.devuelve}"
+        self.sql = sql
+
+
+_traducciones = {}
+_traducciones_lock = threading.Lock()
+
+
+def traducir(sql):
+    t = _traducciones.get(sql)
+    if t is None:
+        t = Traduccion(sql)
+        with _traducciones_lock:
+            if len(_traducciones) < 2000:
+                _traducciones[sql] = t
+    return t
+
+
+# ------------------------------------------
+# CURSOR Y CONEXIÓN
+# ------------------------------------------
+def _fila_dict(cursor, fila):
+    return {d[0]: v for d, v in zip(cursor.description, fila)}
+
+
+class CursorSqlite:
+
+    def __init__(self, conexion, diccionario=False):
+        self._conexion = conexion
+        self._cursor = conexion._db.cursor()
+        if diccionario:
+            self._cursor.row_factory = _fila_dict
+        self.rowcount = -1
+        self.lastrowid = None
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, sql, params=None):
+        t = traducir(sql)
+        params = tuple(params or ())
+        if t.escritura or t.bloqueo:
+            self._conexion._empezar()
+
+        if t.insertar_o_ignorar:
+            self._cursor.execute(t.insertar_o_ignorar, params)
+            if self._cursor.rowcount == 1:
+                self.rowcount = 1
+                self.lastrowid = self._cursor.lastrowid
+                return
+            self._cursor.execute(t.sql, params)
+            if t.devuelve:
+                self._leer_devuelto()
+            self.rowcount = 2
+            return
+
+        self._cursor.execute(t.sql, params)
+        if t.devuelve:
+            self._leer_devuelto()
+        else:
+            self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+
+    def _leer_devuelto(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            self.lastrowid = fila[0] if isinstance(fila, tuple) else next(iter(fila.values()))
+        # Agotar el cursor para que la sentencia termine y rowcount sea el real
+        self._cursor.fetchall()
+
+    def executemany(self, sql, filas):
+        t = traducir(sql)
+        if t.escritura:
+            self._conexion._empezar()
+        self._cursor.executemany(t.sql, filas)
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSqlite:
+
+    unread_result = False
+
+    def __init__(self, ruta, espera_ms=ESPERA_MS):
+        self._db = sqlite3.connect(
+            ruta,
+            timeout=espera_ms / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,             # las transacciones las abre _empezar()
+            check_same_thread=False,          # el pool la presta a un hilo a la vez
+            cached_statements=SENTENCIAS_PREPARADAS,
+        )
+        self._db.execute(f"PRAGMA busy_timeout = {int(espera_ms)}")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+
+    def _empezar(self):
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN IMMEDIATE")
+
+    def cursor(self, dictionary=False, **kwargs):
+        return CursorSqlite(self, dictionary)
+
+    def commit(self):
+        if self._db.in_transaction:
+            self._db.execute("COMMIT")
+
+    def rollback(self):
+        if self._db.in_transaction:
+            self._db.execute("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        self._db.execute("SELECT 1").fetchone()
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self._db.close()
+
+
+def conectar(ruta, espera_ms=ESPERA_MS):
+    return ConexionSqlite(ruta, espera_ms)
@@ -0,0 +1,90 @@
+# server/paginacion.py
+# Paginación por cursor (keyset) y filtros comunes de los listados de
+# inventario y compras: el cursor opaco lleva la última clave vista y la
+# siguiente página sigue desde ahí con el índice, sin OFFSET.
+import base64
+import json
+from datetime import date, datetime, timedelta
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+# ------------------------------------------
+# CURSOR OPACO (keyset)
+# ------------------------------------------
+def codificar_cursor(*valores):
+    texto = json.dumps([str(v) if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, campos):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode("utf-8"))
+    except Exception:
+        raise ParametroInvalido("Cursor inválido")
+
+    if not isinstance(valores, list) or len(valores) != campos:
+        raise ParametroInvalido("Cursor inválido")
+    return valores
+
+
+# ------------------------------------------
+# PARÁMETROS DE CONSULTA
+# ------------------------------------------
+def leer_limite(args):
+    try:
+        limite = int(args.get("limite", LIMITE_DEFECTO))
+    except ValueError:
+        raise ParametroInvalido("limite debe ser un número")
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def leer_fecha(args, nombre):
+    valor = args.get(nombre)
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        raise ParametroInvalido(f"{nombre} debe tener formato AAAA-MM-DD")
+
+
+def rango_dia(valor):
+    """'AAAA-MM-DD' → (inicio, fin) para filtrar con col >= inicio AND col < fin.
+
+    Así la columna queda sin envolver en DATE() y se puede usar su índice.
+    """
+    try:
+        inicio = date.fromisoformat(str(valor)[:10])
+    except ValueError:
+        raise ParametroInvalido("La fecha debe tener formato AAAA-MM-DD")
+    return inicio, inicio + timedelta(days=1)
+
+
+def filtros_comunes(args, condiciones, params):
+    """Agrega a la consulta los filtros de producto y rango de vencimiento."""
+    producto = (args.get("producto") or "").strip()
+    if producto:
+        condiciones.append("producto LIKE %s")
+        params.append(f"%{producto}%")
+
+    desde = leer_fecha(args, "vence_desde")
+    if desde:
+        condiciones.append("fecha_vencimiento >= %s")
+        params.append(desde)
+
+    # Rango semiabierto: incluye todo el día "hasta"
+    hasta = leer_fecha(args, "vence_hasta")
+    if hasta:
+        condiciones.append("fecha_vencimiento < %s")
+        params.append(hasta + timedelta(days=1))
+
+
+def armar_where(condiciones):
+    return ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
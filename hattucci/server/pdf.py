@@ -0,0 +1,312 @@
+# server/pdf.py
+# Reportes en PDF generados en el servidor con reportlab.
+#
+# Las filas se leen por lotes con un cursor sin buffer y se dibujan página a
+# página; cada página se comprime al cerrarla, así que la memoria no crece
+# con el número de movimientos. reportlab arma la tabla de referencias del
+# PDF recién en save(), por eso el documento se escribe a un archivo y luego
+# se envía por trozos.
+#
+# Los PDF de días (o rangos) ya cerrados se guardan en disco con la versión
+# de datos en el nombre; si alguien modifica un día pasado cambia la versión
+# y el PDF se vuelve a generar. Cada vez que se guarda uno se borran los de
+# versiones anteriores (ya no se van a pedir), los ".parcial" que dejó un
+# worker interrumpido y, si quedan más de PDF_CACHE_MAXIMO, los más viejos.
+import os
+import re
+import tempfile
+import time
+from datetime import date
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from hattucci.server import resumen
+from hattucci.server.cache import leer_version
+from hattucci.server.db import conexion
+
+CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "hattucci_pdf"))
+LOGO = os.path.join(os.path.dirname(__file__), "..", "web", "static", "img", "logo.jpg")
+TAMANO_LOTE = 500
+TAMANO_TROZO = 64 * 1024
+MAXIMO_CACHE = int(os.environ.get("PDF_CACHE_MAXIMO", "200"))
+EDAD_PARCIAL = 3600  # segundos; ningún PDF tarda tanto en generarse
+
+ANCHO, ALTO = A4
+MARGEN = 40
+ALTO_FILA = 16
+AMARILLO = (0.96, 0.91, 0.12)  # amarillo del logo
+
+_logo = None
+
+
+def _imagen_logo():
+    global _logo
+    if _logo is None and os.path.exists(LOGO):
+        _logo = ImageReader(LOGO)
+    return _logo
+
+
+# ------------------------------------------
+# DIBUJO DE TABLAS PAGINADAS
+# ------------------------------------------
+class Documento:
+
+    def __init__(self, destino, titulo, subtitulo):
+        self.c = canvas.Canvas(destino, pagesize=A4, pageCompression=1)
+        self.c.setTitle(titulo)
+        self.titulo = titulo
+        self.subtitulo = subtitulo
+        self.pagina = 0
+        self.columnas = None
+        self._nueva_pagina()
+
+    def _nueva_pagina(self):
+        if self.pagina:
+            self.c.showPage()
+        self.pagina += 1
+        self.y = ALTO - MARGEN
+
+        if self.pagina == 1:
+            logo = _imagen_logo()
+            if logo:
+                self.c.drawImage(logo, MARGEN, self.y - 60, width=60, height=60, preserveAspectRatio=True)
+            self.c.setFont("Helvetica-Bold", 14)
+            self.c.drawCentredString(ANCHO / 2, self.y - 20, self.titulo)
+            self.c.setFont("Helvetica", 11)
+            self.c.drawCentredString(ANCHO / 2, self.y - 38, self.subtitulo)
+            self.y -= 80
+
+        self.c.setFont("Helvetica", 8)
+        self.c.drawRightString(ANCHO - MARGEN, MARGEN / 2, f"Página {self.pagina}")
+
+        if self.columnas:
+            self._cabecera()
+
+    def _espacio(self, alto):
+        if self.y - alto < MARGEN:
+            self._nueva_pagina()
+
+    def seccion(self, texto):
+        self.columnas = None
+        self._espacio(ALTO_FILA * 3)
+        self.c.setFillColorRGB(*AMARILLO)
+        self.c.rect(MARGEN, self.y - ALTO_FILA, ANCHO - 2 * MARGEN, ALTO_FILA, fill=1, stroke=1)
+        self.c.setFillColorRGB(0, 0, 0)
+        self.c.setFont("Helvetica-Bold", 10)
+        self.c.drawString(MARGEN + 4, self.y - ALTO_FILA + 4, texto)
+        self.y -= ALTO_FILA + 6
+
+    def tabla(self, columnas):
+        # columnas: [(título, ancho relativo, alineación "l" | "r")]
+        total = sum(c[1] for c in columnas)
+        util = ANCHO - 2 * MARGEN
+        x = MARGEN
+        self.columnas = []
+        for titulo, ancho, alinear in columnas:
+            w = util * ancho / total
+            self.columnas.append((titulo, x, w, alinear))
+            x += w
+        self._espacio(ALTO_FILA * 2)
+        self._cabecera()
+
+    def _cabecera(self):
+        self.c.setFont("Helvetica-Bold", 9)
+        self._celdas([t for t, _, _, _ in self.columnas])
+        self.c.line(MARGEN, self.y + 3, ANCHO - MARGEN, self.y + 3)
+        self.c.setFont("Helvetica", 9)
+
+    def _celdas(self, valores):
+        base = self.y - ALTO_FILA + 4
+        for valor, (_, x, w, alinear) in zip(valores, self.columnas):
+            texto = str(valor)
+            if alinear == "r":
+                self.c.drawRightString(x + w - 4, base, texto)
+            else:
+                self.c.drawString(x + 4, base, texto[:60])
+        self.y -= ALTO_FILA
+
+    def fila(self, *valores):
+        self._espacio(ALTO_FILA)
+        self._celdas(valores)
+
+    def linea(self, etiqueta, valor):
+        self._espacio(ALTO_FILA)
+        self.c.setFont("Helvetica-Bold", 10)
+        self.c.drawString(MARGEN + 4, self.y - ALTO_FILA + 4, etiqueta)
+        self.c.setFont("Helvetica", 10)
+        self.c.drawRightString(ANCHO - MARGEN - 4, self.y - ALTO_FILA + 4, valor)
+        self.y -= ALTO_FILA
+
+    def guardar(self):
+        self.c.save()
+
+
+def _soles(valor):
+    return f"S/ {float(valor):,.2f}"
+
+
+# ------------------------------------------
+# CONTENIDO
+# ------------------------------------------
+def _movimientos(cursor, fecha):
+    """Ventas y compras del día, leídas por lotes."""
+    inicio, fin = fecha, date.fromordinal(fecha.toordinal() + 1)
+    consultas = [
+        ("SELECT 'VENTA', producto, cantidad, total FROM ventas "
+         "WHERE fecha_venta >= %s AND fecha_venta < %s ORDER BY fecha_venta"),
+        ("SELECT 'COMPRA', producto, cantidad, cantidad * precio_unitario FROM compras "
+         "WHERE fecha_registro >= %s AND fecha_registro < %s ORDER BY fecha_registro"),
+    ]
+    for sql in consultas:
+        cursor.execute(sql, (inicio, fin))
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            yield from lote
+
+
+def escribir_pdf_dia(fecha, destino):
+    doc = Documento(destino, "REPORTE GENERAL - HATTUCCI", f"Fecha: {fecha.isoformat()}")
+
+    with conexion() as conn:
+        cursor = conn.cursor()
+        doc.seccion("MOVIMIENTOS DEL DÍA")
+        doc.tabla([("Tipo", 1, "l"), ("Producto", 3, "l"), ("Cantidad", 1, "r"), ("Total (S/)", 1.3, "r")])
+        for tipo, producto, cantidad, total in _movimientos(cursor, fecha):
+            doc.fila(tipo, producto, cantidad, _soles(total))
+        cursor.close()
+
+        cursor = conn.cursor(dictionary=True)
+        totales = resumen.totales_dia(cursor, fecha)
+
+    total_ventas = totales["ventas"]["total_ventas"]
+    total_compras = totales["compras"]["total_compras"]
+
+    doc.seccion("RESUMEN")
+    doc.linea("Total Ventas:", _soles(total_ventas))
+    doc.linea("Total Compras:", _soles(total_compras))
+    doc.linea("Ganancia / Pérdida:", _soles(total_ventas - total_compras))
+    doc.guardar()
+
+
+def escribir_pdf_rango(desde, hasta, agrupar, destino):
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        reporte = resumen.reporte_rango(cursor, desde, hasta, agrupar)
+
+    doc = Documento(destino, "REPORTE POR RANGO - HATTUCCI",
+                    f"Del {desde.isoformat()} al {hasta.isoformat()} (por {agrupar})")
+    doc.seccion("TOTALES POR PERIODO" if agrupar != "producto" else "TOTALES POR PRODUCTO")
+    doc.tabla([("Periodo", 2, "l"), ("Ventas", 1, "r"), ("Compras", 1, "r"), ("Ganancia", 1, "r")])
+    for p in reporte["periodos"]:
+        doc.fila(p["periodo"], _soles(p["ventas"]), _soles(p["compras"]), _soles(p["ganancia"]))
+
+    t = reporte["totales"]
+    doc.seccion("RESUMEN")
+    doc.linea("Total Ventas:", _soles(t["ventas"]))
+    doc.linea("Total Compras:", _soles(t["compras"]))
+    doc.linea("Ganancia / Pérdida:", _soles(t["ganancia"]))
+    doc.guardar()
+
+
+# ------------------------------------------
+# CACHÉ EN DISCO
+# ------------------------------------------
+def _version_cerrados():
+    with conexion() as conn:
+        cursor = conn.cursor()
+        return leer_version(cursor, resumen.VERSION_CERRADOS)
+
+
+_RE_CACHEADO = re.compile(r".+_v(\d+)\.pdf")
+
+
+def _limpiar_cache(version):
+    """Borra lo que ya no se va a servir. Un worker que esté enviando un
+    archivo borrado lo termina de leer igual (el sistema lo libera al cerrarlo)."""
+    vigentes = []
+    ahora = time.time()
+    try:
+        entradas = list(os.scandir(CACHE_DIR))
+    except OSError:
+        return
+
+    for entrada in entradas:
+        try:
+            if entrada.name.endswith(".parcial"):
+                borrar = ahora - entrada.stat().st_mtime > EDAD_PARCIAL
+            else:
+                cacheado = _RE_CACHEADO.fullmatch(entrada.name)
+                if not cacheado:
+                    continue
+                borrar = int(cacheado.group(1)) != version
+                if not borrar:
+                    vigentes.append((entrada.stat().st_mtime, entrada.path))
+            if borrar:
+                os.unlink(entrada.path)
+        except FileNotFoundError:
+            pass  # otro worker lo borró primero
+
+    vigentes.sort()
+    for _, ruta in vigentes[:max(len(vigentes) - MAXIMO_CACHE, 0)]:
+        try:
+            os.unlink(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def obtener_pdf(nombre, cerrado, escribir):
+    """Devuelve (ruta, temporal). Si temporal es True hay que borrar el archivo al enviarlo."""
+    if cerrado:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        version = _version_cerrados()
+        ruta = os.path.join(CACHE_DIR, f"{nombre}_v{version}.pdf")
+        if os.path.exists(ruta):
+            return ruta, False
+
+        # Escribir en un temporal y renombrar: otro worker nunca ve un PDF a medias
+        fd, parcial = tempfile.mkstemp(dir=CACHE_DIR, suffix=".parcial")
+        os.close(fd)
+        try:
+            escribir(parcial)
+            os.replace(parcial, ruta)
+        except Exception:
+            os.unlink(parcial)
+            raise
+        _limpiar_cache(version)
+        return ruta, False
+
+    fd, ruta = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        escribir(ruta)
+    except Exception:
+        os.unlink(ruta)
+        raise
+    return ruta, True
+
+
+def pdf_dia(fecha):
+    return obtener_pdf(f"dia_{fecha.isoformat()}", fecha < date.today(),
+                       lambda destino: escribir_pdf_dia(fecha, destino))
+
+
+def pdf_rango(desde, hasta, agrupar):
+    return obtener_pdf(f"rango_{desde.isoformat()}_{hasta.isoformat()}_{agrupar}", hasta < date.today(),
+                       lambda destino: escribir_pdf_rango(desde, hasta, agrupar, destino))
+
+
+def leer_por_trozos(ruta, borrar=False):
+    try:
+        with open(ruta, "rb") as f:
+            while True:
+                trozo = f.read(TAMANO_TROZO)
+                if not trozo:
+                    break
+                yield trozo
+    finally:
+        if borrar:
+            os.unlink(ruta)
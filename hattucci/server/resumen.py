@@ -0,0 +1,368 @@
+# server/resumen.py
+# Resumen diario por producto (tabla resumen_diario).
+#
+# Se mantiene de forma incremental dentro de la misma transacción que
+# descontar_stock, registrar_compra y eliminar_compra; los reportes leen de
+# aquí en lugar de sumar ventas y compras fila por fila.
+#
+#   python -m hattucci.server.resumen reconstruir [desde] [hasta]
+import sys
+from datetime import date, timedelta
+
+from hattucci.server.cache import CacheLRU, incrementar_version, leer_version
+from hattucci.server.db import conexion
+
+AGRUPACIONES = ("dia", "semana", "mes", "producto")
+
+# Los días ya cerrados solo cambian si se registra o elimina una compra con
+# fecha pasada; en ese caso se incrementa esta versión y la caché se renueva.
+VERSION_CERRADOS = "resumen_cerrado"
+_cache_rangos = CacheLRU(maximo=128)
+
+_INSERTAR = """
+    INSERT INTO resumen_diario
+        (fecha, producto, unidades_vendidas, ingresos, num_ventas,
+         unidades_compradas, costo_compras, num_compras)
+    VALUES {valores}
+"""
+_ACUMULAR = """
+    ON DUPLICATE KEY UPDATE
+        unidades_vendidas = unidades_vendidas + VALUES(unidades_vendidas),
+        ingresos = ingresos + VALUES(ingresos),
+        num_ventas = num_ventas + VALUES(num_ventas),
+        unidades_compradas = unidades_compradas + VALUES(unidades_compradas),
+        costo_compras = costo_compras + VALUES(costo_compras),
+        num_compras = num_compras + VALUES(num_compras)
+"""
+_SUMAR = _INSERTAR.format(valores="(%s, %s, %s, %s, %s, %s, %s, %s)") + _ACUMULAR
+
+
+# ------------------------------------------
+# MANTENIMIENTO INCREMENTAL (usa el cursor de la transacción en curso)
+# ------------------------------------------
+def _como_fecha(fecha):
+    return fecha if isinstance(fecha, date) else date.fromisoformat(str(fecha)[:10])
+
+
+def _sumar(cursor, fecha, producto, *valores):
+    fecha = _como_fecha(fecha)
+    cursor.execute(_SUMAR, (fecha, producto, *valores))
+    if fecha < date.today():
+        incrementar_version(cursor, VERSION_CERRADOS)
+
+
+def sumar_venta(cursor, fecha, producto, cantidad, total):
+    _sumar(cursor, fecha, producto, cantidad, total, 1, 0, 0, 0)
+
+
+def sumar_ventas(cursor, fecha, items):
+    """Todos los productos de un carrito en un único upsert multi-fila."""
+    por_producto = {}
+    for item in items:
+        acumulado = por_producto.setdefault(item["nombre"], [0, 0.0, 0])
+        acumulado[0] += item["cantidad"]
+        acumulado[1] += item["total"]
+        acumulado[2] += 1
+
+    valores = ", ".join(["(%s, %s, %s, %s, %s, 0, 0, 0)"] * len(por_producto))
+    params = []
+    for producto, (cantidad, total, filas) in por_producto.items():
+        params.extend([fecha, producto, cantidad, total, filas])
+
+    cursor.execute(_INSERTAR.format(valores=valores) + _ACUMULAR, tuple(params))
+
+
+def sumar_compra(cursor, fecha, producto, cantidad, costo, nueva=True):
+    # Si la compra se fusionó con una existente no hay fila nueva que contar
+    _sumar(cursor, fecha, producto, 0, 0, 0, cantidad, costo, 1 if nueva else 0)
+
+
+def sumar_compras(cursor, filas):
+    """filas: [(fecha, producto, cantidad, costo, compras_nuevas)] en un único upsert."""
+    por_clave = {}
+    for fecha, producto, cantidad, costo, nuevas in filas:
+        acumulado = por_clave.setdefault((_como_fecha(fecha), producto), [0, 0, 0])
+        acumulado[0] += cantidad
+        acumulado[1] += costo
+        acumulado[2] += nuevas
+    if not por_clave:
+        return
+
+    valores = ", ".join(["(%s, %s, 0, 0, 0, %s, %s, %s)"] * len(por_clave))
+    params = []
+    for (fecha, producto), (cantidad, costo, nuevas) in por_clave.items():
+        params.extend([fecha, producto, cantidad, costo, nuevas])
+
+    cursor.execute(_INSERTAR.format(valores=valores) + _ACUMULAR, tuple(params))
+    if min(fecha for fecha, _ in por_clave) < date.today():
+        incrementar_version(cursor, VERSION_CERRADOS)
+
+
+def restar_compra(cursor, fecha, producto, cantidad, costo):
+    _sumar(cursor, fecha, producto, 0, 0, 0, -cantidad, -costo, -1)
+
+
+# ------------------------------------------
+# LECTURA PARA REPORTES
+# ------------------------------------------
+# Las consultas van aparte de las funciones para que asgi.py las ejecute con
+# su conexión asíncrona y arme el resultado con las mismas funciones.
+SQL_TOTALES_DIA = """
+    SELECT
+        COALESCE(SUM(ingresos), 0) AS total_ventas,
+        COALESCE(SUM(unidades_vendidas), 0) AS productos_vendidos,
+        COALESCE(SUM(num_ventas), 0) AS num_ventas,
+        COALESCE(SUM(costo_compras), 0) AS total_compras,
+        COALESCE(SUM(num_compras), 0) AS num_compras
+    FROM resumen_diario
+    WHERE fecha = %s
+"""
+SQL_MOVIMIENTOS_DIA = """
+    SELECT producto, unidades_vendidas, ingresos, unidades_compradas, costo_compras
+    FROM resumen_diario
+    WHERE fecha = %s
+    ORDER BY producto
+"""
+SQL_VENTAS_DETALLE = """
+    SELECT 
+        'VENTA' AS tipo,
+        producto,
+        cantidad,
+        total,
+        fecha_venta AS fecha
+    FROM ventas
+    WHERE fecha_venta >= %s AND fecha_venta < %s
+"""
+SQL_COMPRAS_DETALLE = """
+    SELECT 
+        'COMPRA' AS tipo,
+        producto,
+        cantidad,
+        (cantidad * precio_unitario) AS total,
+        fecha_registro AS fecha
+    FROM compras
+    WHERE fecha_registro >= %s AND fecha_registro < %s
+"""
+
+
+def totales_dia(cursor, fecha):
+    cursor.execute(SQL_TOTALES_DIA, (fecha,))
+    return armar_totales(cursor.fetchone())
+
+
+def armar_totales(fila):
+    return {
+        "ventas": {
+            "total_ventas": float(fila["total_ventas"]),
+            "productos_vendidos": int(fila["productos_vendidos"]),
+            "num_ventas": int(fila["num_ventas"]),
+        },
+        "compras": {
+            "total_compras": float(fila["total_compras"]),
+            "num_compras": int(fila["num_compras"]),
+        },
+    }
+
+
+def movimientos_dia(cursor, fecha):
+    """Movimientos del día (date) agrupados por producto (una fila por tipo y producto)."""
+    cursor.execute(SQL_MOVIMIENTOS_DIA, (fecha,))
+    return armar_movimientos(cursor.fetchall(), fecha.isoformat())
+
+
+def armar_movimientos(filas, fecha):
+    movimientos = []
+    for fila in filas:
+        if fila["unidades_vendidas"]:
+            movimientos.append({
+                "tipo": "VENTA",
+                "producto": fila["producto"],
+                "cantidad": int(fila["unidades_vendidas"]),
+                "total": float(fila["ingresos"]),
+                "fecha": fecha,
+            })
+        if fila["unidades_compradas"]:
+            movimientos.append({
+                "tipo": "COMPRA",
+                "producto": fila["producto"],
+                "cantidad": int(fila["unidades_compradas"]),
+                "total": float(fila["costo_compras"]),
+                "fecha": fecha,
+            })
+    return movimientos
+
+
+def movimientos_detalle(cursor, rango):
+    """Una fila por venta y por compra del día (rango = paginacion.rango_dia)."""
+    cursor.execute(SQL_VENTAS_DETALLE, rango)
+    ventas = cursor.fetchall()
+    cursor.execute(SQL_COMPRAS_DETALLE, rango)
+    compras = cursor.fetchall()
+    return ventas + compras
+
+
+def balance_dia(totales, movimientos):
+    """Cuerpo de /obtener_movimientos_dia: movimientos + ganancia o pérdida."""
+    total_ventas = totales["ventas"]["total_ventas"]
+    total_compras = totales["compras"]["total_compras"]
+    return {
+        "movimientos": movimientos,
+        "totalVentas": total_ventas,
+        "totalCompras": total_compras,
+        "ganancia": total_ventas - total_compras,
+    }
+
+
+# ------------------------------------------
+# REPORTE POR RANGO (día / semana / mes / producto)
+# ------------------------------------------
+def _periodo(fecha, agrupar):
+    if agrupar == "semana":
+        inicio = fecha - timedelta(days=fecha.weekday())
+        anio, semana, _ = fecha.isocalendar()
+        return f"{anio}-S{semana:02d}", inicio, inicio + timedelta(days=6)
+    if agrupar == "mes":
+        inicio = fecha.replace(day=1)
+        fin = (inicio + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return fecha.strftime("%Y-%m"), inicio, fin
+    return fecha.isoformat(), fecha, fecha
+
+
+def _fila_vacia(periodo, inicio=None, fin=None):
+    return {
+        "periodo": periodo,
+        "inicio": inicio.isoformat() if inicio else None,
+        "fin": fin.isoformat() if fin else None,
+        "unidades_vendidas": 0,
+        "ventas": 0.0,
+        "num_ventas": 0,
+        "unidades_compradas": 0,
+        "compras": 0.0,
+        "num_compras": 0,
+    }
+
+
+def _acumular(destino, fila):
+    destino["unidades_vendidas"] += int(fila["unidades_vendidas"])
+    destino["ventas"] += float(fila["ingresos"])
+    destino["num_ventas"] += int(fila["num_ventas"])
+    destino["unidades_compradas"] += int(fila["unidades_compradas"])
+    destino["compras"] += float(fila["costo_compras"])
+    destino["num_compras"] += int(fila["num_compras"])
+
+
+def _calcular_rango(cursor, desde, hasta, agrupar):
+    # Una sola consulta: por producto, o por día (semanas y meses se pliegan aquí,
+    # son a lo sumo unas cientos de filas)
+    clave = "producto" if agrupar == "producto" else "fecha"
+    cursor.execute(f"""
+        SELECT
+            {clave} AS clave,
+            SUM(unidades_vendidas) AS unidades_vendidas,
+            SUM(ingresos) AS ingresos,
+            SUM(num_ventas) AS num_ventas,
+            SUM(unidades_compradas) AS unidades_compradas,
+            SUM(costo_compras) AS costo_compras,
+            SUM(num_compras) AS num_compras
+        FROM resumen_diario
+        WHERE fecha >= %s AND fecha <= %s
+        GROUP BY {clave}
+        ORDER BY {clave}
+    """, (desde, hasta))
+
+    periodos = {}
+    totales = _fila_vacia("total", desde, hasta)
+
+    for fila in cursor.fetchall():
+        if agrupar == "producto":
+            nombre, inicio, fin = fila["clave"], desde, hasta
+        else:
+            nombre, inicio, fin = _periodo(_como_fecha(fila["clave"]), agrupar)
+
+        if nombre not in periodos:
+            periodos[nombre] = _fila_vacia(nombre, inicio, fin)
+        _acumular(periodos[nombre], fila)
+        _acumular(totales, fila)
+
+    for p in list(periodos.values()) + [totales]:
+        p["ganancia"] = p["ventas"] - p["compras"]
+
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "agrupar": agrupar,
+        "periodos": list(periodos.values()),
+        "totales": totales,
+    }
+
+
+def reporte_rango(cursor, desde, hasta, agrupar="dia"):
+    """Totales y ganancia agrupados; los rangos ya cerrados se sirven de caché."""
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f"agrupar debe ser uno de: {', '.join(AGRUPACIONES)}")
+
+    if hasta >= date.today():
+        return _calcular_rango(cursor, desde, hasta, agrupar)
+
+    version = leer_version(cursor, VERSION_CERRADOS)
+    clave = (desde, hasta, agrupar)
+    guardado = _cache_rangos.get(clave)
+    if guardado and guardado[0] == version:
+        return guardado[1]
+
+    resultado = _calcular_rango(cursor, desde, hasta, agrupar)
+    _cache_rangos.set(clave, (version, resultado))
+    return resultado
+
+
+# ------------------------------------------
+# RECONSTRUCCIÓN (backfill)
+# ------------------------------------------
+def reconstruir(desde=None, hasta=None):
+    """Recalcula el resumen desde ventas y compras para el rango [desde, hasta]."""
+    rango_resumen, rango_ventas, rango_compras, params = "", "", "", ()
+    if desde and hasta:
+        fin = hasta + timedelta(days=1)
+        rango_resumen = "WHERE fecha >= %s AND fecha < %s"
+        rango_ventas = "WHERE fecha_venta >= %s AND fecha_venta < %s"
+        rango_compras = "WHERE fecha_registro >= %s AND fecha_registro < %s"
+        params = (desde, fin)
+
+    with conexion() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(f"DELETE FROM resumen_diario {rango_resumen}", params)
+
+        cursor.execute(f"""
+            INSERT INTO resumen_diario (fecha, producto, unidades_vendidas, ingresos, num_ventas)
+            SELECT DATE(fecha_venta), producto, SUM(cantidad), SUM(total), COUNT(*)
+            FROM ventas
+            {rango_ventas}
+            GROUP BY DATE(fecha_venta), producto
+        """, params)
+
+        cursor.execute(f"""
+            INSERT INTO resumen_diario (fecha, producto, unidades_compradas, costo_compras, num_compras)
+            SELECT DATE(fecha_registro), producto, SUM(cantidad), SUM(cantidad * precio_unitario), COUNT(*)
+            FROM compras
+            {rango_compras}
+            GROUP BY DATE(fecha_registro), producto
+            ON DUPLICATE KEY UPDATE
+                unidades_compradas = VALUES(unidades_compradas),
+                costo_compras = VALUES(costo_compras),
+                num_compras = VALUES(num_compras)
+        """, params)
+
+        incrementar_version(cursor, VERSION_CERRADOS)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "reconstruir":
+        print("Uso: python -m hattucci.server.resumen reconstruir [desde AAAA-MM-DD] [hasta AAAA-MM-DD]")
+        sys.exit(2)
+
+    desde = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    hasta = date.fromisoformat(sys.argv[3]) if len(sys.argv) > 3 else desde
+    reconstruir(desde, hasta)
+    print("✅ Resumen diario reconstruido", f"({desde} → {hasta})" if desde else "(completo)")
@@ -0,0 +1,491 @@
+# server/schema.py
+# Esquema versionado de la base de datos.
+#
+#   python -m hattucci.server.schema migrar     → aplica las migraciones pendientes
+#   python -m hattucci.server.schema verificar  → EXPLAIN de las consultas críticas
+#
+# Cada migración es una función que recibe un cursor; la versión aplicada
+# queda guardada en la tabla schema_version.
+#
+# Con DB_MOTOR=sqlite la base nueva se crea de una vez con el esquema de la
+# versión 6 (_sqlite_base); las migraciones posteriores corren en ambos motores.
+import sys
+from datetime import date, timedelta
+
+from hattucci.server import db
+from hattucci.server.db import conexion
+
+
+# ------------------------------------------
+# UTILIDADES
+# ------------------------------------------
+def _existe_indice(cursor, tabla, nombre):
+    if db.MOTOR == "sqlite":
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+            (tabla, nombre)
+        )
+        return cursor.fetchone() is not None
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (tabla, nombre))
+    return cursor.fetchone() is not None
+
+
+def _existe_columna(cursor, tabla, columna):
+    if db.MOTOR == "sqlite":
+        cursor.execute(f"SELECT 1 FROM pragma_table_xinfo('{tabla}') WHERE name = %s", (columna,))
+        return cursor.fetchone() is not None
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (tabla, columna))
+    return cursor.fetchone() is not None
+
+
+def _borrar_indice(cursor, tabla, nombre):
+    if _existe_indice(cursor, tabla, nombre):
+        if db.MOTOR == "sqlite":
+            cursor.execute(f"DROP INDEX {nombre}")
+        else:
+            cursor.execute(f"DROP INDEX {nombre} ON {tabla}")
+
+
+def _crear_indice(cursor, tabla, nombre, columnas, unico=False):
+    # MySQL no tiene CREATE INDEX IF NOT EXISTS
+    if _existe_indice(cursor, tabla, nombre):
+        return
+    tipo = "UNIQUE INDEX" if unico else "INDEX"
+    cursor.execute(f"CREATE {tipo} {nombre} ON {tabla} ({columnas})")
+
+
+# ------------------------------------------
+# MIGRACIONES
+# ------------------------------------------
+def _v1_tablas(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registro (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            usuario VARCHAR(50) NOT NULL,
+            correo VARCHAR(100) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            telefono VARCHAR(20) NOT NULL,
+            contraseña VARCHAR(255) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventario (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            producto VARCHAR(150) NOT NULL,
+            fecha_vencimiento DATE NOT NULL,
+            stock INT NOT NULL DEFAULT 0,
+            precio_venta DECIMAL(10, 2) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS compras (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nombre_proveedor VARCHAR(100) NOT NULL,
+            contacto_proveedor VARCHAR(100) NOT NULL,
+            producto VARCHAR(150) NOT NULL,
+            cantidad INT NOT NULL,
+            precio_unitario DECIMAL(10, 2) NOT NULL,
+            fecha_registro DATETIME NOT NULL,
+            fecha_vencimiento DATE NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            producto VARCHAR(150) NOT NULL,
+            cantidad INT NOT NULL,
+            total DECIMAL(10, 2) NOT NULL,
+            fecha_venta DATETIME NOT NULL,
+            numero_boleta INT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS boletas_correlativo (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            numero INT NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _v2_indices(cursor):
+    # /verificar, /validar_usuario_login, /ingresar
+    _crear_indice(cursor, "registro", "idx_registro_usuario", "usuario")
+    _crear_indice(cursor, "registro", "idx_registro_correo", "correo")
+
+    # registrar_inventario (producto + fecha + precio), inventario_por_producto,
+    # compras_disponibles y eliminar_compra (producto + fecha)
+    _crear_indice(cursor, "inventario", "idx_inventario_producto_venc",
+                  "producto, fecha_vencimiento, precio_venta")
+    # Alertas de vencimiento y filtros vence_desde / vence_hasta
+    _crear_indice(cursor, "inventario", "idx_inventario_venc", "fecha_vencimiento")
+
+    # filtrar_compras_dia, reportes, paginación (fecha_registro DESC, id DESC)
+    _crear_indice(cursor, "compras", "idx_compras_registro", "fecha_registro, id")
+    # Búsqueda de compra idéntica en registrar_compra
+    _crear_indice(cursor, "compras", "idx_compras_producto",
+                  "producto, nombre_proveedor, contacto_proveedor, fecha_registro")
+
+    # Reportes y exportación por rango de fechas
+    _crear_indice(cursor, "ventas", "idx_ventas_fecha", "fecha_venta")
+
+
+def _v3_resumen_diario(cursor):
+    # Mantenida por hattucci.server.resumen; backfill con "resumen reconstruir"
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_diario (
+            fecha DATE NOT NULL,
+            producto VARCHAR(150) NOT NULL,
+            unidades_vendidas INT NOT NULL DEFAULT 0,
+            ingresos DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            num_ventas INT NOT NULL DEFAULT 0,
+            unidades_compradas INT NOT NULL DEFAULT 0,
+            costo_compras DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            num_compras INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, producto)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _v4_versiones(cursor):
+    # Contadores que los escritores incrementan para invalidar cachés (ver cache.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versiones (
+            nombre VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB
+    """)
+
+
+def _v5_secuencias(cursor):
+    # Un contador por fila; reemplaza a insertar una fila en boletas_correlativo
+    # por cada venta (ver secuencias.py). Arranca desde el último número emitido.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre VARCHAR(50) PRIMARY KEY,
+            valor BIGINT NOT NULL
+        ) ENGINE=InnoDB
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO secuencias (nombre, valor)
+        SELECT 'boleta', COALESCE(MAX(numero), 0) FROM boletas_correlativo
+    """)
+
+
+def _v6_claves_unicas(cursor):
+    # registrar_inventario y registrar_compra fusionan con un solo
+    # INSERT ... ON DUPLICATE KEY UPDATE sobre estas claves. Antes se fusionaban
+    # con SELECT + UPDATE/INSERT y dos registros simultáneos podían duplicar
+    # la fila: se juntan en la de menor id antes de crear el índice.
+
+    # Inventario: un lote = producto + vencimiento + precio
+    cursor.execute("""
+        UPDATE inventario i
+        JOIN (
+            SELECT MIN(id) AS id, SUM(stock) AS stock
+            FROM inventario
+            GROUP BY producto, fecha_vencimiento, precio_venta
+            HAVING COUNT(*) > 1
+        ) d ON d.id = i.id
+        SET i.stock = d.stock
+    """)
+    cursor.execute("""
+        DELETE i FROM inventario i
+        JOIN (
+            SELECT MIN(id) AS id, producto, fecha_vencimiento, precio_venta
+            FROM inventario
+            GROUP BY producto, fecha_vencimiento, precio_venta
+            HAVING COUNT(*) > 1
+        ) d ON d.producto = i.producto
+           AND d.fecha_vencimiento = i.fecha_vencimiento
+           AND d.precio_venta = i.precio_venta
+           AND i.id <> d.id
+    """)
+    _crear_indice(cursor, "inventario", "uq_inventario_lote",
+                  "producto, fecha_vencimiento, precio_venta", unico=True)
+    # Mismas columnas que el índice único: ya no hace falta
+    _borrar_indice(cursor, "inventario", "idx_inventario_producto_venc")
+
+    # Compras: la fusión es por día de registro, y fecha_registro es DATETIME
+    if not _existe_columna(cursor, "compras", "dia_registro"):
+        cursor.execute("""
+            ALTER TABLE compras
+            ADD COLUMN dia_registro DATE AS (DATE(fecha_registro)) STORED
+        """)
+
+    clave = "nombre_proveedor, contacto_proveedor, producto, precio_unitario, fecha_vencimiento, dia_registro"
+    # resumen_diario cuenta una compra por fila: descontar las que se juntan
+    cursor.execute(f"""
+        UPDATE resumen_diario r
+        JOIN (
+            SELECT dia_registro AS fecha, producto, SUM(n - 1) AS sobran
+            FROM (
+                SELECT dia_registro, producto, COUNT(*) AS n
+                FROM compras
+                GROUP BY {clave}
+                HAVING COUNT(*) > 1
+            ) g
+            GROUP BY dia_registro, producto
+        ) d ON d.fecha = r.fecha AND d.producto = r.producto
+        SET r.num_compras = r.num_compras - d.sobran
+    """)
+    cursor.execute(f"""
+        UPDATE compras c
+        JOIN (
+            SELECT MIN(id) AS id, SUM(cantidad) AS cantidad
+            FROM compras
+            GROUP BY {clave}
+            HAVING COUNT(*) > 1
+        ) d ON d.id = c.id
+        SET c.cantidad = d.cantidad
+    """)
+    cursor.execute(f"""
+        DELETE c FROM compras c
+        JOIN (
+            SELECT MIN(id) AS id, {clave}
+            FROM compras
+            GROUP BY {clave}
+            HAVING COUNT(*) > 1
+        ) d ON d.nombre_proveedor = c.nombre_proveedor
+           AND d.contacto_proveedor = c.contacto_proveedor
+           AND d.producto = c.producto
+           AND d.precio_unitario = c.precio_unitario
+           AND d.fecha_vencimiento = c.fecha_vencimiento
+           AND d.dia_registro = c.dia_registro
+           AND c.id <> d.id
+    """)
+    _crear_indice(cursor, "compras", "uq_compras_fusion", clave, unico=True)
+
+
+# ------------------------------------------
+# SQLITE: ESQUEMA BASE (equivale a las migraciones 1 a 6)
+# ------------------------------------------
+# COLLATE NOCASE en los textos que MySQL compara sin distinguir mayúsculas
+# (usuarios, productos, proveedores), para que las claves únicas fusionen lo
+# mismo en ambos motores.
+def _sqlite_base(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registro (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario VARCHAR(50) NOT NULL COLLATE NOCASE,
+            correo VARCHAR(100) NOT NULL COLLATE NOCASE,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            telefono VARCHAR(20) NOT NULL,
+            contraseña VARCHAR(255) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto VARCHAR(150) NOT NULL COLLATE NOCASE,
+            fecha_vencimiento DATE NOT NULL,
+            stock INT NOT NULL DEFAULT 0,
+            precio_venta DECIMAL(10, 2) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS compras (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_proveedor VARCHAR(100) NOT NULL COLLATE NOCASE,
+            contacto_proveedor VARCHAR(100) NOT NULL COLLATE NOCASE,
+            producto VARCHAR(150) NOT NULL COLLATE NOCASE,
+            cantidad INT NOT NULL,
+            precio_unitario DECIMAL(10, 2) NOT NULL,
+            fecha_registro DATETIME NOT NULL,
+            fecha_vencimiento DATE NOT NULL,
+            dia_registro DATE GENERATED ALWAYS AS (DATE(fecha_registro)) STORED
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto VARCHAR(150) NOT NULL COLLATE NOCASE,
+            cantidad INT NOT NULL,
+            total DECIMAL(10, 2) NOT NULL,
+            fecha_venta DATETIME NOT NULL,
+            numero_boleta INT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS boletas_correlativo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero INT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_diario (
+            fecha DATE NOT NULL,
+            producto VARCHAR(150) NOT NULL COLLATE NOCASE,
+            unidades_vendidas INT NOT NULL DEFAULT 0,
+            ingresos DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            num_ventas INT NOT NULL DEFAULT 0,
+            unidades_compradas INT NOT NULL DEFAULT 0,
+            costo_compras DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            num_compras INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, producto)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versiones (
+            nombre VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre VARCHAR(50) PRIMARY KEY,
+            valor BIGINT NOT NULL
+        )
+    """)
+    cursor.execute("INSERT IGNORE INTO secuencias (nombre, valor) VALUES ('boleta', 0)")
+
+    _crear_indice(cursor, "registro", "idx_registro_usuario", "usuario")
+    _crear_indice(cursor, "registro", "idx_registro_correo", "correo")
+    _crear_indice(cursor, "inventario", "uq_inventario_lote",
+                  "producto, fecha_vencimiento, precio_venta", unico=True)
+    _crear_indice(cursor, "inventario", "idx_inventario_venc", "fecha_vencimiento")
+    _crear_indice(cursor, "compras", "idx_compras_registro", "fecha_registro, id")
+    _crear_indice(cursor, "compras", "idx_compras_producto",
+                  "producto, nombre_proveedor, contacto_proveedor, fecha_registro")
+    _crear_indice(cursor, "compras", "uq_compras_fusion",
+                  "nombre_proveedor, contacto_proveedor, producto, precio_unitario, "
+                  "fecha_vencimiento, dia_registro", unico=True)
+    _crear_indice(cursor, "ventas", "idx_ventas_fecha", "fecha_venta")
+
+
+MIGRACIONES = [
+    (1, "tablas base", _v1_tablas),
+    (2, "índices de las consultas frecuentes", _v2_indices),
+    (3, "resumen diario por producto", _v3_resumen_diario),
+    (4, "versiones de datos para cachés", _v4_versiones),
+    (5, "secuencia atómica de boletas", _v5_secuencias),
+    (6, "claves únicas para fusionar lotes y compras", _v6_claves_unicas),
+]
+
+MIGRACIONES_SQLITE = [
+    (6, "esquema base (SQLite)", _sqlite_base),
+] + [m for m in MIGRACIONES if m[0] > 6]
+
+
+def version_actual(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            descripcion VARCHAR(200) NOT NULL,
+            aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT MAX(version) AS version FROM schema_version")
+    fila = cursor.fetchone()
+    return fila[0] or 0
+
+
+def migrar():
+    with conexion() as conn:
+        cursor = conn.cursor()
+        actual = version_actual(cursor)
+
+        aplicadas = []
+        migraciones = MIGRACIONES_SQLITE if db.MOTOR == "sqlite" else MIGRACIONES
+        for version, descripcion, funcion in migraciones:
+            if version <= actual:
+                continue
+            funcion(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                (version, descripcion)
+            )
+            conn.commit()
+            aplicadas.append(version)
+
+        return aplicadas
+
+
+# ------------------------------------------
+# VERIFICACIÓN DE PLANES (EXPLAIN)
+# ------------------------------------------
+# Con tablas pequeñas el optimizador puede preferir un recorrido completo
+# aunque exista índice; solo se considera regresión si no hay índice usable
+# o si el recorrido completo estima muchas filas.
+FILAS_MAXIMAS_SCAN = 1000
+
+
+def consultas_criticas():
+    hoy = date.today()
+    manana = hoy + timedelta(days=1)
+    return [
+        ("verificar usuario",
+         "SELECT id FROM registro WHERE usuario = %s", ("admin",)),
+        ("verificar correo",
+         "SELECT id FROM registro WHERE correo = %s", ("admin@hattucci.com",)),
+        ("eliminar_compra: lote del inventario",
+         "SELECT id, stock FROM inventario WHERE producto = %s AND fecha_vencimiento = %s",
+         ("Leche", hoy)),
+        ("importar_compras: compras existentes",
+         "SELECT id FROM compras WHERE fecha_registro >= %s AND fecha_registro < %s "
+         "AND producto IN (%s, %s)", (hoy, manana, "Leche", "Pan")),
+        ("compras del día",
+         "SELECT id FROM compras WHERE fecha_registro >= %s AND fecha_registro < %s",
+         (hoy, manana)),
+        ("ventas del día",
+         "SELECT SUM(total) FROM ventas WHERE fecha_venta >= %s AND fecha_venta < %s",
+         (hoy, manana)),
+        ("reporte diario",
+         "SELECT SUM(ingresos) FROM resumen_diario WHERE fecha = %s", (hoy,)),
+    ]
+
+
+def verificar_planes():
+    """Devuelve la lista de consultas críticas que hacen recorrido completo."""
+    regresiones = []
+
+    with conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        for nombre, sql, params in consultas_criticas():
+            if db.MOTOR == "sqlite":
+                # SQLite no estima filas: cualquier SCAN cuenta, también el de
+                # un índice entero ("SCAN compras USING COVERING INDEX ...")
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                for fila in cursor.fetchall():
+                    detalle = fila["detail"]
+                    if detalle.startswith("SCAN "):
+                        regresiones.append((nombre, detalle.split()[1], None))
+                continue
+
+            cursor.execute("EXPLAIN " + sql, params)
+            for fila in cursor.fetchall():
+                if fila.get("type") != "ALL":
+                    continue
+                if not fila.get("possible_keys") or (fila.get("rows") or 0) >= FILAS_MAXIMAS_SCAN:
+                    regresiones.append((nombre, fila.get("table"), fila.get("rows")))
+
+    return regresiones
+
+
+if __name__ == "__main__":
+    accion = sys.argv[1] if len(sys.argv) > 1 else "migrar"
+
+    if accion == "migrar":
+        aplicadas = migrar()
+        print("✅ Migraciones aplicadas:", aplicadas or "ninguna (esquema al día)")
+
+    elif accion == "verificar":
+        regresiones = verificar_planes()
+        for nombre, tabla, filas in regresiones:
+            print(f"❌ {nombre}: recorrido completo de {tabla} (~{filas} filas)")
+        if regresiones:
+            sys.exit(1)
+        print("✅ Todas las consultas críticas usan índice")
+
+    else:
+        print("Uso: python -m hattucci.server.schema [migrar|verificar]")
+        sys.exit(2)
@@ -0,0 +1,170 @@
+# server/secuencias.py
+# Contadores atómicos (tabla secuencias) para numerar boletas.
+#
+# Cada número sale de un único UPDATE sobre una sola fila:
+#     UPDATE secuencias SET valor = LAST_INSERT_ID(valor + n) WHERE nombre = ...
+# MySQL devuelve el nuevo valor en la misma respuesta (cursor.lastrowid), así
+# que no hay SELECT previo ni carrera entre dos cajas.
+#
+# Modos (variable BOLETA_BLOQUE):
+#   1  (por defecto) el número se toma dentro de la transacción de la venta:
+#      sin huecos ni duplicados; si la venta falla el número se devuelve.
+#   N  cada worker reserva N números de una vez en su propia transacción corta
+#      y los reparte desde memoria: menos idas a la base y ningún bloqueo
+#      compartido entre cajas, a cambio de que los números que un worker no
+#      llegue a usar (reinicio, venta fallida) quedan como huecos.
+#
+# Sin huecos solo con BOLETA_BLOQUE=1. Con bloques, un número tomado por una
+# venta que después hace rollback (stock que cambió, error al insertar) no
+# vuelve al bloque: la numeración sigue sin duplicados pero con saltos. Si se
+# exigen correlativos continuos, dejar BOLETA_BLOQUE=1.
+#
+# La reserva de un bloque usa una conexión propia del worker, fuera del pool:
+# quien la pide ya tiene prestada la conexión de su venta, y con el pool
+# dimensionado a un hilo por conexión (gunicorn_conf.py) pedir otra se
+# bloquearía hasta PoolAgotado con las demás cajas esperando detrás.
+#
+# En SQLite (DB_MOTOR=sqlite) las escrituras ya van de a una y la conexión de
+# la venta tiene tomado el lock de escritura: se usa siempre el modo 1.
+#
+#   python -m hattucci.server.secuencias estres [hilos] [numeros_por_hilo]
+import os
+import sys
+import threading
+
+from hattucci.server import db
+from hattucci.server.db import conexion
+
+BOLETA = "boleta"
+BOLETA_BLOQUE = int(os.environ.get("BOLETA_BLOQUE", "1"))
+
+
+class SecuenciaInexistente(Exception):
+    pass
+
+
+def reservar(cursor, nombre, cantidad=1):
+    """Incrementa la secuencia en `cantidad` y devuelve el último número reservado."""
+    cursor.execute(
+        "UPDATE secuencias SET valor = LAST_INSERT_ID(valor + %s) WHERE nombre = %s",
+        (cantidad, nombre)
+    )
+    if cursor.rowcount != 1:
+        raise SecuenciaInexistente(f"No existe la secuencia {nombre}")
+    return cursor.lastrowid
+
+
+# ------------------------------------------
+# RESERVA POR BLOQUES (por proceso)
+# ------------------------------------------
+class Bloque:
+
+    def __init__(self, nombre, tamano):
+        self.nombre = nombre
+        self.tamano = tamano
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        self._siguiente = 0
+        self._limite = -1
+
+    def _reservar(self):
+        # Tras un fork la conexión del padre no se toca: el hijo abre la suya
+        if self._pid != os.getpid():
+            self._conn = None
+            self._pid = os.getpid()
+
+        for intento in range(2):
+            if self._conn is None:
+                self._conn = db.crear_conexion()
+            try:
+                cursor = self._conn.cursor()
+                ultimo = reservar(cursor, self.nombre, self.tamano)
+                self._conn.commit()
+                cursor.close()
+                return ultimo
+            except SecuenciaInexistente:
+                self._conn.rollback()
+                raise
+            except Exception:
+                # Conexión caída (wait_timeout, reinicio del servidor): otra vez con una nueva
+                conn, self._conn = self._conn, None
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                if intento:
+                    raise
+
+    def tomar(self):
+        with self._lock:
+            # Tras un fork el hijo no debe repetir los números del padre
+            if self._pid != os.getpid() or self._siguiente > self._limite:
+                ultimo = self._reservar()
+                self._siguiente = ultimo - self.tamano + 1
+                self._limite = ultimo
+
+            numero = self._siguiente
+            self._siguiente += 1
+            return numero
+
+
+_bloque_boletas = Bloque(BOLETA, BOLETA_BLOQUE)
+
+
+def correlativo_boleta(cursor):
+    """Número de boleta para la venta que se está registrando con `cursor`."""
+    if BOLETA_BLOQUE > 1 and db.MOTOR != "sqlite":
+        return _bloque_boletas.tomar()
+    return reservar(cursor, BOLETA)
+
+
+# ------------------------------------------
+# PRUEBA DE ESTRÉS CONTRA LA BASE CONFIGURADA
+# ------------------------------------------
+def estres(hilos=16, por_hilo=200, bloque=1):
+    """Pide números desde varios hilos a la vez y verifica que no se repitan."""
+    obtenidos = []
+    errores = []
+    lock = threading.Lock()
+    reparto = Bloque(BOLETA, bloque) if bloque > 1 else None
+
+    def trabajar():
+        propios = []
+        try:
+            for _ in range(por_hilo):
+                if reparto:
+                    propios.append(reparto.tomar())
+                    continue
+                with conexion() as conn:
+                    cursor = conn.cursor()
+                    propios.append(reservar(cursor, BOLETA))
+                    conn.commit()
+        except Exception as e:
+            errores.append(e)
+        with lock:
+            obtenidos.extend(propios)
+
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    duplicados = len(obtenidos) - len(set(obtenidos))
+    huecos = (max(obtenidos) - min(obtenidos) + 1 - len(set(obtenidos))) if obtenidos else 0
+    return {"numeros": len(obtenidos), "duplicados": duplicados, "huecos": huecos, "errores": len(errores)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "estres":
+        print("Uso: python -m hattucci.server.secuencias estres [hilos] [numeros_por_hilo] [bloque]")
+        sys.exit(2)
+
+    args = [int(a) for a in sys.argv[2:5]]
+    resultado = estres(*args)
+    print(resultado)
+    if resultado["duplicados"] or resultado["errores"]:
+        print("❌ La secuencia entregó números repetidos o falló")
+        sys.exit(1)
+    print("✅ Sin duplicados")
@@ -0,0 +1,111 @@
+# server/usuarios.py
+# Consultas de existencia de usuario / correo con caché en memoria.
+#
+# Los usuarios no se eliminan, así que un "sí existe" no caduca (LRU acotado).
+# Un "no existe" se guarda poco tiempo (USUARIOS_TTL_NEGATIVO) porque otro
+# worker puede registrar ese nombre; el worker que atiende /registrar marca
+# al instante los datos nuevos como existentes.
+#
+# Los valores se normalizan igual (normalizar) en la caché, en la consulta y
+# en el INSERT de /registrar. Si dos textos son el mismo usuario lo decide la
+# colación de la base (MySQL no distingue mayúsculas ni tildes: "José" = "jose"),
+# nunca Python: la caché guarda cada texto por separado con lo que respondió
+# la base para él.
+import os
+
+from hattucci.server.cache import CacheLRU
+from hattucci.server.db import conexion
+
+TTL_NEGATIVO = float(os.environ.get("USUARIOS_TTL_NEGATIVO", "30"))
+
+_existentes = CacheLRU(maximo=int(os.environ.get("USUARIOS_CACHE", "5000")))
+_inexistentes = CacheLRU(maximo=int(os.environ.get("USUARIOS_CACHE", "5000")), ttl=TTL_NEGATIVO)
+
+
+def normalizar(valor):
+    return (valor or "").strip()
+
+
+def _clave(campo, valor):
+    return (campo, normalizar(valor))
+
+
+def _en_cache(campo, valor):
+    clave = _clave(campo, valor)
+    if _existentes.get(clave):
+        return True
+    if _inexistentes.get(clave):
+        return False
+    return None
+
+
+def _guardar(campo, valor, existe):
+    clave = _clave(campo, valor)
+    if existe:
+        _existentes.set(clave, True)
+        _inexistentes.pop(clave)
+    else:
+        _inexistentes.set(clave, True)
+
+
+def disponibilidad(usuario=None, correo=None):
+    """{"usuario": bool|None, "correo": bool|None} — True si ya existe.
+
+    Lo que no está en caché se resuelve con una sola consulta para ambos campos.
+    """
+    resultado, pendientes = desde_cache(usuario, correo)
+
+    if pendientes:
+        with conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(*consulta(pendientes))
+            filas = cursor.fetchall()
+        resolver(resultado, pendientes, filas)
+
+    return resultado
+
+
+# Pasos de disponibilidad() por separado; asgi.py los usa con su propia conexión
+def desde_cache(usuario=None, correo=None):
+    """(resultado con lo que ya está en caché, {campo: valor} por consultar)"""
+    resultado = {"usuario": None, "correo": None}
+    pendientes = {}
+
+    for campo, valor in (("usuario", usuario), ("correo", correo)):
+        valor = normalizar(valor)
+        if not valor:
+            continue
+        en_cache = _en_cache(campo, valor)
+        if en_cache is None:
+            pendientes[campo] = valor
+        else:
+            resultado[campo] = en_cache
+
+    return resultado, pendientes
+
+
+def consulta(pendientes):
+    # Una fila con un 0/1 por campo: la igualdad la resuelve la colación
+    existe = ", ".join(f"EXISTS(SELECT 1 FROM registro WHERE {campo} = %s) AS {campo}" for campo in pendientes)
+    return f"SELECT {existe}", tuple(pendientes.values())
+
+
+def resolver(resultado, pendientes, filas):
+    fila = filas[0]
+    for campo, valor in pendientes.items():
+        existe = bool(fila[campo])
+        _guardar(campo, valor, existe)
+        resultado[campo] = existe
+
+
+def existe_usuario(usuario):
+    return bool(disponibilidad(usuario=usuario)["usuario"])
+
+
+def existe_correo(correo):
+    return bool(disponibilidad(correo=correo)["correo"])
+
+
+def marcar_registrado(usuario, correo):
+    _guardar("usuario", usuario, True)
+    _guardar("correo", correo, True)
@@ -0,0 +1,194 @@
+# server/ventas.py
+# Registro de una venta completa en una sola transacción.
+#
+# La cantidad de sentencias no depende del tamaño del carrito:
+#   1. SELECT de los lotes con stock de los productos del carrito
+#   2. UPDATE inventario condicional (un CASE para todos los lotes)
+#   3. correlativo de boleta (solo si hay boleta; ver secuencias.py)
+#   4. INSERT INTO ventas multi-fila
+#   5. upsert multi-fila en resumen_diario
+#   6. versión del inventario (invalida la caché de /obtener_inventario)
+#
+# Lotes FEFO: cada producto se descuenta de sus lotes empezando por el que
+# vence primero. El UPDATE solo descuenta si el lote todavía tiene stock
+# suficiente (stock >= cantidad), así que nunca queda negativo y solo se
+# bloquean las filas tocadas, no la tabla. Si otra caja se adelantó y algún
+# lote ya no alcanza, se deshace todo y se vuelve a planificar.
+#
+# El total de cada línea lo calcula el servidor con el precio de los lotes de
+# los que sale (un mismo producto puede tener lotes con precios distintos),
+# menos el descuento de la línea. El total que muestra el navegador es solo
+# una estimación y no se recibe.
+from datetime import date
+
+from hattucci.server import inventario, resumen, secuencias
+
+
+REINTENTOS = 3
+
+
+class VentaInvalida(Exception):
+    pass
+
+
+class StockInsuficiente(VentaInvalida):
+
+    def __init__(self, faltantes):
+        super().__init__("Stock insuficiente")
+        # [{"producto", "pedido", "disponible"}]
+        self.faltantes = faltantes
+
+
+class ConflictoStock(Exception):
+    """Un lote cambió entre la lectura y el UPDATE (otra venta simultánea)."""
+
+
+def _normalizar(venta):
+    if not venta:
+        raise VentaInvalida("Carrito vacío")
+
+    items = []
+    for item in venta:
+        try:
+            cantidad = int(item["cantidad"])
+            descuento = float(item.get("descuento") or 0)
+            items.append({
+                "nombre": item["nombre"],
+                "cantidad": cantidad,
+                "descuento": descuento,
+            })
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise VentaInvalida("Producto mal formado en el carrito")
+        if cantidad <= 0:
+            raise VentaInvalida(f"Cantidad inválida para {item['nombre']}")
+        if not 0 <= descuento <= 100:
+            raise VentaInvalida(f"Descuento inválido para {item['nombre']}")
+    return items
+
+
+def planificar_lotes(cursor, items):
+    """Reparte lo pedido de cada producto entre sus lotes, primero el que vence antes.
+
+    Deja en cada item su "precio" (promedio de los lotes tomados) y su "total"
+    con el descuento aplicado.
+    """
+    pedido = {}
+    for item in items:
+        pedido[item["nombre"]] = pedido.get(item["nombre"], 0) + item["cantidad"]
+
+    marcas = ", ".join(["%s"] * len(pedido))
+    cursor.execute(f"""
+        SELECT id, producto, stock, precio_venta
+        FROM inventario
+        WHERE producto IN ({marcas}) AND stock > 0
+        ORDER BY producto, fecha_vencimiento, id
+    """, tuple(pedido))
+
+    lotes = {}
+    for fila in cursor.fetchall():
+        lotes.setdefault(fila["producto"], []).append(fila)
+
+    # Las líneas de un mismo producto siguen tomando donde quedó la anterior
+    plan = {}
+    incompletos = set()
+    for item in items:
+        restante = item["cantidad"]
+        bruto = 0.0
+        for lote in lotes.get(item["nombre"], []):
+            if restante == 0:
+                break
+            libre = lote["stock"] - plan.get(lote["id"], 0)
+            if libre <= 0:
+                continue
+            tomar = min(restante, libre)
+            plan[lote["id"]] = plan.get(lote["id"], 0) + tomar
+            bruto += tomar * float(lote["precio_venta"])
+            restante -= tomar
+
+        if restante:
+            incompletos.add(item["nombre"])
+        item["precio"] = round(bruto / item["cantidad"], 2)
+        item["total"] = round(bruto * (100 - item["descuento"]) / 100, 2)
+
+    if incompletos:
+        raise StockInsuficiente([
+            {
+                "producto": producto,
+                "pedido": pedido[producto],
+                "disponible": sum(lote["stock"] for lote in lotes.get(producto, [])),
+            }
+            for producto in pedido if producto in incompletos
+        ])
+    return plan
+
+
+def descontar_lotes(cursor, plan):
+    """Un solo UPDATE condicional para todos los lotes del plan."""
+    casos = " ".join(["WHEN %s THEN %s"] * len(plan))
+    marcas = ", ".join(["%s"] * len(plan))
+    pares = [v for par in plan.items() for v in par]
+
+    cursor.execute(f"""
+        UPDATE inventario
+        SET stock = stock - CASE id {casos} END
+        WHERE id IN ({marcas})
+          AND stock >= CASE id {casos} END
+    """, tuple(pares + list(plan) + pares))
+
+    if cursor.rowcount != len(plan):
+        raise ConflictoStock()
+
+
+def insertar_ventas(cursor, items, fecha, correlativo):
+    valores = ", ".join(["(%s, %s, %s, %s, %s)"] * len(items))
+    params = []
+    for item in items:
+        params.extend([item["nombre"], item["cantidad"], item["total"], fecha, correlativo])
+
+    cursor.execute(f"""
+        INSERT INTO ventas (producto, cantidad, total, fecha_venta, numero_boleta)
+        VALUES {valores}
+    """, tuple(params))
+
+
+def registrar_venta(conn, venta, comprobante):
+    """Descuenta stock por lotes FEFO, asigna boleta y guarda la venta; todo o nada.
+
+    Devuelve (correlativo o None si no hay boleta, líneas con el precio y el
+    total cobrados). Lanza StockInsuficiente con el detalle por producto si
+    algo no alcanza.
+    """
+    items = _normalizar(venta)
+    fecha_hoy = date.today()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        for _ in range(REINTENTOS):
+            try:
+                plan = planificar_lotes(cursor, items)
+                descontar_lotes(cursor, plan)
+                break
+            except ConflictoStock:
+                conn.rollback()
+        else:
+            raise VentaInvalida("El stock cambió mientras se registraba la venta, intente nuevamente")
+
+        correlativo = None
+        if comprobante == "BOLETA":
+            correlativo = secuencias.correlativo_boleta(cursor)
+
+        insertar_ventas(cursor, items, fecha_hoy, correlativo)
+        resumen.sumar_ventas(cursor, fecha_hoy, items)
+        version = inventario.marcar_cambio(cursor)
+
+        conn.commit()
+
+        inventario.publicar("cambio", {"productos": sorted({item["nombre"] for item in items})}, version)
+        return correlativo, items
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
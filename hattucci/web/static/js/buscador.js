@@ -0,0 +1,119 @@
+/* ============================================================
+   BUSCADOR CON AUTOCOMPLETADO (va en paquetes/panel.js)
+   ============================================================
+   Reemplaza a un <select> con miles de opciones: solo se dibujan las
+   sugerencias de lo escrito (pocas), con teclado o mouse.
+
+   const b = crearBuscador(input, {
+       buscar: async texto => [...],   // sugerencias para lo escrito
+       mostrar: item => "texto",       // cómo se ve cada sugerencia
+       elegir: item => {...},          // item elegido, o null si se borra
+   });
+   b.limpiar();   // olvida las búsquedas guardadas (cambió el stock)
+*/
+function crearBuscador(input, opciones) {
+    const espera = opciones.espera ?? 150;
+    const guardadas = new Map();
+    let sugerencias = [];
+    let activa = -1;
+    let temporizador = null;
+    let ultimaConsulta = 0;
+
+    const contenedor = document.createElement("div");
+    contenedor.className = "buscador";
+    input.replaceWith(contenedor);
+    contenedor.appendChild(input);
+    input.setAttribute("autocomplete", "off");
+
+    const lista = document.createElement("ul");
+    lista.className = "buscador-lista";
+    contenedor.appendChild(lista);
+
+    async function consultar() {
+        const texto = input.value.trim();
+        const consulta = ++ultimaConsulta;
+
+        let items = guardadas.get(texto);
+        if (!items) {
+            items = texto ? await opciones.buscar(texto) : [];
+            guardadas.set(texto, items);
+        }
+        // Llegó tarde: ya se escribió otra cosa
+        if (consulta !== ultimaConsulta) return;
+
+        sugerencias = items;
+        activa = items.length ? 0 : -1;
+        pintar();
+    }
+
+    function pintar() {
+        const filas = document.createDocumentFragment();
+        sugerencias.forEach((item, i) => {
+            const li = document.createElement("li");
+            li.textContent = opciones.mostrar(item);
+            if (i === activa) li.className = "activa";
+            // mousedown: antes de que el input pierda el foco
+            li.addEventListener("mousedown", e => {
+                e.preventDefault();
+                elegir(i);
+            });
+            filas.appendChild(li);
+        });
+        lista.replaceChildren(filas);
+        lista.style.display = sugerencias.length ? "block" : "none";
+    }
+
+    function cerrar() {
+        sugerencias = [];
+        activa = -1;
+        pintar();
+    }
+
+    function elegir(i) {
+        const item = sugerencias[i];
+        input.value = opciones.mostrar(item);
+        cerrar();
+        opciones.elegir(item);
+    }
+
+    input.addEventListener("input", () => {
+        opciones.elegir(null);
+        clearTimeout(temporizador);
+        temporizador = setTimeout(consultar, espera);
+    });
+
+    input.addEventListener("keydown", e => {
+        if (!sugerencias.length) return;
+
+        if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+            e.preventDefault();
+            const paso = e.key === "ArrowDown" ? 1 : -1;
+            activa = (activa + paso + sugerencias.length) % sugerencias.length;
+            pintar();
+        } else if (e.key === "Enter" && activa >= 0) {
+            e.preventDefault();
+            elegir(activa);
+        } else if (e.key === "Escape") {
+            cerrar();
+        }
+    });
+
+    input.addEventListener("blur", cerrar);
+
+    return {
+        limpiar() {
+            guardadas.clear();
+        },
+        reiniciar() {
+            input.value = "";
+            guardadas.clear();
+            cerrar();
+            opciones.elegir(null);
+        },
+    };
+}
+
+// "Piña" y "pina" se buscan igual
+function normalizarTexto(texto) {
+    return texto.normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+}
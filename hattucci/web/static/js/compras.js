@@ -0,0 +1,183 @@
+/* ============================================================
+   FORMATEAR FECHA (solo reordenar, nada más)
+   ============================================================ */
+function formatearFecha(f) {
+    if (!f) return "";
+    const [yyyy, mm, dd] = f.split("-");
+    return `${dd}/${mm}/${yyyy}`;
+}
+
+/* ============================================================
+   MOSTRAR COMPRAS EN TABLA
+   ============================================================ */
+function mostrarCompras(compras) {
+  const tabla = document.querySelector("#tablaCompras tbody");
+  tabla.innerHTML = "";
+
+  if (compras.length === 0) {
+      tabla.innerHTML = `
+        <tr><td colspan="8" style="text-align:center;">No hay compras registradas en este día</td></tr>`;
+      return;
+  }
+
+  let total = 0;
+
+  compras.forEach(c => {
+      const subtotal = c.cantidad * c.precio_unitario;
+      total += subtotal;
+
+      tabla.innerHTML += `
+      <tr>
+        <td>${c.nombre_proveedor}</td>
+        <td>${c.contacto_proveedor}</td>
+        <td>${c.producto}</td>
+        <td>${c.cantidad}</td>
+        <td>S/ ${parseFloat(c.precio_unitario).toFixed(2)}</td>
+        <td>S/ ${subtotal.toFixed(2)}</td>
+
+        <td>
+            <button class="btn-borrar" onclick="eliminarCompra(${c.id})">🗑</button>
+        </td>
+      </tr>`;
+  });
+
+  tabla.innerHTML += `
+    <tr class="total-row">
+      <td colspan="6" style="text-align:right; font-weight:bold;">TOTAL DEL DÍA</td>
+      <td style="color:#FFD700; font-weight:bold;">S/ ${total.toFixed(2)}</td>
+      <td></td>
+    </tr>`;
+}
+
+
+/* ============================================================
+   REGISTRAR COMPRA (solo insertar)
+   ============================================================ */
+document.getElementById("compraForm").addEventListener("submit", async function(e) {
+  e.preventDefault();
+
+  // VALIDACIÓN DE CONTACTO
+  const contacto = proveedor_contacto.value.trim();
+  if (!/^\d{9}$/.test(contacto)) {
+      Swal.fire("Error", "El contacto debe tener exactamente 9 dígitos.", "error");
+      return;
+  }
+
+  // VALIDACIÓN DE FECHAS
+  const r = new Date(fecha_registro.value);
+  const v = new Date(fecha_vencimiento.value);
+
+  const dif = (v - r) / (1000 * 60 * 60 * 24);
+  if (dif < 14) {
+      Swal.fire("Fecha inválida", "El vencimiento debe ser mínimo 14 días después.", "warning");
+      return;
+  }
+
+  const payload = {
+    proveedor_nombre: proveedor_nombre.value,
+    proveedor_contacto: proveedor_contacto.value,
+    producto: producto.value,
+    fecha_registro: fecha_registro.value,
+    fecha_vencimiento: fecha_vencimiento.value,
+    cantidad: cantidad.value,
+    precio_unitario: precio_unitario.value
+  };
+
+  const res = await fetch("/registrar_compra", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload)
+  });
+
+  const result = await res.json();
+
+  if (result.ok) {
+      Swal.fire("Compra registrada", "", "success");
+      compraForm.reset();
+      fecha_registro.value = new Date().toISOString().split("T")[0];
+      filtro_dia.value && filtrarPorDia();
+  }
+});
+
+/* ============================================================
+   IMPORTAR LISTA (todo o nada; si hay errores se muestran por línea)
+   ============================================================ */
+document.getElementById("importarForm").addEventListener("submit", async function(e) {
+  e.preventDefault();
+
+  const form = new FormData();
+  form.append("archivo", archivo_compras.files[0]);
+
+  const res = await fetch("/importar_compras", { method: "POST", body: form });
+  const r = await res.json();
+
+  if (r.ok) {
+      Swal.fire(
+        "Compras importadas",
+        `${r.lineas} líneas → ${r.insertadas} nuevas, ${r.actualizadas} sumadas a existentes (${r.filas_por_segundo} filas/s)`,
+        "success"
+      );
+      importarForm.reset();
+      filtro_dia.value && filtrarPorDia();
+      return;
+  }
+
+  const detalle = (r.errores || [])
+      .map(x => `Línea ${x.linea}: ${x.error}`)
+      .join("<br>");
+  Swal.fire({ title: "No se importó nada", html: (r.error || "") + "<br><br>" + detalle, icon: "error" });
+});
+
+/* ============================================================
+   FILTRAR POR DÍA
+   ============================================================ */
+async function filtrarPorDia() {
+  const dia = filtro_dia.value;
+
+  if (!dia) {
+    Swal.fire("Seleccione una fecha", "", "warning");
+    return;
+  }
+
+  const res = await fetch("/filtrar_compras_dia", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ dia })
+  });
+
+  const compras = await res.json();
+  window.comprasGlobal = compras;
+  mostrarCompras(compras);
+}
+
+/* ============================================================
+   ELIMINAR COMPRA
+   ============================================================ */
+async function eliminarCompra(id) {
+    const confirm = await Swal.fire({
+        title: "¿Eliminar compra?",
+        text: "No se podrá recuperar",
+        icon: "warning",
+        showCancelButton: true,
+        confirmButtonText: "Eliminar",
+        cancelButtonText: "Cancelar",
+        confirmButtonColor: "#FF4444"
+    });
+
+    if (!confirm.isConfirmed) return;
+
+    const res = await fetch(`/eliminar_compra/${id}`, { method: "DELETE" });
+    const data = await res.json();
+
+    if (data.ok) {
+        Swal.fire("Eliminado", "", "success");
+        filtro_dia.value && filtrarPorDia();
+    }
+}
+
+/* ============================================================
+   FECHA DE REGISTRO POR DEFECTO: HOY
+   ============================================================ */
+document.addEventListener("DOMContentLoaded", () => {
+    fecha_registro.value = new Date().toISOString().split("T")[0];
+});
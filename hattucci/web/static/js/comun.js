@@ -0,0 +1,13 @@
+/* ============================================================
+   COMÚN A TODAS LAS PÁGINAS DEL PANEL (va en paquetes/panel.js)
+   ============================================================ */
+
+// Menú lateral en pantallas chicas
+document.addEventListener("DOMContentLoaded", () => {
+    const sidebar = document.querySelector(".sidebar");
+    const hamburger = document.querySelector(".hamburger");
+
+    hamburger.addEventListener("click", () => {
+        sidebar.classList.toggle("active");
+    });
+});
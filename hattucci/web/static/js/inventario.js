@@ -0,0 +1,313 @@
+/* ============================================================
+   CAMBIO DE MODO (NUEVO / COMPRADO)
+   ============================================================ */
+document.getElementById("modoRegistro").addEventListener("change", (e) => {
+    const modo = e.target.value;
+
+    seccionNuevo.style.display = (modo === "nuevo") ? "block" : "none";
+    seccionComprado.style.display = (modo === "comprado") ? "block" : "none";
+});
+
+
+/* ============================================================
+   CARGAR PRODUCTOS DESDE COMPRAS
+   ============================================================ */
+let comprasDisponibles = [];
+let compraElegida = null;
+
+async function cargarProductosCompras() {
+    try {
+        // 🔥 Una sola petición: el servidor ya calcula comprado / registrado / restante
+        const res = await fetch("/compras_disponibles");
+        const compras = await res.json();
+
+        comprasDisponibles = compras.map(c => ({
+            ...c,
+            venc: c.fecha_vencimiento ? new Date(c.fecha_vencimiento).toISOString().split("T")[0] : "",
+            palabras: normalizarTexto(c.producto).split(/[^0-9a-z]+/),
+        }));
+        buscadorCompras.limpiar();
+
+    } catch (error) {
+        console.error("❌ ERROR cargando compras:", error);
+    }
+}
+
+
+/* ============================================================
+   BUSCAR ENTRE LAS COMPRAS (ya están en memoria)
+   ============================================================ */
+// Cada palabra escrita debe ser el comienzo de una palabra del producto
+function buscarCompras(texto) {
+    const terminos = normalizarTexto(texto).split(/[^0-9a-z]+/).filter(Boolean);
+    const encontradas = [];
+
+    for (const c of comprasDisponibles) {
+        if (terminos.every(t => c.palabras.some(p => p.startsWith(t)))) {
+            encontradas.push(c);
+            if (encontradas.length === 10) break;
+        }
+    }
+    return encontradas;
+}
+
+
+/* ============================================================
+   AUTOCOMPLETAR DESDE COMPRAS
+   ============================================================ */
+const buscadorCompras = crearBuscador(document.getElementById("productoBuscar"), {
+    buscar: async texto => buscarCompras(texto),
+    mostrar: c => `${c.producto} — Stock disponible: ${c.restante}`,
+    elegir: c => {
+        compraElegida = c;
+        stock.value = c ? c.restante : "";
+        precio_compra.value = c ? c.precio_unitario : "";
+        vencimiento.value = c ? c.venc : "";
+    },
+});
+
+
+
+/* ============================================================
+   REGISTRAR EN INVENTARIO
+   ============================================================ */
+productForm.addEventListener("submit", async (e) => {
+    e.preventDefault();
+
+    const modo = modoRegistro.value;
+    let payload = {};
+
+    if (modo === "nuevo") {
+        if (!nuevo_nombre.value || !nuevo_precio_venta.value || !nuevo_venc.value || !nuevo_stock.value) {
+            Swal.fire("Complete todos los campos del nuevo producto", "", "warning");
+            return;
+        }
+        payload = {
+            producto: nuevo_nombre.value,
+            stock: nuevo_stock.value,
+            precio_venta: nuevo_precio_venta.value,
+            vencimiento: nuevo_venc.value     // <- ahora coincide con backend
+        };
+    } else {
+        if (!compraElegida || !precio_venta.value || !stock.value) {
+            Swal.fire("Complete todos los campos del producto comprado", "", "warning");
+            return;
+        }
+        payload = {
+            producto: compraElegida.producto,
+            stock: stock.value,
+            precio_venta: precio_venta.value,
+            vencimiento: vencimiento.value   // <- ahora coincide con backend
+        };
+    }
+
+    try {
+        const res = await fetch("/registrar_inventario", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(payload)
+        });
+
+        const data = await res.json();
+        console.log("RESPUESTA registrar_inventario:", data);
+
+        if (data.ok) {
+            Swal.fire("Producto registrado correctamente", "", "success");
+            productForm.reset();
+            buscadorCompras.reiniciar();
+            modoRegistro.value = "nuevo";
+            seccionNuevo.style.display = "block";
+            seccionComprado.style.display = "none";
+            cargarInventario();
+            cargarProductosCompras();
+        } else {
+            Swal.fire("Error registrando", data.error || "Ocurrió un problema", "error");
+        }
+    } catch (err) {
+        console.error("ERROR en fetch /registrar_inventario:", err);
+        Swal.fire("Error de conexión con el servidor", "", "error");
+    }
+});
+
+
+
+/* ============================================================
+   CARGAR TABLA INVENTARIO (PAGINADA) + ALERTAS
+   ============================================================ */
+let cursorInventario = null;
+
+function filtrosInventario() {
+    const params = new URLSearchParams({ limite: "50" });
+    const texto = filtroProducto.value.trim();
+
+    if (texto) params.set("producto", texto);
+    if (filtroConStock.checked) params.set("con_stock", "1");
+
+    return params;
+}
+
+async function cargarInventario(mas = false) {
+    const params = filtrosInventario();
+    if (mas && cursorInventario) params.set("cursor", cursorInventario);
+
+    const res = await fetch("/obtener_inventario?" + params);
+    const pagina = await res.json();
+    const items = pagina.items;
+    cursorInventario = pagina.siguiente;
+
+    const tabla = document.querySelector("#tablaProductos tbody");
+    const contenedorTabla = document.getElementById("contenedorTabla");
+
+    if (!mas) tabla.innerHTML = "";
+
+    btnMasInventario.style.display = cursorInventario ? "block" : "none";
+
+    if (!mas && items.length === 0) {
+        contenedorTabla.style.display = "none";
+        return;
+    }
+
+    contenedorTabla.style.display = "block";
+
+    let filas = "";
+
+    items.forEach(i => {
+
+        // --- Normalizar fecha ---
+        let fecha = i.vencimiento || i.fecha_vencimiento;
+        let fechaMostrada = "—";
+
+        if (fecha) {
+            try {
+                fechaMostrada = new Date(fecha).toISOString().split("T")[0];
+            } catch {
+                fechaMostrada = fecha.toString().split("T")[0];
+            }
+        }
+
+        // ============================
+        // AGREGAR FILA A TABLA
+        // ============================
+        filas += `
+        <tr>
+            <td>${i.producto}</td>
+            <td>S/ ${parseFloat(i.precio_venta).toFixed(2)}</td>
+            <td>${i.stock}</td>
+            <td>${fechaMostrada}</td>
+            <td>
+                <button class="btn btn-danger btn-sm" onclick="eliminarInventario(${i.id})">🗑</button>
+            </td>
+        </tr>
+        `;
+    });
+
+    tabla.insertAdjacentHTML("beforeend", filas);
+}
+
+btnMasInventario.addEventListener("click", () => cargarInventario(true));
+
+let esperaFiltro = null;
+filtroProducto.addEventListener("input", () => {
+    clearTimeout(esperaFiltro);
+    esperaFiltro = setTimeout(() => cargarInventario(), 300);
+});
+filtroConStock.addEventListener("change", () => cargarInventario());
+
+
+/* ============================================================
+   ALERTAS: SOLO SE PIDEN LAS FILAS AFECTADAS
+   ============================================================ */
+async function mostrarAlertasInventario() {
+    const limite = new Date();
+    limite.setDate(limite.getDate() + 7);
+    const venceHasta = limite.toISOString().split("T")[0];
+
+    const [resStock, resVenc] = await Promise.all([
+        fetch("/obtener_inventario?todo=1&stock_max=4"),
+        fetch(`/obtener_inventario?todo=1&vence_hasta=${venceHasta}`)
+    ]);
+    const bajos = await resStock.json();
+    const porVencer = await resVenc.json();
+
+    // ============================
+    // 🔥 ALERTA 1: STOCK BAJO
+    // ============================
+    let alertasStock = bajos.map(i =>
+        `⚠️ El producto <b>${i.producto}</b> tiene solo <b>${i.stock}</b> unidades.`
+    );
+
+    // ============================
+    // 🔥 ALERTA 2: POR VENCER (≤ 7 días)
+    // ============================
+    const hoy = new Date();
+    let alertasVenc = porVencer.map(i => {
+        const diasRestantes = Math.ceil((new Date(i.fecha_vencimiento) - hoy) / (1000 * 60 * 60 * 24));
+        return `⏳ El producto <b>${i.producto}</b> vence en <b>${diasRestantes}</b> días.`;
+    });
+
+    // ============================
+    // MOSTRAR ALERTAS SI EXISTEN
+    // ============================
+
+    let mensaje = "";
+
+    if (alertasStock.length > 0) {
+        mensaje += "<h4>🔻 STOCK BAJO</h4>" + alertasStock.join("<br>") + "<br><br>";
+    }
+
+    if (alertasVenc.length > 0) {
+        mensaje += "<h4>⏳ PRODUCTOS POR VENCER</h4>" + alertasVenc.join("<br>");
+    }
+
+    if (mensaje !== "") {
+        Swal.fire({
+            title: "⚠️ Alertas de Inventario",
+            html: mensaje,
+            icon: "warning",
+            confirmButtonText: "Entendido",
+            confirmButtonColor: "#FFC107",
+            width: "600px"
+        });
+    }
+}
+
+
+
+/* ============================================================
+   ELIMINAR PRODUCTO
+   ============================================================ */
+async function eliminarInventario(id) {
+    const confirm = await Swal.fire({
+        title: "¿Eliminar producto?",
+        icon: "warning",
+        showCancelButton: true,
+        confirmButtonText: "Eliminar",
+        cancelButtonText: "Cancelar",
+        confirmButtonColor: "#FF4444"
+    });
+
+    if (!confirm.isConfirmed) return;
+
+    const res = await fetch(`/eliminar_inventario/${id}`, { method: "DELETE" });
+    const data = await res.json();
+
+    if (data.ok) {
+        Swal.fire("Producto eliminado del inventario", "", "success");
+
+        // 🔥 Recargar tabla de inventario
+        cargarInventario();
+
+        // 🔥 Recargar productos de compras disponibles
+        cargarProductosCompras(); 
+    }
+}
+
+
+/* ============================================================
+   INICIALIZAR
+   ============================================================ */
+document.addEventListener("DOMContentLoaded", () => {
+    cargarProductosCompras();
+    cargarInventario();
+    mostrarAlertasInventario();
+});
@@ -0,0 +1,63 @@
+// Obtener referencias
+const usuarioInput = document.getElementById("usuario");
+const passInput = document.getElementById("contraseña");
+const btnIngresar = document.getElementById("btnIngresar");
+const msgUsuario = document.getElementById("msgUsuario");
+
+// 🔒 DESACTIVAR BOTÓN AL INICIO
+btnIngresar.disabled = true;
+btnIngresar.style.opacity = "0.6";
+btnIngresar.style.cursor = "not-allowed";
+
+// 🟡 Función que ACTIVARÁ o DESACTIVARÁ el botón
+function actualizarBoton() {
+    const usuarioClass = msgUsuario.className;
+    const pass = passInput.value.trim();
+
+    if (usuarioClass === "ok" && pass !== "") {
+        btnIngresar.disabled = false;
+        btnIngresar.style.opacity = "1";
+        btnIngresar.style.cursor = "pointer";
+    } else {
+        btnIngresar.disabled = true;
+        btnIngresar.style.opacity = "0.6";
+        btnIngresar.style.cursor = "not-allowed";
+    }
+}
+
+// 🟡 Validar usuario en tiempo real (una petición 300 ms después de dejar de escribir)
+let esperaUsuario = null;
+
+usuarioInput.addEventListener("input", function() {
+    let usuario = this.value.trim();
+    clearTimeout(esperaUsuario);
+
+    if (usuario === "") {
+        msgUsuario.textContent = "";
+        msgUsuario.className = "";
+        actualizarBoton();
+        return;
+    }
+
+    esperaUsuario = setTimeout(() => {
+        fetch("/validar_usuario_login?usuario=" + encodeURIComponent(usuario))
+        .then(res => res.json())
+        .then(data => {
+            // Ignorar respuestas de lo que ya se borró o cambió
+            if (usuarioInput.value.trim() !== usuario) return;
+
+            if (data.existe) {
+                msgUsuario.textContent = "✔ Usuario válido";
+                msgUsuario.className = "ok";
+            } else {
+                msgUsuario.textContent = "❌ Usuario no registrado";
+                msgUsuario.className = "error";
+            }
+
+            actualizarBoton();
+        });
+    }, 300);
+});
+
+// 🟡 Validar contraseña (solo revisa si está vacía)
+passInput.addEventListener("input", actualizarBoton);
@@ -0,0 +1,68 @@
+// Referencia al botón
+const btnRegistrar = document.querySelector("button[type='submit']");
+
+// Función para actualizar el estado del botón
+function actualizarBoton() {
+    const usuarioMsg = document.getElementById("msgUsuario").className;
+    const correoMsg = document.getElementById("msgCorreo").className;
+
+    if (usuarioMsg === "error" || correoMsg === "error") {
+        btnRegistrar.disabled = true;
+        btnRegistrar.style.opacity = "0.6"; // efecto visual
+        btnRegistrar.style.cursor = "not-allowed";
+    } else {
+        btnRegistrar.disabled = false;
+        btnRegistrar.style.opacity = "1";
+        btnRegistrar.style.cursor = "pointer";
+    }
+}
+
+// Verificar usuario y correo en una sola petición, 300 ms después de dejar de escribir
+let esperaVerificar = null;
+
+function verificarDisponibilidad() {
+    clearTimeout(esperaVerificar);
+    esperaVerificar = setTimeout(() => {
+        const usuario = document.getElementById("usuario").value.trim();
+        const correo = document.getElementById("correo").value.trim();
+        if (!usuario && !correo) return;
+
+        const params = new URLSearchParams();
+        if (usuario) params.set("usuario", usuario);
+        if (correo) params.set("correo", correo);
+
+        fetch("/disponibilidad?" + params)
+            .then(res => res.json())
+            .then(data => {
+                if (data.usuario !== null && data.usuario !== undefined) {
+                    let msg = document.getElementById("msgUsuario");
+                    msg.textContent = data.usuario ? "❌ Usuario ya existe" : "✔ Disponible";
+                    msg.className   = data.usuario ? "error" : "ok";
+                }
+                if (data.correo !== null && data.correo !== undefined) {
+                    let msg = document.getElementById("msgCorreo");
+                    msg.textContent = data.correo ? "❌ Correo ya registrado" : "✔ Disponible";
+                    msg.className   = data.correo ? "error" : "ok";
+                }
+                actualizarBoton();
+            });
+    }, 300);
+}
+
+document.getElementById("usuario").addEventListener("input", verificarDisponibilidad);
+document.getElementById("correo").addEventListener("input", verificarDisponibilidad);
+
+// Validación adicional del correo al enviar
+document.getElementById("formRegistro").addEventListener("submit", function(e) {
+    const correo = document.getElementById("correo").value;
+    const regex = /^[^@]+@[^@]+\.(com|net)$/i;
+    if (!regex.test(correo)) {
+        e.preventDefault();
+        alert("El correo debe contener '@' y terminar en '.com' o '.net'");
+    }
+});
+
+// Inicialmente desactivar botón hasta que se verifiquen ambos campos
+btnRegistrar.disabled = true;
+btnRegistrar.style.opacity = "0.6";
+btnRegistrar.style.cursor = "not-allowed";
@@ -0,0 +1,117 @@
+/* ===============================
+       CARGAR REPORTES
+=============================== */
+async function cargarReportes() {
+    const fecha = document.getElementById("fechaFiltro").value;
+
+    if (!fecha) return Swal.fire("Seleccione una fecha");
+
+    // agrupado: una fila por tipo y producto leída del resumen diario; no
+    // recorre las ventas y compras del día, así que no crece con el volumen
+    const res = await fetch("/obtener_movimientos_dia", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ fecha, agrupado: true })
+    });
+
+    const data = await res.json();
+
+    actualizarTabla(data.movimientos);
+    mostrarBalance(data.ganancia);
+}
+
+/* ===============================
+         TABLA NORMAL
+=============================== */
+function actualizarTabla(movs) {
+    const tbody = document.querySelector("#tablaReportes tbody");
+    tbody.innerHTML = "";
+
+    if (movs.length === 0) {
+        tbody.innerHTML = `<tr><td colspan="4" class="text-center">No hay movimientos</td></tr>`;
+        return;
+    }
+
+    movs.forEach(m => {
+        tbody.innerHTML += `
+            <tr>
+                <td>${m.tipo}</td>
+                <td>${m.producto}</td>
+                <td>${m.cantidad}</td>
+                <td>S/ ${parseFloat(m.total).toFixed(2)}</td>
+            </tr>`;
+    });
+}
+
+function mostrarBalance(ganancia) {
+    const b = document.getElementById("balanceDia");
+
+    ganancia = parseFloat(ganancia);
+
+    if (ganancia > 0)
+        b.innerHTML = `<span style="color:#00ff55;">🟢 Ganancia del día: S/ ${ganancia.toFixed(2)}</span>`;
+    else if (ganancia < 0)
+        b.innerHTML = `<span style="color:#ff4444;">🔴 Pérdida del día: S/ ${ganancia.toFixed(2)}</span>`;
+    else
+        b.innerHTML = `<span>No hubo ganancia ni pérdida hoy.</span>`;
+}
+
+/* ===============================
+      📄 GENERAR PDF (EN EL SERVIDOR)
+=============================== */
+function generarPDF() {
+    const fecha = document.getElementById("fechaFiltro").value;
+    if (!fecha) return Swal.fire("Seleccione una fecha");
+
+    window.open(`/reporte_pdf?fecha=${fecha}`, "_blank");
+}
+
+function generarPDFRango() {
+    const desde = document.getElementById("rangoDesde").value;
+    const hasta = document.getElementById("rangoHasta").value;
+    const agrupar = document.getElementById("rangoAgrupar").value;
+    if (!desde || !hasta) return Swal.fire("Seleccione el rango de fechas");
+
+    window.open(`/reporte_pdf?desde=${desde}&hasta=${hasta}&agrupar=${agrupar}`, "_blank");
+}
+
+/* ===============================
+     REPORTE POR RANGO
+=============================== */
+async function cargarReporteRango() {
+    const desde = document.getElementById("rangoDesde").value;
+    const hasta = document.getElementById("rangoHasta").value;
+    const agrupar = document.getElementById("rangoAgrupar").value;
+
+    if (!desde || !hasta) return Swal.fire("Seleccione el rango de fechas");
+
+    const res = await fetch("/reporte_rango", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ desde, hasta, agrupar })
+    });
+    const data = await res.json();
+
+    if (data.error) return Swal.fire(data.error);
+
+    const fila = p => `
+        <tr>
+            <td>${p.periodo}</td>
+            <td>S/ ${p.ventas.toFixed(2)}</td>
+            <td>S/ ${p.compras.toFixed(2)}</td>
+            <td>S/ ${p.ganancia.toFixed(2)}</td>
+        </tr>`;
+
+    let html = data.periodos.map(fila).join("");
+    html += fila({ ...data.totales, periodo: "<b>TOTAL</b>" });
+
+    document.querySelector("#tablaRango tbody").innerHTML = html;
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    let hoy = new Date().toISOString().split("T")[0];
+    document.getElementById("fechaFiltro").value = hoy;
+    document.getElementById("rangoDesde").value = hoy.slice(0, 8) + "01";
+    document.getElementById("rangoHasta").value = hoy;
+    cargarReportes();
+});
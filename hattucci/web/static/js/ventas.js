@@ -0,0 +1,236 @@
+let carrito = [];
+let productoElegido = null;
+const enVivo = "EventSource" in window;
+
+/* ====================== BUSCAR PRODUCTO ====================== */
+// El servidor busca en su índice (sin tildes, por prefijo de cada palabra)
+// y devuelve pocos productos con el stock sumado de todos sus lotes.
+async function buscarProductos(texto) {
+    const params = new URLSearchParams({ q: texto, limite: "10" });
+    const res = await fetch("/buscar_productos?" + params);
+    return (await res.json()).items || [];
+}
+
+const buscador = crearBuscador(document.getElementById("productoBuscar"), {
+    buscar: buscarProductos,
+    mostrar: p => `${p.producto} — S/ ${parseFloat(p.precio_venta).toFixed(2)} (${p.stock} uds)`,
+    elegir: p => { productoElegido = p; },
+});
+
+// Vuelve a pedir el producto elegido para tener su stock al día
+async function refrescarElegido() {
+    buscador.limpiar();
+    if (!productoElegido) return;
+
+    const nombre = productoElegido.producto;
+    const actual = (await buscarProductos(nombre)).find(p => p.producto === nombre);
+    if (productoElegido && productoElegido.producto === nombre) {
+        productoElegido = actual || { ...productoElegido, stock: 0 };
+    }
+}
+
+/* ============ CAMBIOS DE STOCK EN VIVO (otras cajas) ============ */
+let ultimoEvento = null;
+let refresco = null;
+
+// Productos que tocó el evento; null si no se sabe (hay que refrescar igual)
+function productosDelEvento(tipo, datos) {
+    return tipo === "cambio" ? datos.productos : null;
+}
+
+// Varias ventas seguidas de otras cajas se juntan en un solo pedido
+function programarRefresco() {
+    if (refresco) return;
+    refresco = setTimeout(() => {
+        refresco = null;
+        refrescarElegido();
+    }, 1500);
+}
+
+function conectarEventosInventario() {
+    const url = "/eventos_inventario" + (ultimoEvento ? "?ultimo=" + encodeURIComponent(ultimoEvento) : "");
+    const fuente = new EventSource(url);
+
+    // Cualquier cambio de inventario deja viejas las sugerencias guardadas;
+    // el producto elegido se vuelve a pedir solo si es uno de los que cambió
+    for (const tipo of ["recargar", "cambio"]) {
+        fuente.addEventListener(tipo, e => {
+            ultimoEvento = e.lastEventId || ultimoEvento;
+            buscador.limpiar();
+            if (!productoElegido) return;
+
+            const nombres = productosDelEvento(tipo, JSON.parse(e.data || "{}"));
+            if (nombres && !nombres.includes(productoElegido.producto)) return;
+            programarRefresco();
+        });
+    }
+    fuente.addEventListener("listo", e => { ultimoEvento = e.lastEventId || ultimoEvento; });
+
+    // Si el servidor no tiene lugar (503) EventSource no reintenta solo: se
+    // vuelve a conectar más tarde desde el último evento recibido
+    fuente.onerror = () => {
+        if (fuente.readyState === EventSource.CLOSED) {
+            setTimeout(conectarEventosInventario, 30000);
+        }
+    };
+}
+
+/* ==================== AGREGAR PRODUCTO ==================== */
+document.getElementById("ventaForm").addEventListener("submit", function(e) {
+    e.preventDefault();
+
+    if (!productoElegido) {
+        return Swal.fire("Elige un producto de la lista");
+    }
+
+    const id = productoElegido.producto;
+    const nombre = productoElegido.producto;
+    const precio = parseFloat(productoElegido.precio_venta);
+    const stock = productoElegido.stock;
+    const cantidadValor = parseInt(cantidad.value);
+    const descuentoValor = parseInt(descuento.value || 0);
+
+    // Lo que ya está en el carrito de este producto también cuenta
+    const enCarrito = carrito
+        .filter(i => i.nombre === nombre)
+        .reduce((s, i) => s + i.cantidad, 0);
+
+    if (cantidadValor + enCarrito > stock) {
+        return Swal.fire("📦 Stock insuficiente");
+    }
+
+    // Estimación con el precio del lote que vence primero; el servidor cobra
+    // con el precio de cada lote del que sale
+    const total = (precio * cantidadValor) * (1 - descuentoValor / 100);
+
+    carrito.push({ id, nombre, cantidad: cantidadValor, precio, descuento: descuentoValor, total });
+
+    actualizarTablaVenta();
+    actualizarTotalVenta();
+});
+
+/* ==================== TABLA ==================== */
+function actualizarTablaVenta() {
+    const tbody = document.querySelector("#tablaVenta tbody");
+    tbody.innerHTML = "";
+
+    carrito.forEach((item, index) => {
+        tbody.innerHTML += `
+            <tr>
+                <td>${item.nombre}</td>
+                <td>${item.cantidad}</td>
+                <td>S/ ${item.precio.toFixed(2)}</td>
+                <td>${item.descuento}%</td>
+                <td>S/ ${item.total.toFixed(2)}</td>
+                <td><button onclick="eliminarItem(${index})" class="btn btn-danger btn-sm">🗑</button></td>
+            </tr>`;
+    });
+}
+
+function eliminarItem(i) {
+    carrito.splice(i, 1);
+    actualizarTablaVenta();
+    actualizarTotalVenta();
+}
+
+/* ==================== TOTAL ==================== */
+function actualizarTotalVenta() {
+    let total = carrito.reduce((sum, i) => sum + i.total, 0);
+    document.getElementById("totalVenta").textContent = "S/ " + total.toFixed(2);
+}
+
+/* ==================== CONFIRMAR VENTA ==================== */
+document.getElementById("confirmarVenta").addEventListener("click", async () => {
+
+    if (carrito.length === 0) {
+        return Swal.fire("Carrito vacío");
+    }
+
+    const ask = await Swal.fire({
+        title: "¿Desea boleta?",
+        showCancelButton: true,
+        confirmButtonText: "Sí",
+        cancelButtonText: "No"
+    });
+
+    const tipo = ask.isConfirmed ? "BOLETA" : "SIN_COMPROBANTE";
+
+    procesarVenta(tipo);
+});
+
+/* ==================== PROCESAR VENTA ==================== */
+async function procesarVenta(comprobante) {
+
+    const res = await fetch("/descontar_stock", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            venta: carrito.map(i => ({ nombre: i.nombre, cantidad: i.cantidad, descuento: i.descuento })),
+            comprobante
+        })
+    });
+
+    const data = await res.json();
+
+    if (!data.ok) {
+        // El servidor valida el stock real (por lotes); el de la lista puede estar desactualizado
+        if (data.faltantes) {
+            const detalle = data.faltantes
+                .map(f => `<b>${f.producto}</b>: pedido ${f.pedido}, disponible ${f.disponible}`)
+                .join("<br>");
+            Swal.fire({ title: "📦 Stock insuficiente", html: detalle, icon: "warning" });
+            refrescarElegido();
+            return;
+        }
+        return Swal.fire("Error al registrar venta", data.error || "", "error");
+    }
+
+    // Lo cobrado según los lotes descontados
+    const total = data.total;
+
+    /* === SIN BOLETA === */
+    if (comprobante === "SIN_COMPROBANTE") {
+        Swal.fire("Venta registrada", `Total S/ ${total.toFixed(2)}`, "success");
+        carrito = [];
+        actualizarTablaVenta();
+        actualizarTotalVenta();
+        buscador.reiniciar();
+        return;
+    }
+
+    /* === GENERAR BOLETA === */
+    const correlativo = data.correlativo.padStart(4, "0");
+
+    document.getElementById("b_numero").textContent = correlativo;
+    document.getElementById("b_fecha").textContent = new Date().toLocaleDateString();
+
+    let detalle = "";
+    data.items.forEach(i => {
+        detalle += `
+        <tr>
+            <td>${i.cantidad}</td>
+            <td>${i.nombre}</td>
+            <td>S/ ${i.precio.toFixed(2)}</td>
+            <td>${i.descuento}%</td>
+            <td>S/ ${i.total.toFixed(2)}</td>
+        </tr>`;
+    });
+
+    document.getElementById("b_detalle").innerHTML = detalle;
+    document.getElementById("b_total").textContent = total.toFixed(2);
+
+    document.getElementById("boletaContainer").style.display = "block";
+
+    window.print(); // 🖨 auto imprimir / PDF
+
+    document.getElementById("boletaContainer").style.display = "none";
+
+    carrito = [];
+    actualizarTablaVenta();
+    actualizarTotalVenta();
+    buscador.reiniciar();
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    if (enVivo) conectarEventosInventario();
+});
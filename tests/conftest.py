@@ -0,0 +1,113 @@
+# tests/conftest.py
+# Pruebas automáticas (pytest) contra el motor SQLite de motor_sqlite.py:
+# no necesitan servidor.
+#
+#   python -m pytest
+#
+# Las pruebas que reciben el fixture `base` corren una vez por motor. La
+# variante MySQL lleva la marca "mysql" y se salta salvo que PRUEBAS_MYSQL=1
+# y DB_HOST, DB_USER, DB_PASSWORD y DB_NAME apunten a una base de PRUEBAS:
+# antes de cada prueba se vacían sus tablas.
+#
+#   PRUEBAS_MYSQL=1 DB_HOST=127.0.0.1 DB_NAME=hattucci_pruebas ... python -m pytest
+import os
+
+# Antes de importar el servidor: por defecto nada intenta conectarse a MySQL
+# y las versiones de datos se leen siempre (las pruebas escriben y leen enseguida)
+os.environ["DB_MOTOR"] = "sqlite"
+os.environ["INVENTARIO_VERSION_TTL"] = "0"
+
+import pytest
+
+from hattucci.server import busqueda, db, inventario, resumen, schema, usuarios
+
+# Alcanza para las pruebas de concurrencia (un hilo por conexión)
+POOL_PRUEBAS = 32
+
+# En orden: primero las que dependen de otras
+TABLAS = ("ventas", "compras", "inventario", "resumen_diario", "versiones")
+
+
+def _limpiar_caches():
+    inventario._version.clear()
+    inventario.respuestas.clear()
+    busqueda._version.clear()
+    busqueda._indice = None
+    resumen._cache_rangos.clear()
+    usuarios._existentes.clear()
+    usuarios._inexistentes.clear()
+
+
+def _vaciar_mysql():
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        for tabla in TABLAS:
+            cursor.execute(f"DELETE FROM {tabla}")
+        cursor.execute("UPDATE secuencias SET valor = 0")
+        conn.commit()
+
+
+@pytest.fixture(params=["sqlite", pytest.param("mysql", marks=pytest.mark.mysql)])
+def base(request, tmp_path, monkeypatch):
+    """Base vacía y migrada; devuelve el nombre del motor."""
+    motor = request.param
+    # Sin DB_HOST explícito nunca: el valor por defecto de db.py es la base real
+    if motor == "mysql" and (os.environ.get("PRUEBAS_MYSQL") != "1" or not os.environ.get("DB_HOST")):
+        pytest.skip("MySQL: definir PRUEBAS_MYSQL=1 y DB_* de una base de pruebas")
+
+    monkeypatch.setattr(db, "MOTOR", motor)
+    monkeypatch.setattr(db, "SQLITE_RUTA", str(tmp_path / "hattucci.db"))
+    db.init_pool(tamano=POOL_PRUEBAS)
+
+    try:
+        schema.migrar()
+    except Exception as e:
+        db.cerrar_pool()
+        if motor == "mysql":
+            pytest.skip(f"MySQL no disponible: {e}")
+        raise
+
+    if motor == "mysql":
+        _vaciar_mysql()
+    _limpiar_caches()
+
+    yield motor
+
+    db.cerrar_pool()
+    _limpiar_caches()
+
+
+@pytest.fixture
+def cliente(base):
+    from hattucci.server.app import app
+
+    return app.test_client()
+
+
+# ------------------------------------------
+# DATOS DE PRUEBA
+# ------------------------------------------
+@pytest.fixture
+def registrar_lote(cliente):
+    def registrar(producto, vencimiento, stock, precio_venta):
+        respuesta = cliente.post("/registrar_inventario", json={
+            "producto": producto,
+            "vencimiento": vencimiento,
+            "stock": stock,
+            "precio_venta": precio_venta,
+        }).get_json()
+        assert respuesta["ok"], respuesta
+        return respuesta
+
+    return registrar
+
+
+@pytest.fixture
+def consultar(base):
+    def consultar(sql, params=()):
+        with db.conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    return consultar
@@ -0,0 +1,115 @@
+# tests/test_asgi.py
+# Modo ASGI (asgi.py): el cuerpo hacia Flask se lee a medida que llega.
+import asyncio
+import io
+import json
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from hattucci.server import asgi
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    hilo.join()
+    loop.close()
+
+
+def _mensajes(trozos):
+    entregados = []
+
+    async def receive():
+        i = len(entregados)
+        entregados.append(i)
+        return {"type": "http.request", "body": trozos[i], "more_body": i < len(trozos) - 1}
+
+    return receive, entregados
+
+
+def test_entrada_pide_trozos_solo_al_leer(loop):
+    receive, entregados = _mensajes([b"abc", b"def", b"ghi"])
+    terminado = threading.Event()
+    entrada = io.BufferedReader(asgi.Entrada(receive, loop, terminado.set), buffer_size=2)
+
+    assert entregados == []
+    assert entrada.read(2) == b"ab"
+    assert len(entregados) == 1
+    assert entrada.read() == b"cdefghi"
+    assert len(entregados) == 3
+    assert terminado.wait(1)
+
+
+def _pedir(metodo, ruta, trozos, encabezados=()):
+    ruta, _, consulta = ruta.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": metodo, "scheme": "http", "path": ruta, "raw_path": ruta.encode(),
+        "query_string": consulta.encode(), "root_path": "", "headers": list(encabezados),
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    pendientes = [
+        {"type": "http.request", "body": t, "more_body": i < len(trozos) - 1}
+        for i, t in enumerate(trozos)
+    ]
+    respuesta = {"estado": None, "cuerpo": []}
+
+    async def correr():
+        terminado = asyncio.Event()
+
+        async def receive():
+            if pendientes:
+                return pendientes.pop(0)
+            await terminado.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensaje):
+            if mensaje["type"] == "http.response.start":
+                respuesta["estado"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                respuesta["cuerpo"].append(mensaje.get("body", b""))
+
+        try:
+            await asgi.aplicacion(scope, receive, send)
+        finally:
+            terminado.set()
+
+    asyncio.run(correr())
+    return respuesta["estado"], json.loads(b"".join(respuesta["cuerpo"]))
+
+
+def test_importar_en_trozos_sin_content_length(base, consultar):
+    hoy = date.today()
+    lineas = [
+        json.dumps({
+            "proveedor_nombre": "Proveedor",
+            "proveedor_contacto": "999999999",
+            "producto": f"Producto {i}",
+            "cantidad": 1,
+            "precio_unitario": 1,
+            "fecha_registro": hoy.isoformat(),
+            "fecha_vencimiento": (hoy + timedelta(days=30)).isoformat(),
+        }).encode() + b"\n"
+        for i in range(50)
+    ]
+
+    # Sin Content-Length (como un envío chunked), 50 trozos
+    estado, cuerpo = _pedir("POST", "/importar_compras?formato=ndjson", lineas)
+
+    assert estado == 200, cuerpo
+    assert consultar("SELECT COUNT(*) AS n FROM compras") == [{"n": 50}]
+
+
+def test_ruta_asincrona_rechaza_cuerpo_excesivo(base, monkeypatch):
+    monkeypatch.setattr(asgi, "CUERPO_MAXIMO", 10)
+
+    estado, cuerpo = _pedir("POST", "/obtener_movimientos_dia", [b'{"fecha": ', b'"2030-01-01"}'])
+
+    assert estado == 413
+    assert "error" in cuerpo
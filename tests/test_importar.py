@@ -0,0 +1,94 @@
+# tests/test_importar.py
+# Una exportación de compras (/exportar/compras) se vuelve a importar
+# (/importar_compras) sin perder ni duplicar nada.
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+
+COMPRAS = """
+    SELECT nombre_proveedor, contacto_proveedor, producto, cantidad,
+           precio_unitario, fecha_registro, fecha_vencimiento
+    FROM compras
+    ORDER BY producto, fecha_registro
+"""
+RESUMEN = """
+    SELECT fecha, producto, unidades_compradas, costo_compras, num_compras
+    FROM resumen_diario
+    ORDER BY fecha, producto
+"""
+
+
+def _compra(producto, cantidad, precio, registro):
+    return {
+        "proveedor_nombre": "Proveedor",
+        "proveedor_contacto": "999999999",
+        "producto": producto,
+        "cantidad": cantidad,
+        "precio_unitario": precio,
+        "fecha_registro": registro.isoformat(),
+        "fecha_vencimiento": (registro + timedelta(days=30)).isoformat(),
+    }
+
+
+@pytest.fixture
+def compras(cliente, consultar):
+    hoy = date.today()
+    for datos in (_compra("Leche", 10, 2.5, hoy),
+                  _compra("Leche", 5, 2.5, hoy - timedelta(days=1)),
+                  _compra("Pan, integral", 4, 0.75, hoy),
+                  _compra('Queso "fresco"', 2, 8, hoy)):
+        assert cliente.post("/registrar_compra", json=datos).get_json()["ok"]
+    return consultar(COMPRAS), consultar(RESUMEN)
+
+
+def _vaciar(consultar):
+    from hattucci.server import db
+
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM compras")
+        cursor.execute("DELETE FROM resumen_diario")
+        conn.commit()
+    assert consultar(COMPRAS) == []
+
+
+@pytest.mark.parametrize("formato", ["ndjson", "csv"])
+def test_exportar_e_importar_ida_y_vuelta(compras, cliente, consultar, formato):
+    antes, resumen_antes = compras
+    exportado = cliente.get(f"/exportar/compras?formato={formato}").get_data()
+    _vaciar(consultar)
+
+    respuesta = cliente.post(
+        f"/importar_compras?formato={formato}",
+        data={"archivo": (io.BytesIO(exportado), f"compras.{formato}")},
+        content_type="multipart/form-data",
+    )
+
+    assert respuesta.status_code == 200, respuesta.get_json()
+    assert consultar(COMPRAS) == antes
+    assert consultar(RESUMEN) == resumen_antes
+
+
+def test_importar_dos_veces_suma_cantidades(compras, cliente, consultar):
+    antes, _ = compras
+    exportado = cliente.get("/exportar/compras?formato=ndjson").get_data()
+
+    respuesta = cliente.post("/importar_compras?formato=ndjson", data=exportado)
+
+    assert respuesta.status_code == 200, respuesta.get_json()
+    despues = consultar(COMPRAS)
+    assert len(despues) == len(antes)
+    assert [f["cantidad"] for f in despues] == [2 * f["cantidad"] for f in antes]
+
+
+def test_importar_rechaza_todo_si_una_fila_es_invalida(compras, cliente, consultar):
+    antes, _ = compras
+    filas = [_compra("Yogur", 1, 1, date.today()), {**_compra("Mantequilla", 1, 1, date.today()), "proveedor_contacto": "123"}]
+    cuerpo = "\n".join(json.dumps(f) for f in filas).encode()
+
+    respuesta = cliente.post("/importar_compras?formato=ndjson", data=cuerpo)
+
+    assert respuesta.status_code == 422
+    assert consultar(COMPRAS) == antes
@@ -0,0 +1,46 @@
+# tests/test_inventario.py
+# Caché de la versión del inventario (ver inventario.py).
+from hattucci.server import db, inventario
+
+
+def test_lector_durante_la_transaccion_no_deja_version_vieja(base, monkeypatch):
+    monkeypatch.setattr(inventario, "TTL_VERSION", 60)
+    anterior = inventario.version()
+
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        nueva = inventario.marcar_cambio(cursor)
+        # Otra petición del mismo worker lee antes del commit: ve la versión anterior
+        assert inventario.version() == anterior
+        conn.commit()
+    inventario.publicar("recargar", {}, nueva)
+
+    assert nueva > anterior
+    assert inventario.version() == nueva
+
+
+def test_version_en_cache_no_retrocede(base, monkeypatch):
+    monkeypatch.setattr(inventario, "TTL_VERSION", 60)
+    inventario.recordar_version(5)
+    inventario.recordar_version(4)
+
+    assert inventario.version_en_cache() == 5
+
+
+def test_eventos_solo_nombran_los_productos(cliente, registrar_lote, consultar):
+    from hattucci.server import eventos
+
+    desde = eventos.broker.ultimo()
+    registrar_lote("Leche", "2030-01-01", 5, 3.5)
+    registrar_lote("Pan", "2030-01-01", 5, 1)
+    cliente.post("/descontar_stock", json={"venta": [{"nombre": "Pan", "cantidad": 1}]})
+    lote = consultar("SELECT id FROM inventario WHERE producto = %s", ("Leche",))[0]["id"]
+    cliente.delete(f"/eliminar_inventario/{lote}")
+
+    publicados = [(tipo, datos["productos"]) for _, tipo, datos in eventos.broker.esperar(desde, 0)]
+    assert publicados == [
+        ("cambio", ["Leche"]),
+        ("cambio", ["Pan"]),
+        ("cambio", ["Pan"]),
+        ("cambio", ["Leche"]),
+    ]
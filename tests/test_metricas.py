@@ -0,0 +1,30 @@
+# tests/test_metricas.py
+# Latencia por ruta (ver metricas.py).
+import time
+
+from hattucci.server import exportar, metricas
+
+PAUSA = 0.2
+
+
+def _suma(ruta):
+    # [conteo por cubo..., suma, total]
+    serie = metricas.peticiones._series.get((ruta, "GET", 200))
+    return (serie[-2], serie[-1]) if serie else (0, 0)
+
+
+def test_respuesta_en_flujo_se_mide_hasta_el_final(cliente, monkeypatch):
+    def leer_filas(tabla, desde=None, hasta=None):
+        time.sleep(PAUSA)
+        yield {"id": 1}
+
+    monkeypatch.setattr(exportar, "leer_filas", leer_filas)
+    suma, total = _suma("/exportar/<tabla>")
+
+    with cliente.get("/exportar/compras") as respuesta:
+        assert respuesta.status_code == 200
+        respuesta.get_data()
+
+    suma_nueva, total_nuevo = _suma("/exportar/<tabla>")
+    assert total_nuevo == total + 1
+    assert suma_nueva - suma >= PAUSA
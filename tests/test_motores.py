@@ -0,0 +1,76 @@
+# tests/test_motores.py
+# La capa de datos se comporta igual en los dos motores (db.py, motor_sqlite.py).
+from datetime import date
+
+import pytest
+
+from hattucci.server import db
+
+UPSERT_LOTE = """
+    INSERT INTO inventario (producto, fecha_vencimiento, stock, precio_venta)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        id = LAST_INSERT_ID(id),
+        stock = stock + VALUES(stock)
+"""
+
+
+def test_upsert_rowcount_y_lastrowid(base, consultar):
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(UPSERT_LOTE, ("Leche", "2030-01-01", 5, 3.5))
+        assert cursor.rowcount == 1
+        nuevo = cursor.lastrowid
+
+        cursor.execute(UPSERT_LOTE, ("Leche", "2030-01-01", 2, 3.5))
+        assert cursor.rowcount == 2
+        assert cursor.lastrowid == nuevo
+        conn.commit()
+
+    filas = consultar("SELECT id, stock FROM inventario WHERE producto = %s", ("Leche",))
+    assert filas == [{"id": nuevo, "stock": 7}]
+
+
+def test_rollback_deshace_la_transaccion(base, consultar):
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(UPSERT_LOTE, ("Pan", "2030-01-01", 5, 1))
+        conn.rollback()
+
+    assert consultar("SELECT id FROM inventario") == []
+
+
+def test_tipos_como_mysql_connector(base, registrar_lote, consultar):
+    registrar_lote("Leche", "2030-01-01", 5, 3.5)
+    fila = consultar("SELECT fecha_vencimiento, stock, precio_venta FROM inventario")[0]
+
+    assert fila["fecha_vencimiento"] == date(2030, 1, 1)
+    assert fila["stock"] == 5
+    assert float(fila["precio_venta"]) == 3.5
+
+
+def test_sqlite_en_modo_wal(base):
+    if base != "sqlite":
+        pytest.skip("solo SQLite")
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == "wal"
+
+
+def test_flujo_completo_por_las_rutas(cliente, registrar_lote):
+    hoy = date.today().isoformat()
+    registrar_lote("Leche", "2030-01-01", 10, 3.5)
+
+    venta = cliente.post("/descontar_stock", json={
+        "venta": [{"nombre": "Leche", "cantidad": 4}],
+        "comprobante": "SIN_COMPROBANTE",
+    }).get_json()
+    assert venta["ok"] and venta["total"] == 14.0
+
+    lista = cliente.get("/obtener_inventario?todo=1").get_json()
+    assert [(i["producto"], i["stock"]) for i in lista] == [("Leche", 6)]
+
+    dia = cliente.post("/obtener_movimientos_dia", json={"fecha": hoy}).get_json()
+    assert dia["totalVentas"] == 14.0
+    assert [(m["tipo"], m["producto"], m["cantidad"]) for m in dia["movimientos"]] == [("VENTA", "Leche", 4)]
@@ -0,0 +1,46 @@
+# tests/test_paginacion.py
+# Recorrer un listado página a página con el cursor entrega cada fila una
+# sola vez y termina (ver paginacion.py).
+from datetime import date, timedelta
+
+
+def _recorrer(cliente, ruta, limite):
+    ids, cursor = [], None
+    for _ in range(50):
+        consulta = f"{ruta}?limite={limite}" + (f"&cursor={cursor}" if cursor else "")
+        pagina = cliente.get(consulta).get_json()
+        ids.extend(fila["id"] for fila in pagina["items"])
+        cursor = pagina["siguiente"]
+        if not cursor:
+            return ids
+    raise AssertionError(f"{ruta} no termina: {ids}")
+
+
+def test_compras_por_paginas(cliente):
+    hoy = date.today()
+    # Mismo día repetido (desempate por id) y días distintos
+    for i, dias in enumerate((0, 0, 0, 1, 2)):
+        respuesta = cliente.post("/registrar_compra", json={
+            "proveedor_nombre": "Proveedor",
+            "proveedor_contacto": "999999999",
+            "producto": f"Producto {i}",
+            "cantidad": 1,
+            "precio_unitario": 1,
+            "fecha_registro": (hoy - timedelta(days=dias)).isoformat(),
+            "fecha_vencimiento": (hoy + timedelta(days=30)).isoformat(),
+        }).get_json()
+        assert respuesta["ok"], respuesta
+
+    todas = [c["id"] for c in cliente.get("/obtener_compras?todo=1").get_json()]
+    for limite in (1, 2, 3):
+        assert _recorrer(cliente, "/obtener_compras", limite) == todas
+    assert len(todas) == 5
+
+
+def test_inventario_por_paginas(cliente, registrar_lote):
+    for i in range(5):
+        registrar_lote(f"Producto {i}", "2030-01-01", 1, 1)
+
+    todos = [i["id"] for i in cliente.get("/obtener_inventario?todo=1").get_json()]
+    assert _recorrer(cliente, "/obtener_inventario", 2) == todos
+    assert len(todos) == 5
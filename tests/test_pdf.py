@@ -0,0 +1,66 @@
+# tests/test_pdf.py
+# Caché en disco de los PDF de días cerrados (ver pdf.py).
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from hattucci.server import db, pdf, resumen
+from hattucci.server.cache import incrementar_version
+
+
+@pytest.fixture
+def cache_pdf(base, tmp_path, monkeypatch):
+    directorio = tmp_path / "pdf"
+    directorio.mkdir()
+    monkeypatch.setattr(pdf, "CACHE_DIR", str(directorio))
+    return directorio
+
+
+def _dia(dias_atras):
+    return date.today() - timedelta(days=dias_atras)
+
+
+def _cambiar_dias_cerrados():
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        incrementar_version(cursor, resumen.VERSION_CERRADOS)
+        conn.commit()
+
+
+def test_nueva_version_borra_las_anteriores(cache_pdf):
+    primera, _ = pdf.pdf_dia(_dia(1))
+    pdf.pdf_dia(_dia(2))
+    _cambiar_dias_cerrados()
+
+    segunda, temporal = pdf.pdf_dia(_dia(1))
+
+    assert not temporal and segunda != primera
+    assert sorted(os.listdir(cache_pdf)) == [os.path.basename(segunda)]
+
+
+def test_borra_parciales_abandonados(cache_pdf):
+    abandonado = cache_pdf / "abandonado.parcial"
+    en_curso = cache_pdf / "en_curso.parcial"
+    abandonado.write_bytes(b"")
+    en_curso.write_bytes(b"")
+    hace_rato = time.time() - 2 * pdf.EDAD_PARCIAL
+    os.utime(abandonado, (hace_rato, hace_rato))
+
+    pdf.pdf_dia(_dia(1))
+
+    assert not abandonado.exists()
+    assert en_curso.exists()
+
+
+def test_maximo_de_archivos(cache_pdf, monkeypatch):
+    monkeypatch.setattr(pdf, "MAXIMO_CACHE", 2)
+    rutas = []
+    for dias in (1, 2, 3):
+        ruta, _ = pdf.pdf_dia(_dia(dias))
+        rutas.append(ruta)
+        # Que el orden por fecha de modificación sea el de creación
+        os.utime(ruta, (time.time() - 10 + dias, time.time() - 10 + dias))
+
+    assert sorted(os.listdir(cache_pdf)) == sorted(os.path.basename(r) for r in rutas[1:])
@@ -0,0 +1,119 @@
+# tests/test_resumen.py
+# El resumen diario que mantienen ventas y compras es igual al que se
+# reconstruye desde cero, y los reportes cuadran con las tablas de detalle.
+from datetime import date, timedelta
+
+import pytest
+
+from hattucci.server import resumen
+
+COLUMNAS = ("unidades_vendidas", "ingresos", "num_ventas",
+            "unidades_compradas", "costo_compras", "num_compras")
+
+
+def _resumen(consultar):
+    filas = consultar(f"""
+        SELECT fecha, producto, {", ".join(COLUMNAS)}
+        FROM resumen_diario
+        ORDER BY fecha, producto
+    """)
+    # Una compra eliminada deja su fila en cero; la reconstrucción no la crea
+    return [
+        (fila["fecha"], fila["producto"], *(float(fila[c]) for c in COLUMNAS))
+        for fila in filas
+        if any(fila[c] for c in COLUMNAS)
+    ]
+
+
+@pytest.fixture
+def movimientos(cliente, registrar_lote, consultar):
+    """Compras de ayer y de hoy (una eliminada después) y dos ventas de hoy."""
+    hoy = date.today()
+    vence = (hoy + timedelta(days=60)).isoformat()
+    for producto, cantidad, precio, fecha in (("Leche", 10, 2.5, hoy),
+                                              ("Pan", 4, 0.5, hoy),
+                                              ("Pan", 6, 0.5, hoy - timedelta(days=1)),
+                                              ("Queso", 2, 8, hoy)):
+        respuesta = cliente.post("/registrar_compra", json={
+            "proveedor_nombre": "Proveedor",
+            "proveedor_contacto": "999999999",
+            "producto": producto,
+            "cantidad": cantidad,
+            "precio_unitario": precio,
+            "fecha_registro": fecha.isoformat(),
+            "fecha_vencimiento": vence,
+        }).get_json()
+        assert respuesta["ok"], respuesta
+
+    registrar_lote("Leche", vence, 10, 3.5)
+    registrar_lote("Pan", vence, 10, 1)
+    for venta in ([{"nombre": "Leche", "cantidad": 3}, {"nombre": "Pan", "cantidad": 2, "descuento": 50}],
+                  [{"nombre": "Leche", "cantidad": 1}]):
+        respuesta = cliente.post("/descontar_stock", json={"venta": venta, "comprobante": "BOLETA"}).get_json()
+        assert respuesta["ok"], respuesta
+
+    queso = consultar("SELECT id FROM compras WHERE producto = %s", ("Queso",))[0]["id"]
+    assert cliente.delete(f"/eliminar_compra/{queso}").get_json()["ok"]
+    return hoy
+
+
+def test_resumen_igual_a_la_reconstruccion(movimientos, consultar):
+    mantenido = _resumen(consultar)
+    resumen.reconstruir()
+
+    assert mantenido == _resumen(consultar)
+    assert mantenido  # no se comparan dos listas vacías
+
+
+def test_reportes_cuadran_con_el_detalle(movimientos, cliente, consultar):
+    hoy = movimientos.isoformat()
+    ventas = consultar("SELECT COUNT(*) AS n, SUM(cantidad) AS unidades, SUM(total) AS total FROM ventas")[0]
+    compras = consultar("""
+        SELECT COUNT(*) AS n, SUM(cantidad * precio_unitario) AS total
+        FROM compras
+        WHERE fecha_registro >= %s
+    """, (hoy,))[0]
+
+    dia = cliente.post("/obtener_reportes_dia", json={"fecha": hoy}).get_json()
+    assert dia["ventas"] == {
+        "total_ventas": float(ventas["total"]),
+        "productos_vendidos": int(ventas["unidades"]),
+        "num_ventas": ventas["n"],
+    }
+    assert dia["compras"] == {"total_compras": float(compras["total"]), "num_compras": compras["n"]}
+
+    rango = cliente.post("/reporte_rango", json={"desde": hoy, "hasta": hoy}).get_json()
+    assert rango["totales"]["ventas"] == float(ventas["total"])
+    assert rango["totales"]["compras"] == float(compras["total"])
+
+    detalle = cliente.post("/obtener_movimientos_dia", json={"fecha": hoy}).get_json()
+    agrupado = cliente.post("/obtener_movimientos_dia", json={"fecha": hoy, "agrupado": True}).get_json()
+    assert len(detalle["movimientos"]) == ventas["n"] + compras["n"]
+    for tipo in ("VENTA", "COMPRA"):
+        por_fila = sum(float(m["total"]) for m in detalle["movimientos"] if m["tipo"] == tipo)
+        por_producto = sum(m["total"] for m in agrupado["movimientos"] if m["tipo"] == tipo)
+        assert por_fila == pytest.approx(por_producto)
+
+
+def test_movimientos_sin_fecha_valida(cliente):
+    for cuerpo in ({}, {"fecha": "ayer"}):
+        respuesta = cliente.post("/obtener_movimientos_dia", json=cuerpo)
+        assert respuesta.status_code == 400
+
+
+def test_pantalla_de_reportes_lee_el_resumen(movimientos, cliente):
+    from hattucci.server import db
+
+    # Sin las filas de detalle el reporte agrupado sale igual: viene de resumen_diario
+    hoy = movimientos.isoformat()
+    antes = cliente.post("/obtener_movimientos_dia", json={"fecha": hoy, "agrupado": True}).get_json()
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM ventas")
+        cursor.execute("DELETE FROM compras")
+        conn.commit()
+
+    despues = cliente.post("/obtener_movimientos_dia", json={"fecha": hoy, "agrupado": True}).get_json()
+    assert despues == antes
+    assert {m["tipo"] for m in despues["movimientos"]} == {"VENTA", "COMPRA"}
+    assert cliente.post("/obtener_movimientos_dia", json={"fecha": hoy}).get_json()["movimientos"] == []
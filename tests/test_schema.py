@@ -0,0 +1,47 @@
+# tests/test_schema.py
+# Migraciones, planes de las consultas críticas y filtros de fecha por rango.
+from hattucci.server import db, schema
+
+COMPRA = """
+    INSERT INTO compras (nombre_proveedor, contacto_proveedor, producto, cantidad,
+                         precio_unitario, fecha_registro, fecha_vencimiento)
+    VALUES ('Proveedor', '999999999', %s, 1, 1.00, %s, '2031-01-01')
+"""
+
+
+def test_migrar_es_idempotente(base):
+    assert schema.migrar() == []
+
+
+def test_consultas_criticas_usan_indice(base):
+    assert schema.verificar_planes() == []
+
+
+def test_verificar_planes_detecta_recorrido_completo(base):
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        schema._borrar_indice(cursor, "compras", "idx_compras_registro")
+        conn.commit()
+    try:
+        regresiones = schema.verificar_planes()
+    finally:
+        with db.conexion() as conn:
+            cursor = conn.cursor()
+            schema._crear_indice(cursor, "compras", "idx_compras_registro", "fecha_registro, id")
+            conn.commit()
+
+    assert "compras del día" in [nombre for nombre, _, _ in regresiones]
+
+
+def test_filtro_del_dia_incluye_todo_el_dia_y_nada_mas(cliente):
+    with db.conexion() as conn:
+        cursor = conn.cursor()
+        for producto, fecha in (("antes", "2030-04-30 23:59:59"),
+                                ("inicio", "2030-05-01 00:00:00"),
+                                ("fin", "2030-05-01 23:59:59"),
+                                ("despues", "2030-05-02 00:00:00")):
+            cursor.execute(COMPRA, (producto, fecha))
+        conn.commit()
+
+    compras = cliente.post("/filtrar_compras_dia", json={"dia": "2030-05-01"}).get_json()
+    assert sorted(c["producto"] for c in compras) == ["fin", "inicio"]
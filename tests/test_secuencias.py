@@ -0,0 +1,73 @@
+# tests/test_secuencias.py
+# Correlativos de boleta únicos y, con BOLETA_BLOQUE=1, sin huecos (ver secuencias.py).
+import threading
+
+from hattucci.server import secuencias
+
+
+def _boleta(cliente, producto="Leche", cantidad=1):
+    return cliente.post("/descontar_stock", json={
+        "venta": [{"nombre": producto, "cantidad": cantidad}],
+        "comprobante": "BOLETA",
+    }).get_json()
+
+
+def test_estres_sin_duplicados_ni_huecos(base):
+    resultado = secuencias.estres(hilos=8, por_hilo=25)
+
+    assert resultado == {"numeros": 200, "duplicados": 0, "huecos": 0, "errores": 0}
+
+
+def test_estres_por_bloques_sin_duplicados(base):
+    resultado = secuencias.estres(hilos=8, por_hilo=25, bloque=10)
+
+    assert resultado["numeros"] == 200
+    assert resultado["duplicados"] == 0
+    assert resultado["errores"] == 0
+
+
+def test_boletas_simultaneas_correlativas(cliente, registrar_lote):
+    from hattucci.server.app import app
+
+    registrar_lote("Leche", "2030-01-01", 100, 1)
+    correlativos = []
+    errores = []
+    lock = threading.Lock()
+    salida = threading.Barrier(10)
+
+    def caja():
+        cliente = app.test_client()
+        salida.wait()
+        for _ in range(3):
+            respuesta = _boleta(cliente)
+            with lock:
+                if respuesta["ok"]:
+                    correlativos.append(int(respuesta["correlativo"]))
+                else:
+                    errores.append(respuesta)
+
+    cajas = [threading.Thread(target=caja) for _ in range(10)]
+    for t in cajas:
+        t.start()
+    for t in cajas:
+        t.join()
+
+    assert errores == []
+    assert sorted(correlativos) == list(range(1, 31))
+
+
+def test_venta_fallida_no_gasta_numero(cliente, registrar_lote):
+    registrar_lote("Leche", "2030-01-01", 2, 1)
+
+    assert _boleta(cliente)["correlativo"] == "1"
+    assert not _boleta(cliente, cantidad=5)["ok"]
+    assert _boleta(cliente)["correlativo"] == "2"
+
+
+def test_modo_bloque_en_las_ventas(cliente, registrar_lote, monkeypatch):
+    # En SQLite se ignora el bloque y se numera dentro de la venta
+    monkeypatch.setattr(secuencias, "BOLETA_BLOQUE", 5)
+    monkeypatch.setattr(secuencias, "_bloque_boletas", secuencias.Bloque(secuencias.BOLETA, 5))
+    registrar_lote("Leche", "2030-01-01", 10, 1)
+
+    assert [_boleta(cliente)["correlativo"] for _ in range(3)] == ["1", "2", "3"]
@@ -0,0 +1,33 @@
+# tests/test_upsert.py
+# Registros simultáneos del mismo lote y la misma compra se fusionan en una
+# sola fila (claves únicas + ON DUPLICATE KEY UPDATE, ver estres.py).
+from datetime import date, timedelta
+
+from hattucci.server import estres
+
+
+def test_registros_simultaneos_se_fusionan(base):
+    resultado = estres.estres_upsert(hilos=8, por_hilo=10)
+
+    assert resultado["errores"] == 0
+    assert resultado["inventario"] == {"filas": 1, "stock": 80}
+    assert resultado["compras"] == {"filas": 1, "cantidad": 80}
+
+
+def test_compra_del_mismo_dia_suma_y_otro_dia_no(cliente, consultar):
+    hoy = date.today()
+    compra = {
+        "proveedor_nombre": "Proveedor",
+        "proveedor_contacto": "999999999",
+        "producto": "Leche",
+        "cantidad": 3,
+        "precio_unitario": 2.5,
+        "fecha_registro": hoy.isoformat(),
+        "fecha_vencimiento": (hoy + timedelta(days=30)).isoformat(),
+    }
+    for fecha in (hoy, hoy, hoy + timedelta(days=1)):
+        respuesta = cliente.post("/registrar_compra", json={**compra, "fecha_registro": fecha.isoformat()}).get_json()
+        assert respuesta["ok"], respuesta
+
+    filas = consultar("SELECT cantidad FROM compras ORDER BY fecha_registro")
+    assert [f["cantidad"] for f in filas] == [6, 3]
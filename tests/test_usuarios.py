@@ -0,0 +1,36 @@
+# tests/test_usuarios.py
+# La caché de usuarios responde lo mismo que la base y /registrar guarda lo
+# que se verificó (ver usuarios.py).
+from hattucci.server import usuarios
+
+
+def _registrar(cliente, usuario, correo):
+    return cliente.post("/registrar", data={
+        "usuario": usuario,
+        "correo": correo,
+        "nombre": "Ana",
+        "apellido": "Pérez",
+        "telefono": "999999999",
+        "contraseña": "secreta",
+    })
+
+
+def test_registrar_guarda_el_valor_normalizado(cliente, consultar):
+    assert cliente.get("/disponibilidad?usuario=%20Ana%20").get_json()["usuario"] is False
+
+    assert _registrar(cliente, " Ana ", " ana@hattucci.com ").status_code == 302
+
+    assert consultar("SELECT usuario, correo FROM registro") == [
+        {"usuario": "Ana", "correo": "ana@hattucci.com"}
+    ]
+    assert "ya existen" in _registrar(cliente, "Ana", "otra@hattucci.com").get_data(as_text=True)
+
+
+def test_cache_responde_lo_mismo_que_la_base(cliente, consultar):
+    assert _registrar(cliente, "José", "jose@hattucci.com").status_code == 302
+
+    for variante in ("José", "josé", "JOSE", "jose", " jose "):
+        en_base = bool(consultar("SELECT id FROM registro WHERE usuario = %s", (variante.strip(),)))
+        # Dos veces: la segunda sale de la caché
+        assert usuarios.existe_usuario(variante) == en_base, variante
+        assert usuarios.existe_usuario(variante) == en_base, variante
@@ -0,0 +1,99 @@
+# tests/test_ventas.py
+# /descontar_stock: una venta es una sola transacción con un número fijo de
+# sentencias (ver ventas.py).
+import threading
+from datetime import date
+
+from hattucci.server import metricas
+
+# Cajas vendiendo a la vez del mismo lote
+HILOS = 20
+
+
+def _vender(cliente, venta, comprobante="SIN_COMPROBANTE"):
+    return cliente.post("/descontar_stock", json={
+        "venta": venta,
+        "comprobante": comprobante,
+    }).get_json()
+
+
+def _sentencias(cliente, venta):
+    antes = metricas.consultas.total()
+    respuesta = _vender(cliente, venta, "BOLETA")
+    assert respuesta["ok"], respuesta
+    return metricas.consultas.total() - antes
+
+
+def test_sentencias_no_dependen_del_carrito(cliente, registrar_lote):
+    for i in range(10):
+        registrar_lote(f"Producto {i}", "2030-01-01", 100, 1)
+
+    uno = _sentencias(cliente, [{"nombre": "Producto 0", "cantidad": 1}])
+    diez = _sentencias(cliente, [{"nombre": f"Producto {i}", "cantidad": 1} for i in range(10)])
+
+    assert uno == diez
+
+
+def test_venta_fallida_no_deja_rastro(cliente, registrar_lote, consultar):
+    registrar_lote("Leche", "2030-01-01", 5, 3.5)
+    registrar_lote("Pan", "2030-01-01", 2, 1)
+
+    respuesta = _vender(cliente, [
+        {"nombre": "Leche", "cantidad": 1},
+        {"nombre": "Pan", "cantidad": 3},
+    ], "BOLETA")
+
+    assert not respuesta["ok"]
+    assert respuesta["faltantes"] == [{"producto": "Pan", "pedido": 3, "disponible": 2}]
+    assert consultar("SELECT producto, stock FROM inventario ORDER BY producto") == [
+        {"producto": "Leche", "stock": 5},
+        {"producto": "Pan", "stock": 2},
+    ]
+    assert consultar("SELECT id FROM ventas") == []
+    assert consultar("SELECT producto FROM resumen_diario WHERE num_ventas > 0") == []
+
+
+def test_fefo_y_precio_de_los_lotes(cliente, registrar_lote, consultar):
+    registrar_lote("Leche", "2030-03-01", 10, 4)
+    registrar_lote("Leche", "2030-01-01", 2, 3.5)
+
+    # El total que manda el navegador se ignora
+    respuesta = _vender(cliente, [{"nombre": "Leche", "cantidad": 3, "descuento": 10, "total": 1}])
+
+    assert respuesta["ok"], respuesta
+    assert respuesta["items"][0]["total"] == 9.9  # (2 × 3.50 + 1 × 4.00) − 10 %
+    assert respuesta["total"] == 9.9
+    assert consultar("SELECT fecha_vencimiento, stock FROM inventario ORDER BY fecha_vencimiento") == [
+        {"fecha_vencimiento": date(2030, 1, 1), "stock": 0},
+        {"fecha_vencimiento": date(2030, 3, 1), "stock": 9},
+    ]
+
+
+def test_cajas_simultaneas_no_venden_de_mas(cliente, registrar_lote, consultar):
+    from hattucci.server.app import app
+
+    registrar_lote("Leche", "2030-01-01", 50, 1)
+    errores = []
+    salida = threading.Barrier(HILOS)
+
+    def caja():
+        cliente = app.test_client()
+        salida.wait()
+        # Cada caja vende de a una unidad hasta que se acaba
+        while True:
+            respuesta = _vender(cliente, [{"nombre": "Leche", "cantidad": 1}])
+            if respuesta.get("faltantes"):
+                return
+            if not respuesta["ok"] and "intente nuevamente" not in respuesta["error"]:
+                errores.append(respuesta)
+                return
+
+    cajas = [threading.Thread(target=caja) for _ in range(HILOS)]
+    for t in cajas:
+        t.start()
+    for t in cajas:
+        t.join()
+
+    assert errores == []
+    assert consultar("SELECT stock FROM inventario") == [{"stock": 0}]
+    assert consultar("SELECT COUNT(*) AS n, SUM(cantidad) AS unidades FROM ventas") == [{"n": 50, "unidades": 50}]